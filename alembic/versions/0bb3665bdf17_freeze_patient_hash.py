@@ -0,0 +1,116 @@
+"""freeze_patient_hash
+
+Revision ID: 0bb3665bdf17
+Revises: 7d502901dc4a
+Create Date: 2026-10-17 14:03:03.117610
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0bb3665bdf17'
+down_revision: Union[str, Sequence[str], None] = '7d502901dc4a'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # patient_hash is the public patient key (URLs, ETags, frontend state), but as a generated
+    # md5(patient_id) it changed whenever key rotation rewrote the ciphertext. DROP EXPRESSION
+    # keeps every current value, so no existing URL breaks; from now on a patient's hash is set
+    # once on insert, and samples copy their patient's instead of hashing their own patient_id.
+    op.execute("ALTER TABLE patients ALTER COLUMN patient_hash DROP EXPRESSION;")
+    op.execute("ALTER TABLE samples ALTER COLUMN patient_hash DROP EXPRESSION;")
+
+    op.execute("""
+        CREATE FUNCTION assign_patient_hash()
+        RETURNS TRIGGER AS $$
+        BEGIN
+            NEW.patient_hash = md5(NEW.patient_id);
+            RETURN NEW;
+        END;
+        $$ language 'plpgsql';
+    """)
+    op.execute("""
+        CREATE TRIGGER assign_patient_hash
+            BEFORE INSERT ON public.patients
+            FOR EACH ROW
+            EXECUTE FUNCTION assign_patient_hash();
+    """)
+
+    # Also fires for the ON UPDATE CASCADE of a rotation, by which time the patient row already
+    # carries the new patient_id and the same hash
+    op.execute("""
+        CREATE FUNCTION inherit_patient_hash()
+        RETURNS TRIGGER AS $$
+        BEGIN
+            SELECT patient_hash INTO NEW.patient_hash FROM public.patients WHERE patient_id = NEW.patient_id;
+            RETURN NEW;
+        END;
+        $$ language 'plpgsql';
+    """)
+    op.execute("""
+        CREATE TRIGGER inherit_patient_hash
+            BEFORE INSERT OR UPDATE OF patient_id ON public.samples
+            FOR EACH ROW
+            EXECUTE FUNCTION inherit_patient_hash();
+    """)
+
+    op.execute("ALTER TABLE patients ALTER COLUMN patient_hash SET NOT NULL;")
+    op.execute("ALTER TABLE samples ALTER COLUMN patient_hash SET NOT NULL;")
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.execute("DROP TRIGGER inherit_patient_hash ON public.samples;")
+    op.execute("DROP FUNCTION inherit_patient_hash();")
+    op.execute("DROP TRIGGER assign_patient_hash ON public.patients;")
+    op.execute("DROP FUNCTION assign_patient_hash();")
+
+    # Back to generated columns: the views stop reading them while they are re-added. Hashes of
+    # rotated patients revert to md5 of their current ciphertext.
+    op.execute("""
+        CREATE OR REPLACE VIEW public.frontend_patients AS
+        SELECT
+            md5(patient_id) AS patient_hash,
+            created_at,
+            updated_at
+        FROM public.patients;
+    """)
+    op.execute("""
+        CREATE OR REPLACE VIEW public.frontend_samples AS
+        SELECT
+            sample_id,
+            md5(patient_id) AS patient_hash,
+            created_at,
+            updated_at
+        FROM public.samples;
+    """)
+    op.execute("ALTER TABLE samples DROP COLUMN patient_hash;")
+    op.execute("ALTER TABLE patients DROP COLUMN patient_hash;")
+    op.execute("ALTER TABLE patients ADD COLUMN patient_hash text GENERATED ALWAYS AS (md5(patient_id)) STORED;")
+    op.execute("CREATE UNIQUE INDEX idx_patients_patient_hash ON patients (patient_hash);")
+    op.execute("ALTER TABLE samples ADD COLUMN patient_hash text GENERATED ALWAYS AS (md5(patient_id)) STORED;")
+    op.execute("CREATE INDEX idx_samples_patient_hash ON samples (patient_hash);")
+    op.execute("""
+        CREATE OR REPLACE VIEW public.frontend_patients AS
+        SELECT
+            patient_hash,
+            created_at,
+            updated_at
+        FROM public.patients;
+    """)
+    op.execute("""
+        CREATE OR REPLACE VIEW public.frontend_samples AS
+        SELECT
+            sample_id,
+            patient_hash,
+            created_at,
+            updated_at
+        FROM public.samples;
+    """)
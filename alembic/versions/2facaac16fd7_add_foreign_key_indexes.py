@@ -0,0 +1,36 @@
+"""add_foreign_key_indexes
+
+Revision ID: 2facaac16fd7
+Revises: 93ad91f8c6ba
+Create Date: 2026-10-17 12:24:28.788800
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '2facaac16fd7'
+down_revision: Union[str, Sequence[str], None] = '93ad91f8c6ba'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Postgres does not index foreign keys automatically. Without these, every selectinload
+    # (WHERE run_id IN ...) and the per-run results lookup in the bulk export is a sequential scan.
+    op.execute("CREATE INDEX idx_runs_sample_id ON runs (sample_id);")
+    op.execute("CREATE INDEX idx_file_locations_run_id ON file_locations (run_id);")
+    op.execute("CREATE INDEX idx_pipeline_results_run_id ON pipeline_results (run_id);")
+    op.execute("CREATE INDEX idx_api_endpoints_run_id ON api_endpoints (run_id);")
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.execute("DROP INDEX IF EXISTS idx_api_endpoints_run_id;")
+    op.execute("DROP INDEX IF EXISTS idx_pipeline_results_run_id;")
+    op.execute("DROP INDEX IF EXISTS idx_file_locations_run_id;")
+    op.execute("DROP INDEX IF EXISTS idx_runs_sample_id;")
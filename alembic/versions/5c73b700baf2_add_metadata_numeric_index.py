@@ -0,0 +1,41 @@
+"""add_metadata_numeric_index
+
+Revision ID: 5c73b700baf2
+Revises: b3525078b670
+Create Date: 2026-10-17 12:38:57.096381
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision: str = '5c73b700baf2'
+down_revision: Union[str, Sequence[str], None] = 'b3525078b670'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # NULL unless doc->key is a JSON number, so range filters never fail on a string value.
+    # IMMUTABLE lets it back expression indexes; as a plain SQL function the planner inlines
+    # it, so the indexed expression and the query's expression match after inlining.
+    op.execute("""
+        CREATE OR REPLACE FUNCTION public.metadata_numeric(doc jsonb, key text)
+        RETURNS numeric
+        LANGUAGE sql IMMUTABLE PARALLEL SAFE
+        AS $$
+            SELECT CASE WHEN jsonb_typeof(doc -> key) = 'number' THEN (doc ->> key)::numeric END
+        $$;
+    """)
+    # No per-key index yet: runs.metadata carries no numeric key today (QC numbers such as
+    # mean_coverage live in pipeline_results.metrics). A key that starts being written and
+    # range-filtered gets its own revision with
+    #     CREATE INDEX idx_runs_metadata_<key> ON runs (metadata_numeric(metadata, '<key>'));
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.execute("DROP FUNCTION IF EXISTS public.metadata_numeric(jsonb, text);")
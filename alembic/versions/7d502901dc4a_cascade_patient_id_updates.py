@@ -0,0 +1,47 @@
+"""cascade_patient_id_updates
+
+Revision ID: 7d502901dc4a
+Revises: 8233b1e465ac
+Create Date: 2026-10-17 13:02:24.075330
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '7d502901dc4a'
+down_revision: Union[str, Sequence[str], None] = '8233b1e465ac'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Key rotation rewrites patients.patient_id (the ciphertext is the primary key); cascading the
+    # update rewrites the owning samples in the same statement. Without an index every cascaded
+    # update or delete would scan samples.
+    op.execute("CREATE INDEX idx_samples_patient_id ON samples (patient_id);")
+    # NOT VALID + VALIDATE keeps the exclusive lock to a catalog change; the validation scan only
+    # takes a SHARE UPDATE EXCLUSIVE lock, which lets reads and writes continue
+    op.execute("""
+        ALTER TABLE samples
+            DROP CONSTRAINT samples_patient_id_fkey,
+            ADD CONSTRAINT samples_patient_id_fkey FOREIGN KEY (patient_id)
+                REFERENCES patients (patient_id) ON DELETE CASCADE ON UPDATE CASCADE NOT VALID;
+    """)
+    op.execute("ALTER TABLE samples VALIDATE CONSTRAINT samples_patient_id_fkey;")
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.execute("""
+        ALTER TABLE samples
+            DROP CONSTRAINT samples_patient_id_fkey,
+            ADD CONSTRAINT samples_patient_id_fkey FOREIGN KEY (patient_id)
+                REFERENCES patients (patient_id) ON DELETE CASCADE NOT VALID;
+    """)
+    op.execute("ALTER TABLE samples VALIDATE CONSTRAINT samples_patient_id_fkey;")
+    op.execute("DROP INDEX idx_samples_patient_id;")
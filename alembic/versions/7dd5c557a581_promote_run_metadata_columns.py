@@ -0,0 +1,42 @@
+"""promote_run_metadata_columns
+
+Revision ID: 7dd5c557a581
+Revises: 5c73b700baf2
+Create Date: 2026-10-17 12:43:20.013616
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+from core.metadata_columns import demote_metadata_key, frontend_runs_view_sql, promote_metadata_key
+
+# Frozen copy of the keys this revision promotes; later promotions get their own revision
+PROMOTED = {"sequencer": "text", "qc_passed": "boolean", "status": "text"}
+
+# revision identifiers, used by Alembic.
+revision: str = '7dd5c557a581'
+down_revision: Union[str, Sequence[str], None] = '5c73b700baf2'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Each ADD COLUMN ... STORED rewrites runs under an ACCESS EXCLUSIVE lock
+    for key, sql_type in PROMOTED.items():
+        promote_metadata_key(op, key, sql_type)
+    # OR REPLACE keeps the existing frontend_api grant
+    op.execute(frontend_runs_view_sql(PROMOTED))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    # A view cannot lose columns in place, so rebuild it with its original grants before dropping them
+    op.execute("DROP VIEW IF EXISTS public.frontend_runs;")
+    op.execute(frontend_runs_view_sql([]))
+    op.execute("GRANT SELECT, INSERT, UPDATE, DELETE ON public.frontend_runs TO etl_worker;")
+    op.execute("GRANT SELECT ON public.frontend_runs TO frontend_api;")
+    for key in PROMOTED:
+        demote_metadata_key(op, key)
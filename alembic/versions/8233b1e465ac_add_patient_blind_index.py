@@ -0,0 +1,34 @@
+"""add_patient_blind_index
+
+Revision ID: 8233b1e465ac
+Revises: 9de0e68bf4cf
+Create Date: 2026-10-17 12:59:33.238882
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '8233b1e465ac'
+down_revision: Union[str, Sequence[str], None] = '9de0e68bf4cf'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # HMAC of the plaintext patient ID, computed by the ETL (the key never reaches the database).
+    # Nullable because existing rows can only be filled in by etl.jobs.backfill_blind_index;
+    # a unique index still admits any number of NULLs. The frontend views list their columns
+    # explicitly, so it never reaches the API role.
+    op.execute("ALTER TABLE patients ADD COLUMN patient_blind_index varchar(64);")
+    op.execute("CREATE UNIQUE INDEX idx_patients_blind_index ON patients (patient_blind_index);")
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.execute("DROP INDEX idx_patients_blind_index;")
+    op.execute("ALTER TABLE patients DROP COLUMN patient_blind_index;")
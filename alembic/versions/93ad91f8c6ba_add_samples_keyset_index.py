@@ -0,0 +1,30 @@
+"""add_samples_keyset_index
+
+Revision ID: 93ad91f8c6ba
+Revises: f0afcbac6c44
+Create Date: 2026-10-17 12:15:33.818928
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '93ad91f8c6ba'
+down_revision: Union[str, Sequence[str], None] = 'f0afcbac6c44'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Composite index matching the list_samples ORDER BY so keyset pages
+    # resolve with a single index range scan instead of an OFFSET walk.
+    op.execute("CREATE INDEX idx_samples_created_at_sample_id ON samples (created_at DESC, sample_id DESC);")
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.execute("DROP INDEX IF EXISTS idx_samples_created_at_sample_id;")
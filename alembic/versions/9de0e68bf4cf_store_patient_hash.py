@@ -0,0 +1,70 @@
+"""store_patient_hash
+
+Revision ID: 9de0e68bf4cf
+Revises: 7dd5c557a581
+Create Date: 2026-10-17 12:49:38.078019
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '9de0e68bf4cf'
+down_revision: Union[str, Sequence[str], None] = '7dd5c557a581'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Generated from patient_id on every write, so neither the ETL nor a trigger has to
+    # maintain it; each ADD COLUMN ... STORED rewrites its table
+    op.execute("ALTER TABLE patients ADD COLUMN patient_hash text GENERATED ALWAYS AS (md5(patient_id)) STORED;")
+    op.execute("CREATE UNIQUE INDEX idx_patients_patient_hash ON patients (patient_hash);")
+    op.execute("ALTER TABLE samples ADD COLUMN patient_hash text GENERATED ALWAYS AS (md5(patient_id)) STORED;")
+    op.execute("CREATE INDEX idx_samples_patient_hash ON samples (patient_hash);")
+
+    # Same columns and types as before, so OR REPLACE applies and the grants are kept
+    op.execute("""
+        CREATE OR REPLACE VIEW public.frontend_patients AS
+        SELECT
+            patient_hash,
+            created_at,
+            updated_at
+        FROM public.patients;
+    """)
+    op.execute("""
+        CREATE OR REPLACE VIEW public.frontend_samples AS
+        SELECT
+            sample_id,
+            patient_hash,
+            created_at,
+            updated_at
+        FROM public.samples;
+    """)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.execute("""
+        CREATE OR REPLACE VIEW public.frontend_patients AS
+        SELECT
+            md5(patient_id) AS patient_hash,
+            created_at,
+            updated_at
+        FROM public.patients;
+    """)
+    op.execute("""
+        CREATE OR REPLACE VIEW public.frontend_samples AS
+        SELECT
+            sample_id,
+            md5(patient_id) AS patient_hash,
+            created_at,
+            updated_at
+        FROM public.samples;
+    """)
+    op.execute("ALTER TABLE samples DROP COLUMN patient_hash;")
+    op.execute("ALTER TABLE patients DROP COLUMN patient_hash;")
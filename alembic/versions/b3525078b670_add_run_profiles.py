@@ -0,0 +1,87 @@
+"""add_run_profiles
+
+Revision ID: b3525078b670
+Revises: 2facaac16fd7
+Create Date: 2026-10-17 12:36:45.266670
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+PROFILE_KEYS = "ARRAY['coverage_profile', 'quality_profile']"
+
+def _as_real_array(document: str, key: str) -> str:
+    """SQL expression converting a JSONB number array at document->key into real[] (NULL if absent)."""
+    return f"""
+        CASE WHEN jsonb_typeof({document}->'{key}') = 'array' THEN
+            ARRAY(SELECT value::real FROM jsonb_array_elements_text({document}->'{key}') AS element(value))
+        END
+    """
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b3525078b670'
+down_revision: Union[str, Sequence[str], None] = '2facaac16fd7'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Chart arrays get their own narrow table so they no longer ride along in every runs.metadata
+    # read, every GIN index entry and every list page. real[] stores 4 bytes per point, and large
+    # arrays are TOAST-compressed out of line.
+    op.create_table(
+        'run_profiles',
+        sa.Column('run_id', sa.String(length=50), sa.ForeignKey('runs.run_id', ondelete='CASCADE'), primary_key=True),
+        sa.Column('coverage_profile', postgresql.ARRAY(sa.REAL()), nullable=True),
+        sa.Column('quality_profile', postgresql.ARRAY(sa.REAL()), nullable=True),
+        sa.Column('updated_at', sa.DateTime(timezone=True), server_default=sa.text('CURRENT_TIMESTAMP'))
+    )
+
+    # Backfill from runs.metadata, falling back to the newest pipeline result's metrics for runs
+    # whose metadata never received a copy. pipeline_results.metrics is the pipeline's own record
+    # of what it reported and keeps its arrays; only runs.metadata, which list and search read, is
+    # stripped.
+    op.execute(f"""
+        INSERT INTO run_profiles (run_id, coverage_profile, quality_profile)
+        SELECT DISTINCT ON (run_id)
+            run_id,
+            {_as_real_array("document", "coverage_profile")},
+            {_as_real_array("document", "quality_profile")}
+        FROM (
+            SELECT run_id, metadata AS document, 0 AS priority, updated_at AS written_at
+            FROM runs
+            WHERE metadata ?| {PROFILE_KEYS}
+            UNION ALL
+            SELECT run_id, metrics, 1, run_date
+            FROM pipeline_results
+            WHERE metrics ?| {PROFILE_KEYS}
+        ) AS sources
+        ORDER BY run_id, priority, written_at DESC;
+    """)
+
+    op.execute(f"""
+        UPDATE runs SET metadata = metadata - {PROFILE_KEYS}::text[]
+        WHERE metadata ?| {PROFILE_KEYS};
+    """)
+
+    op.execute("GRANT SELECT, INSERT, UPDATE, DELETE ON public.run_profiles TO etl_worker;")
+    op.execute("GRANT SELECT ON public.run_profiles TO frontend_api;")
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.execute("""
+        UPDATE runs r
+        SET metadata = r.metadata || jsonb_strip_nulls(jsonb_build_object(
+            'coverage_profile', to_jsonb(p.coverage_profile),
+            'quality_profile', to_jsonb(p.quality_profile)
+        ))
+        FROM run_profiles p
+        WHERE p.run_id = r.run_id;
+    """)
+    op.drop_table('run_profiles')
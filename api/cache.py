@@ -0,0 +1,130 @@
+import logging
+import os
+import select
+import threading
+from collections import OrderedDict
+from typing import Any, Optional
+
+import psycopg2
+
+from core.replicas import RecentChanges
+
+logger = logging.getLogger(__name__)
+
+# Postgres channel the db-init triggers publish changed sample_ids on
+SAMPLE_CHANGED_CHANNEL = "sample_changed"
+
+class SampleCache:
+    """
+    Bounded, thread-safe LRU of rendered sample trees keyed by sample_id.
+
+    Entries are evicted when a NOTIFY for their sample arrives. Readers snapshot `generation`
+    before querying and pass it to put(); if any invalidation landed while the query was in
+    flight, the (possibly stale) result is simply not cached. The cache only serves or stores
+    entries while `active` is set, i.e. while a listener is connected and receiving events.
+    """
+
+    def __init__(self, max_size: int):
+        self.max_size = max_size
+        self.generation = 0
+        self.active = threading.Event()
+        self._entries: "OrderedDict[str, Any]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_size > 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, key: str) -> Optional[Any]:
+        if not self.active.is_set():
+            return None
+        with self._lock:
+            value = self._entries.get(key)
+            if value is not None:
+                self._entries.move_to_end(key)
+            return value
+
+    def put(self, key: str, value: Any, generation: int) -> bool:
+        """Stores `value` unless an invalidation happened since `generation` was read."""
+        with self._lock:
+            if not self.enabled or not self.active.is_set() or generation != self.generation:
+                return False
+            self._entries[key] = value
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+            return True
+
+    def invalidate(self, key: str):
+        with self._lock:
+            self.generation += 1
+            self._entries.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self.generation += 1
+            self._entries.clear()
+
+class SampleChangeListener(threading.Thread):
+    """
+    Background thread holding a dedicated LISTEN connection and evicting cache entries
+    for every sample_id published on SAMPLE_CHANGED_CHANNEL. If the connection drops, the
+    whole cache is cleared before reconnecting, since notifications may have been missed.
+    With `changes`, every published sample_id is also marked there, so its reads go to the
+    primary until the replicas have had time to replay the change.
+    """
+
+    def __init__(self, cache: SampleCache, connect_kwargs: dict, poll_interval: float = 1.0, retry_interval: float = 5.0,
+                 changes: Optional[RecentChanges] = None):
+        super().__init__(name="sample-cache-listener", daemon=True)
+        self.cache = cache
+        self.changes = changes
+        self.connect_kwargs = connect_kwargs
+        self.poll_interval = poll_interval
+        self.retry_interval = retry_interval
+        self._stop_event = threading.Event()
+
+    def stop(self):
+        self._stop_event.set()
+
+    def run(self):
+        while not self._stop_event.is_set():
+            conn = None
+            try:
+                conn = psycopg2.connect(**self.connect_kwargs)
+                conn.autocommit = True
+                with conn.cursor() as cur:
+                    cur.execute(f"LISTEN {SAMPLE_CHANGED_CHANNEL};")
+                # Anything cached before LISTEN took effect may already be stale
+                self.cache.clear()
+                self.cache.active.set()
+                if self.changes is not None:
+                    # Nor were the changes made while nobody listened replayed by the replicas yet
+                    self.changes.mark_all()
+                    self.changes.watching.set()
+
+                while not self._stop_event.is_set():
+                    if select.select([conn], [], [], self.poll_interval) == ([], [], []):
+                        continue
+                    conn.poll()
+                    while conn.notifies:
+                        sample_id = conn.notifies.pop(0).payload
+                        if self.changes is not None:
+                            self.changes.mark(sample_id)
+                        self.cache.invalidate(sample_id)
+            except psycopg2.Error as e:
+                logger.warning(f"Sample cache listener lost its connection: {e}")
+            finally:
+                if self.changes is not None:
+                    self.changes.watching.clear()
+                self.cache.active.clear()
+                self.cache.clear()
+                if conn:
+                    conn.close()
+            self._stop_event.wait(self.retry_interval)
+
+# Disabled (size 0) unless the deployment opts in
+sample_cache = SampleCache(int(os.environ.get("SAMPLE_CACHE_SIZE", "0")))
@@ -0,0 +1,41 @@
+from typing import Callable, TypeVar, Union
+
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+from starlette.concurrency import run_in_threadpool
+
+from api.profiling import current_capture
+from core.database import DB_ASYNC, get_db, get_async_db
+
+T = TypeVar("T")
+
+# Session dependency for the routers: the asyncpg engine when DB_ASYNC is enabled, otherwise
+# the psycopg2 engine. Tests override get_db, which is this exact function in sync mode.
+get_session = get_async_db if DB_ASYNC else get_db
+
+def _unit_of_work(fn: Callable[[Session], T], db: Session) -> T:
+    # Ends the transaction on the worker thread, so the connection is back in the pool before
+    # the request waits for anything else. Holding it across awaits deadlocks under load: every
+    # AnyIO worker thread ends up blocked on a pool checkout, while the requests holding the
+    # connections wait for a thread to run their next query or their get_db teardown.
+    try:
+        result = fn(db)
+    except BaseException:
+        db.rollback()
+        raise
+    db.commit()  # Read-only: ends the transaction, and get_db sessions do not expire on commit
+    return result
+
+async def run_query(db: Union[Session, AsyncSession], fn: Callable[[Session], T]) -> T:
+    """
+    Runs `fn(session)` without blocking the event loop. The whole unit of work (execute,
+    row fetching and any selectinload follow-up queries) runs on the async driver via
+    AsyncSession.run_sync, or on a worker thread for a sync Session, which also returns
+    its connection to the pool before handing back.
+    """
+    if isinstance(db, Session):
+        capture = current_capture()
+        if capture is not None:
+            return await run_in_threadpool(capture.run_in_thread, _unit_of_work, fn, db)
+        return await run_in_threadpool(_unit_of_work, fn, db)
+    return await db.run_sync(fn)
@@ -0,0 +1,87 @@
+import hashlib
+from typing import Iterable, Optional
+
+from fastapi import Request, Response
+from sqlalchemy import func, select
+from sqlalchemy.orm import Session
+
+from api.models import FrontendPatient, FrontendSample, FrontendRun
+
+# The update_modified_column/touch triggers in db-init/03_triggers.sql bump samples.updated_at
+# (strictly monotonically) whenever anything in the sample's subtree changes, so these
+# aggregates change on every committed write without loading the ORM graph.
+
+def _digest(parts: Iterable, variant: str) -> str:
+    digest = hashlib.sha256(variant.encode())
+    for part in parts:
+        digest.update(repr(part).encode())
+    return f'"{digest.hexdigest()[:32]}"'
+
+def sample_etag(session: Session, sample_id: str, variant: str) -> Optional[str]:
+    """Strong ETag for one sample tree, or None if the sample does not exist."""
+    stmt = (
+        select(
+            func.greatest(FrontendSample.updated_at, func.max(FrontendRun.updated_at)),
+            func.count(FrontendRun.run_id),
+        )
+        .select_from(FrontendSample)
+        .outerjoin(FrontendRun, FrontendRun.sample_id == FrontendSample.sample_id)
+        .where(FrontendSample.sample_id == sample_id)
+        .group_by(FrontendSample.sample_id, FrontendSample.updated_at)
+    )
+    row = session.execute(stmt).one_or_none()
+    if row is None:
+        return None
+    return _digest([sample_id, *row], variant)
+
+def patient_etag(session: Session, patient_hash: str) -> Optional[str]:
+    """
+    Strong ETag for a patient tree, or None if the patient does not exist. Each sample's
+    updated_at already reflects its whole subtree, so the samples are all it has to read.
+    """
+    stmt = (
+        select(
+            func.greatest(FrontendPatient.updated_at, func.max(FrontendSample.updated_at)),
+            func.count(FrontendSample.sample_id),
+        )
+        .select_from(FrontendPatient)
+        .outerjoin(FrontendSample, FrontendSample.patient_hash == FrontendPatient.patient_hash)
+        .where(FrontendPatient.patient_hash == patient_hash)
+        .group_by(FrontendPatient.patient_hash, FrontendPatient.updated_at)
+    )
+    row = session.execute(stmt).one_or_none()
+    if row is None:
+        return None
+    return _digest([patient_hash, *row], "patient")
+
+def page_etag(session: Session, page_stmt, variant: str) -> str:
+    """
+    Strong ETag for a page of samples. `page_stmt` is the list query (filters, ordering,
+    offset/limit) with only its selected columns swapped out, so the page is identical.
+    """
+    page = page_stmt.with_only_columns(FrontendSample.sample_id, FrontendSample.updated_at).subquery()
+    stmt = (
+        select(
+            page.c.sample_id,
+            func.greatest(page.c.updated_at, func.max(FrontendRun.updated_at)),
+            func.count(FrontendRun.run_id),
+        )
+        .select_from(page)
+        .outerjoin(FrontendRun, FrontendRun.sample_id == page.c.sample_id)
+        .group_by(page.c.sample_id, page.c.updated_at)
+        # Ordering keys can only change alongside updated_at, so sorting by id is stable
+        .order_by(page.c.sample_id)
+    )
+    return _digest(session.execute(stmt).all(), variant)
+
+def etag_matches(request: Request, etag: str) -> bool:
+    """Evaluates If-None-Match using the weak comparison RFC 9110 prescribes for it."""
+    header = request.headers.get("if-none-match")
+    if not header:
+        return False
+    if header.strip() == "*":
+        return True
+    return etag in {tag.strip().removeprefix("W/") for tag in header.split(",")}
+
+def not_modified(etag: str) -> Response:
+    return Response(status_code=304, headers={"ETag": etag})
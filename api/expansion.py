@@ -0,0 +1,155 @@
+from typing import Dict, FrozenSet, List, Optional, Set
+
+import orjson
+from fastapi import HTTPException, Query, Response
+from sqlalchemy.orm import noload, selectinload
+
+from api.models import FrontendSample, FrontendRun
+from api.schemas import SampleResponse, RunResponse, FileLocationResponse, PipelineResultResponse, ApiEndpointResponse
+from api.serialization import FAST_SERIALIZER_ENABLED, encode_samples, encode_validated
+
+# Relationship paths a caller may expand, mapped to the ORM attribute that loads them
+EXPANDABLE = {
+    "runs": FrontendSample.runs,
+    "runs.files": FrontendRun.files,
+    "runs.results": FrontendRun.results,
+    "runs.endpoints": FrontendRun.endpoints,
+}
+
+# Response schema used at each level of the tree ("" is the root sample)
+LEVEL_SCHEMAS = {
+    "": SampleResponse,
+    "runs": RunResponse,
+    "runs.files": FileLocationResponse,
+    "runs.results": PipelineResultResponse,
+    "runs.endpoints": ApiEndpointResponse,
+}
+
+RUN_CHILDREN = ["runs.files", "runs.results", "runs.endpoints"]
+
+def _split(raw: str) -> List[str]:
+    return [part.strip() for part in raw.split(",") if part.strip()]
+
+def _parent(path: str) -> str:
+    return path.rpartition(".")[0]
+
+def _leaf(path: str) -> str:
+    return path.rpartition(".")[2]
+
+def _scalar_fields(level: str) -> Set[str]:
+    """Every non-relationship field the schema at `level` exposes."""
+    children = {_leaf(path) for path in EXPANDABLE if _parent(path) == level}
+    return set(LEVEL_SCHEMAS[level].model_fields) - children
+
+class Expansion:
+    """
+    Describes which parts of the sample tree a request asked for. It drives both the
+    eager-loading options handed to SQLAlchemy and the shape of the serialized response,
+    so relationships that were not requested are neither queried nor returned.
+    """
+
+    def __init__(self, include: FrozenSet[str], fields: Optional[Dict[str, Set[str]]] = None):
+        self.include = include
+        self.fields = fields or {}
+
+    @property
+    def is_default(self) -> bool:
+        """True when the request wants the full SampleResponse tree."""
+        return self.include == frozenset(EXPANDABLE) and not self.fields
+
+    @property
+    def variant(self) -> str:
+        """Stable description of the response shape, used to key ETags."""
+        fields = ";".join(f"{level}:{','.join(sorted(names))}" for level, names in sorted(self.fields.items()))
+        return f"include={','.join(sorted(self.include))}|fields={fields}"
+
+    def load_options(self) -> list:
+        """Builds one selectinload per requested relationship and noloads the rest."""
+        if "runs" not in self.include:
+            return [noload(FrontendSample.runs)]
+
+        children = [
+            (selectinload if path in self.include else noload)(EXPANDABLE[path])
+            for path in RUN_CHILDREN
+        ]
+        return [selectinload(FrontendSample.runs).options(*children)]
+
+    def serialization_include(self, level: str = "") -> dict:
+        """
+        Translates the expansion into a Pydantic `include` mapping for model_dump(). Keys
+        follow schema field order, which the fast serializer relies on to match Pydantic.
+        """
+        selected = self.fields.get(level) or _scalar_fields(level)
+        spec = {}
+        for name in LEVEL_SCHEMAS[level].model_fields:
+            path = f"{level}.{name}" if level else name
+            if path in EXPANDABLE:
+                if path in self.include:
+                    spec[name] = {"__all__": self.serialization_include(path)}
+            elif name in selected:
+                spec[name] = True
+        return spec
+
+    def render(self, samples, headers: Optional[Dict[str, str]] = None):
+        """
+        Returns ORM objects untouched for the default shape so FastAPI validates them against
+        the route's response_model; otherwise serializes only the requested subtree with the
+        same Pydantic encoder. With API_FAST_SERIALIZER enabled, every shape is encoded by orjson.
+        """
+        if self.is_default and not FAST_SERIALIZER_ENABLED:
+            return samples
+
+        encode = encode_samples if FAST_SERIALIZER_ENABLED else encode_validated
+        return Response(encode(samples, self.serialization_include()), media_type="application/json", headers=headers)
+
+    def render_batch(self, samples: list, missing: List[str]):
+        """
+        render() for a SampleBatchResponse: samples keyed by sample_id plus the IDs that were
+        not found. Non-default shapes splice each sample's encoding into the envelope.
+        """
+        if self.is_default and not FAST_SERIALIZER_ENABLED:
+            return {"samples": {sample.sample_id: sample for sample in samples}, "missing": missing}
+
+        encode = encode_samples if FAST_SERIALIZER_ENABLED else encode_validated
+        spec = self.serialization_include()
+        entries = b",".join(orjson.dumps(sample.sample_id) + b":" + encode(sample, spec) for sample in samples)
+        document = b'{"samples":{' + entries + b'},"missing":' + orjson.dumps(missing) + b"}"
+        return Response(document, media_type="application/json")
+
+def parse_include(raw: Optional[str]) -> FrozenSet[str]:
+    """Parses `include=runs,runs.results`; omitting the parameter expands the whole tree."""
+    if raw is None:
+        return frozenset(EXPANDABLE)
+
+    paths = set()
+    for path in _split(raw):
+        if path not in EXPANDABLE:
+            raise HTTPException(status_code=400, detail=f"Unknown include path '{path}'")
+        # Expanding a nested relationship implies expanding its parents
+        while path:
+            paths.add(path)
+            path = _parent(path)
+    return frozenset(paths)
+
+def parse_fields(raw: Optional[str], include: FrozenSet[str]) -> Dict[str, Set[str]]:
+    """Parses `fields=sample_id,runs.assay_type` into the selected scalar fields per level."""
+    if raw is None:
+        return {}
+
+    fields: Dict[str, Set[str]] = {}
+    for path in _split(raw):
+        level, name = _parent(path), _leaf(path)
+        if level not in LEVEL_SCHEMAS or name not in _scalar_fields(level):
+            raise HTTPException(status_code=400, detail=f"Unknown field '{path}'")
+        if level and level not in include:
+            raise HTTPException(status_code=400, detail=f"Field '{path}' requires include={level}")
+        fields.setdefault(level, set()).add(name)
+    return fields
+
+def get_expansion(
+    include: Optional[str] = Query(None, description="Comma-separated relationships to expand (runs, runs.files, runs.results, runs.endpoints). Omit for the full tree."),
+    fields: Optional[str] = Query(None, description="Comma-separated fields to return, prefixed by relationship path (e.g. sample_id,runs.assay_type)"),
+) -> Expansion:
+    """FastAPI dependency resolving the include/fields query surface into an Expansion."""
+    include_paths = parse_include(include)
+    return Expansion(include_paths, parse_fields(fields, include_paths))
@@ -0,0 +1,104 @@
+import csv
+import io
+from typing import AsyncIterator, Iterator, Optional
+
+from sqlalchemy import Text, cast, func, literal_column, select
+from sqlalchemy.orm import Session
+
+from api.models import FrontendSample, FrontendRun, PipelineResult
+
+# Rows fetched per server-side cursor roundtrip (and emitted per streamed chunk)
+EXPORT_CHUNK_SIZE = 1000
+
+CSV_COLUMNS = ["sample_id", "patient_hash", "run_id", "assay_type", "created_at", "updated_at", "metadata", "results"]
+
+MEDIA_TYPES = {
+    "ndjson": "application/x-ndjson",
+    "csv": "text/csv",
+}
+
+def _results_json():
+    """Correlated subquery folding a run's pipeline results into one JSON array."""
+    result = func.json_build_object(
+        "id", PipelineResult.id,
+        "clinical_report_json_uri", PipelineResult.clinical_report_json_uri,
+        "pipeline_version", PipelineResult.pipeline_version,
+        "metrics", PipelineResult.metrics,
+        "run_date", PipelineResult.run_date,
+    )
+    return (
+        select(func.coalesce(func.json_agg(result), literal_column("'[]'::json")))
+        .where(PipelineResult.run_id == FrontendRun.run_id)
+        .correlate(FrontendRun)
+        .scalar_subquery()
+    )
+
+def export_query(export_format: str, assay_type: Optional[str] = None):
+    """
+    One row per run. For NDJSON, Postgres renders each line itself so Python only
+    concatenates strings; for CSV, the JSON columns arrive pre-encoded as text.
+    """
+    if export_format == "ndjson":
+        line = func.json_build_object(
+            "sample_id", FrontendSample.sample_id,
+            "patient_hash", FrontendSample.patient_hash,
+            "run_id", FrontendRun.run_id,
+            "assay_type", FrontendRun.assay_type,
+            "created_at", FrontendRun.created_at,
+            "updated_at", FrontendRun.updated_at,
+            "metadata", FrontendRun.metadata_col,
+            "results", _results_json(),
+        )
+        stmt = select(cast(line, Text))
+    else:
+        stmt = select(
+            FrontendSample.sample_id,
+            FrontendSample.patient_hash,
+            FrontendRun.run_id,
+            FrontendRun.assay_type,
+            FrontendRun.created_at,
+            FrontendRun.updated_at,
+            cast(FrontendRun.metadata_col, Text),
+            cast(_results_json(), Text),
+        )
+
+    stmt = stmt.select_from(FrontendRun).join(FrontendSample, FrontendSample.sample_id == FrontendRun.sample_id)
+    if assay_type:
+        stmt = stmt.where(FrontendRun.assay_type == assay_type)
+    return stmt
+
+def encode_chunk(export_format: str, rows) -> str:
+    if export_format == "ndjson":
+        return "".join(f"{row[0]}\n" for row in rows)
+
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerows(
+        [*row[:4], row[4].isoformat() if row[4] else "", row[5].isoformat() if row[5] else "", *row[6:]]
+        for row in rows
+    )
+    return buffer.getvalue()
+
+def csv_header() -> str:
+    buffer = io.StringIO()
+    csv.writer(buffer).writerow(CSV_COLUMNS)
+    return buffer.getvalue()
+
+def stream_sync(session: Session, stmt, export_format: str) -> Iterator[str]:
+    """
+    Iterates a server-side cursor in fixed-size partitions. Starlette drives sync
+    iterators from its threadpool, so the event loop never blocks on a fetch.
+    """
+    if export_format == "csv":
+        yield csv_header()
+    result = session.execute(stmt, execution_options={"yield_per": EXPORT_CHUNK_SIZE})
+    for partition in result.partitions():
+        yield encode_chunk(export_format, partition)
+
+async def stream_async(session, stmt, export_format: str) -> AsyncIterator[str]:
+    """AsyncSession counterpart of stream_sync, backed by an asyncpg server-side cursor."""
+    if export_format == "csv":
+        yield csv_header()
+    result = await session.stream(stmt.execution_options(yield_per=EXPORT_CHUNK_SIZE))
+    async for partition in result.partitions():
+        yield encode_chunk(export_format, partition)
@@ -0,0 +1,65 @@
+import asyncio
+import os
+import time
+
+from fastapi.responses import JSONResponse
+from sqlalchemy import text
+from sqlalchemy.exc import SQLAlchemyError
+from starlette.concurrency import run_in_threadpool
+
+from core import database
+from core.pool import pool_status
+
+# Upper bound on the /health database round trip, pool checkout included
+DB_HEALTH_TIMEOUT = float(os.environ.get("DB_HEALTH_TIMEOUT", "2"))
+
+def api_pool():
+    """The pool behind the API's session dependency."""
+    return database.async_engine.pool if database.DB_ASYNC else database.engine.pool
+
+def api_replicas():
+    """The replica set behind the API's session dependency, if replicas are configured."""
+    return database.async_replica_set if database.DB_ASYNC else database.replica_set
+
+def _replica_status(replicas) -> list:
+    return [
+        {"host": f"{engine.url.host}:{engine.url.port}", "ejected": replicas.is_ejected(engine), "pool": pool_status(engine.pool)}
+        for engine in replicas.engines
+    ]
+
+def _ping_sync() -> None:
+    with database.engine.connect() as conn:
+        conn.execute(text("SELECT 1"))
+
+async def _ping_async() -> None:
+    async with database.async_engine.connect() as conn:
+        await conn.execute(text("SELECT 1"))
+
+async def health_response():
+    """
+    Runs SELECT 1 through the API's pool within DB_HEALTH_TIMEOUT. A sync ping that overruns
+    is abandoned rather than cancelled: its worker thread returns the connection when done.
+    """
+    started = time.perf_counter()
+    ping = _ping_async() if database.DB_ASYNC else run_in_threadpool(_ping_sync)
+    try:
+        await asyncio.wait_for(ping, DB_HEALTH_TIMEOUT)
+    except asyncio.TimeoutError:
+        return JSONResponse(status_code=503, content={"status": "unhealthy", "database": "timeout"})
+    except SQLAlchemyError:
+        return JSONResponse(status_code=503, content={"status": "unhealthy", "database": "unreachable"})
+    latency_ms = round((time.perf_counter() - started) * 1000, 2)
+    return {"status": "healthy", "database": "connected", "latency_ms": latency_ms}
+
+def readiness_response():
+    """
+    Pool telemetry; a saturated primary pool answers 503 so load balancers drain the
+    instance. Replicas, when configured, are listed with their ejection state and pools.
+    """
+    content = {"pool": pool_status(api_pool())}
+    replicas = api_replicas()
+    if replicas is not None:
+        content["replicas"] = _replica_status(replicas)
+    if content["pool"]["saturated"]:
+        return JSONResponse(status_code=503, content={"status": "saturated", **content})
+    return {"status": "ready", **content}
@@ -1,19 +1,33 @@
+import asyncio
+import logging
 import os
-from fastapi import FastAPI, Depends, HTTPException, Security, status
+import time
+from contextlib import asynccontextmanager
+from fastapi import APIRouter, FastAPI, Depends, HTTPException, Security, status
 from fastapi.responses import RedirectResponse
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.security import APIKeyHeader
-from api.routers import samples
-from sqlalchemy import create_engine, select
-from sqlalchemy.orm import sessionmaker, Session, selectinload
-from api.models import FrontendSample
-from api.schemas import SampleResponse
+from sqlalchemy.exc import SQLAlchemyError
+from starlette.concurrency import run_in_threadpool
+from api.routers import samples, runs, patients, profiles
+from api.pagination import NEXT_CURSOR_HEADER
+from api.cache import SampleChangeListener, sample_cache
+from api.metrics import QueryMetricsMiddleware, instrument_sql, metrics_response
+from api.profiling import PROFILE_ID_HEADER, ProfilerMiddleware, profiling_enabled
+from api.health import health_response, readiness_response
 
-from core.database import SessionLocal
+from core.database import DB_ASYNC, init_database, warm_up, warm_up_async
+from core.replicas import recent_changes
+
+logger = logging.getLogger(__name__)
 
 EXPECTED_API_KEY = os.environ.get("API_KEY")
 api_key_header = APIKeyHeader(name="X-API-Key", auto_error=False)
 
+# Pooled connections each worker opens before taking traffic, and how long it may spend doing so
+DB_POOL_WARMUP = int(os.environ.get("DB_POOL_WARMUP", "1"))
+DB_WARMUP_TIMEOUT = float(os.environ.get("DB_WARMUP_TIMEOUT", "5"))
+
 def get_api_key(api_key_header: str = Security(api_key_header)):
     if api_key_header == EXPECTED_API_KEY:
         return api_key_header
@@ -22,34 +36,95 @@ def get_api_key(api_key_header: str = Security(api_key_header)):
         detail="Invalid or missing API Key",
     )
 
-app = FastAPI(
-    title="Bioinformatics Pipeline API",
-    description="Frontend API for querying non-PHI sample metadata and pipeline outputs.",
-    version="1.0.0"
-)
-
-app.add_middleware(
-    CORSMiddleware,
-    allow_origins=["http://localhost:5173", "http://localhost:5174", "http://localhost:5175"], # Explicitly allow the Vite frontend
-    allow_credentials=True,
-    allow_methods=["*"], # Allow GET, POST, OPTIONS, etc.
-    allow_headers=["*"], # Crucial: Allows our custom X-API-Key header to pass through
-)
-
-# Dependency to get the database session
-def get_db():
-    db = SessionLocal()
+async def warm_up_pool():
+    """
+    Fills the pool before the first request so it does not pay the connect cost. Bounded by
+    DB_WARMUP_TIMEOUT, and never fatal: an unreachable database is left to /health to report.
+    """
+    if DB_POOL_WARMUP <= 0:
+        return
+    started = time.perf_counter()
+    warm = warm_up_async(DB_POOL_WARMUP) if DB_ASYNC else run_in_threadpool(warm_up, DB_POOL_WARMUP)
     try:
-        yield db
-    finally:
-        db.close()
+        await asyncio.wait_for(warm, DB_WARMUP_TIMEOUT)
+    except (asyncio.TimeoutError, SQLAlchemyError, OSError) as e:
+        logger.warning(f"Connection pool warm-up failed: {e!r}")
+        return
+    logger.info(f"Warmed {DB_POOL_WARMUP} pooled connection(s) in {(time.perf_counter() - started) * 1000:.0f} ms")
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Engines are created here, once per worker process and after any fork, never at import
+    database = init_database()
+    await warm_up_pool()
+
+    # The sample cache is only trustworthy while a LISTEN connection is evicting stale entries,
+    # and replica routing needs the same notifications to send just-changed samples to the primary
+    listener = None
+    if sample_cache.enabled or database.replica_set or database.async_replica_set:
+        listener = SampleChangeListener(
+            sample_cache,
+            database.engine.url.translate_connect_args(username="user", database="dbname"),
+            changes=recent_changes,
+        )
+        listener.start()
+    yield
+    if listener:
+        listener.stop()
 
-app.include_router(samples.router, dependencies=[Depends(get_api_key)])
+system_router = APIRouter()
 
-@app.get("/")
+@system_router.get("/")
 def read_root():
     return RedirectResponse(url="/docs")
 
-@app.get("/health")
-def health_check():
-    return {"status": "healthy", "database": "connected"}
\ No newline at end of file
+@system_router.get("/health")
+async def health_check():
+    """Liveness: a timed SELECT 1 against the database, 503 if it fails or misses its deadline."""
+    return await health_response()
+
+@system_router.get("/ready")
+def readiness_check():
+    """Readiness: connection pool usage and checkout wait times, 503 while the pool is saturated."""
+    return readiness_response()
+
+@system_router.get("/metrics", include_in_schema=False)
+def metrics():
+    """Prometheus scrape endpoint: per-route latency, SQL time, query count and row histograms."""
+    return metrics_response()
+
+def create_app() -> FastAPI:
+    """Builds the API. Cheap: no engine or connection exists until the lifespan starts."""
+    app = FastAPI(
+        title="Bioinformatics Pipeline API",
+        description="Frontend API for querying non-PHI sample metadata and pipeline outputs.",
+        version="1.0.0",
+        lifespan=lifespan
+    )
+
+    app.add_middleware(
+        CORSMiddleware,
+        allow_origins=["http://localhost:5173", "http://localhost:5174", "http://localhost:5175"], # Explicitly allow the Vite frontend
+        allow_credentials=True,
+        allow_methods=["*"], # Allow GET, POST, OPTIONS, etc.
+        allow_headers=["*"], # Crucial: Allows our custom X-API-Key header to pass through
+        expose_headers=[NEXT_CURSOR_HEADER, "Server-Timing", PROFILE_ID_HEADER], # Lets the browser read keyset pagination tokens, SQL timings and profile IDs
+    )
+
+    # Per-request SQL counts and timings: Server-Timing headers plus the /metrics histograms
+    instrument_sql()
+    app.add_middleware(QueryMetricsMiddleware)
+
+    # Opt-in request profiling (PROFILE_TOKEN / PROFILE_SAMPLE_RATE); not even installed otherwise
+    if profiling_enabled():
+        app.add_middleware(ProfilerMiddleware, api_key=EXPECTED_API_KEY)
+
+    app.include_router(samples.router, dependencies=[Depends(get_api_key)])
+    app.include_router(runs.router, dependencies=[Depends(get_api_key)])
+    app.include_router(patients.router, dependencies=[Depends(get_api_key)])
+    app.include_router(profiles.router, dependencies=[Depends(get_api_key)])
+    app.include_router(system_router)
+    return app
+
+# ASGI entrypoint (uvicorn api.main:app)
+app = create_app()
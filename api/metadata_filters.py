@@ -0,0 +1,94 @@
+from decimal import Decimal, InvalidOperation
+from typing import List
+
+from fastapi import HTTPException
+from sqlalchemy import Numeric, Text, and_, func, literal, or_
+
+from api.models import FrontendRun
+from core.metadata_columns import PROMOTED_METADATA_KEYS
+
+# Operators accepted in `filter=key:op[:value]` run metadata predicates
+NUMERIC_OPERATORS = {
+    "lt": lambda column, value: column < value,
+    "lte": lambda column, value: column <= value,
+    "gt": lambda column, value: column > value,
+    "gte": lambda column, value: column >= value,
+}
+OPERATORS = {"eq", "in", "bool", "exists", *NUMERIC_OPERATORS}
+
+# Promoted keys are compared on their generated, btree-indexed frontend_runs columns
+PROMOTED_COLUMNS = {key: getattr(FrontendRun, key) for key in PROMOTED_METADATA_KEYS}
+
+def metadata_numeric(key: str):
+    """
+    The metadata_numeric() SQL helper applied to a run's metadata. The key is inlined as a
+    literal (never a server-side parameter) so the planner can match a per-key expression
+    index on metadata_numeric(metadata, '<key>').
+    """
+    return func.metadata_numeric(FrontendRun.metadata_col, literal(key, Text, literal_execute=True), type_=Numeric)
+
+def promoted_string(key: str):
+    """
+    Guard for comparisons on a promoted text column. Its ->> expression also turns JSON
+    numbers and booleans into text, which JSONB containment with a string never matches, so
+    only string values may take the column path.
+    """
+    return func.jsonb_typeof(FrontendRun.metadata_col[key]) == "string"
+
+def metadata_eq(key: str, value: str):
+    """Equality on one metadata key: the generated column for promoted text keys, else JSONB containment."""
+    if PROMOTED_METADATA_KEYS.get(key) == "text":
+        return and_(PROMOTED_COLUMNS[key] == value, promoted_string(key))
+    return FrontendRun.metadata_col.contains({key: value})
+
+def parse_filter(raw: str):
+    """
+    Translates one `key:op[:value]` predicate into SQL over frontend_runs.metadata:
+
+    * eq / bool / in use JSONB containment (@>), which the GIN index on runs.metadata serves
+    * exists uses the GIN-indexed ? operator
+    * lt / lte / gt / gte compare metadata_numeric(), which a per-key expression index can serve
+    * eq / in on promoted text keys and bool on promoted boolean keys use the generated columns
+    """
+    key, _, rest = raw.partition(":")
+    op, _, value = rest.partition(":")
+    if not key or op not in OPERATORS:
+        raise HTTPException(status_code=400, detail=f"Invalid metadata filter '{raw}'")
+
+    if op == "exists":
+        if value:
+            raise HTTPException(status_code=400, detail=f"Metadata filter '{raw}' does not take a value")
+        return FrontendRun.metadata_col.has_key(key)
+
+    if not value:
+        raise HTTPException(status_code=400, detail=f"Metadata filter '{raw}' requires a value")
+
+    promoted_type = PROMOTED_METADATA_KEYS.get(key)
+
+    if op == "eq":
+        return metadata_eq(key, value)
+
+    if op == "in":
+        options = [option.strip() for option in value.split(",") if option.strip()]
+        if promoted_type == "text":
+            return and_(PROMOTED_COLUMNS[key].in_(options), promoted_string(key))
+        return or_(*(FrontendRun.metadata_col.contains({key: option}) for option in options))
+
+    if op == "bool":
+        if value.lower() not in ("true", "false"):
+            raise HTTPException(status_code=400, detail=f"Metadata filter '{raw}' requires true or false")
+        if promoted_type == "boolean":
+            return PROMOTED_COLUMNS[key] == (value.lower() == "true")
+        return FrontendRun.metadata_col.contains({key: value.lower() == "true"})
+
+    try:
+        number = Decimal(value)
+    except InvalidOperation:
+        number = None
+    if number is None or not number.is_finite():
+        raise HTTPException(status_code=400, detail=f"Metadata filter '{raw}' requires a numeric value")
+    return NUMERIC_OPERATORS[op](metadata_numeric(key), number)
+
+def run_metadata_predicate(filters: List[str], *predicates):
+    """ANDs every parsed filter and any ready-made predicates, so a single run has to satisfy all of them."""
+    return and_(*predicates, *(parse_filter(raw) for raw in filters))
@@ -0,0 +1,114 @@
+import time
+from contextvars import ContextVar
+from dataclasses import dataclass
+from typing import Optional
+
+from prometheus_client import CONTENT_TYPE_LATEST, Histogram, generate_latest
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from starlette.datastructures import MutableHeaders
+from starlette.responses import Response
+
+from core.slow_queries import query_labels
+
+REQUEST_LATENCY = Histogram(
+    "api_request_duration_seconds", "End-to-end API request latency", ["method", "route"],
+)
+REQUEST_DB_TIME = Histogram(
+    "api_request_db_duration_seconds", "Time spent executing SQL per API request", ["method", "route"],
+)
+REQUEST_QUERIES = Histogram(
+    "api_request_queries", "SQL statements executed per API request", ["method", "route"],
+    buckets=(0, 1, 2, 3, 4, 5, 8, 13, 21, 34, 55, 89, float("inf")),
+)
+REQUEST_ROWS = Histogram(
+    "api_request_rows", "Rows returned by the database per API request", ["method", "route"],
+    buckets=(0, 1, 10, 50, 100, 500, 1000, 5000, 10000, 50000, float("inf")),
+)
+
+@dataclass
+class RequestStats:
+    queries: int = 0
+    db_seconds: float = 0.0
+    rows: int = 0
+
+# The stats object of the request being served. Worker threads (run_in_threadpool) and
+# AsyncSession.run_sync inherit a copy of the context, so they update the same object.
+_current_stats: ContextVar[Optional[RequestStats]] = ContextVar("request_sql_stats", default=None)
+
+# Timed on the statement's execution context: a statement that raises skips the after hook,
+# so anything kept in conn.info would stay behind on the pooled connection
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    if context is not None:
+        context.query_start_time = time.perf_counter()
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    stats = _current_stats.get()
+    started = getattr(context, "query_start_time", None)
+    if stats is None or started is None:
+        return
+    elapsed = time.perf_counter() - started
+    stats.queries += 1
+    stats.db_seconds += elapsed
+    # Server-side (yield_per) cursors report -1 here; their rows are not counted
+    stats.rows += max(cursor.rowcount, 0)
+
+def instrument_sql() -> None:
+    """
+    Hooks every Engine (sync, the asyncpg engine's sync facade, test engines) so statements
+    executed while serving a request are attributed to it. Outside a request it only times.
+    """
+    if not event.contains(Engine, "before_cursor_execute", _before_cursor_execute):
+        event.listen(Engine, "before_cursor_execute", _before_cursor_execute)
+        event.listen(Engine, "after_cursor_execute", _after_cursor_execute)
+
+def route_template(scope) -> str:
+    # The router stores the matched route in the scope; its path template keeps sample IDs
+    # out of label values
+    return getattr(scope.get("route"), "path", "unmatched")
+
+def server_timing(stats: RequestStats, total_seconds: float) -> str:
+    return (
+        f'db;dur={stats.db_seconds * 1000:.2f};desc="{stats.queries} queries, {stats.rows} rows", '
+        f"total;dur={total_seconds * 1000:.2f}"
+    )
+
+class QueryMetricsMiddleware:
+    """
+    Pure ASGI middleware that counts the SQL each request runs. The totals so far are sent
+    in a Server-Timing header when the response starts (for a streamed export, that is before
+    the body queries run); the per-route histograms are observed once the body is sent.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        stats = RequestStats()
+        token = _current_stats.set(stats)
+        started = time.perf_counter()
+
+        async def send_with_timing(message):
+            if message["type"] == "http.response.start":
+                headers = MutableHeaders(scope=message)
+                headers.append("Server-Timing", server_timing(stats, time.perf_counter() - started))
+            await send(message)
+
+        try:
+            # Slow-statement records name the route, resolved once routing has matched it
+            with query_labels(route=lambda: route_template(scope), path=scope["path"]):
+                await self.app(scope, receive, send_with_timing)
+        finally:
+            _current_stats.reset(token)
+            labels = (scope["method"], route_template(scope))
+            REQUEST_LATENCY.labels(*labels).observe(time.perf_counter() - started)
+            REQUEST_DB_TIME.labels(*labels).observe(stats.db_seconds)
+            REQUEST_QUERIES.labels(*labels).observe(stats.queries)
+            REQUEST_ROWS.labels(*labels).observe(stats.rows)
+
+def metrics_response() -> Response:
+    return Response(generate_latest(), media_type=CONTENT_TYPE_LATEST)
@@ -2,7 +2,7 @@ from datetime import datetime
 from typing import List, Optional
 from sqlalchemy import String, ForeignKey, Text
 from sqlalchemy.orm import DeclarativeBase, Mapped, mapped_column, relationship, foreign
-from core.models import FileLocationMixin, PipelineResultMixin, ApiEndpointMixin
+from core.models import FileLocationMixin, PipelineResultMixin, ApiEndpointMixin, RunProfileMixin, PromotedMetadataMixin
 from sqlalchemy.dialects.postgresql import JSONB
 
 class Base(DeclarativeBase):
@@ -18,7 +18,8 @@ class FrontendPatient(Base):
 
     samples: Mapped[List["FrontendSample"]] = relationship(
         back_populates="patient",
-        primaryjoin="FrontendPatient.patient_hash == foreign(FrontendSample.patient_hash)"
+        primaryjoin="FrontendPatient.patient_hash == foreign(FrontendSample.patient_hash)",
+        order_by="FrontendSample.created_at, FrontendSample.sample_id"
     )
 
 class FrontendSample(Base):
@@ -38,7 +39,7 @@ class FrontendSample(Base):
         primaryjoin="FrontendSample.sample_id == foreign(FrontendRun.sample_id)"
     )
 
-class FrontendRun(Base):
+class FrontendRun(PromotedMetadataMixin, Base):
     __tablename__ = "frontend_runs"
     
     run_id: Mapped[str] = mapped_column(String(50), primary_key=True)
@@ -82,4 +83,8 @@ class ApiEndpoint(ApiEndpointMixin, Base):
     run: Mapped["FrontendRun"] = relationship(
         back_populates="endpoints",
         primaryjoin="foreign(ApiEndpoint.run_id) == FrontendRun.run_id"
-    )
\ No newline at end of file
+    )
+
+# Read on demand by the run profiles endpoint; deliberately not a FrontendRun relationship
+class RunProfile(RunProfileMixin, Base):
+    pass
\ No newline at end of file
@@ -0,0 +1,41 @@
+import base64
+import binascii
+import json
+from datetime import datetime
+from typing import Optional, Tuple
+
+from fastapi import HTTPException
+from sqlalchemy import tuple_
+
+# Response header carrying the opaque cursor for the next keyset page
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+
+def encode_cursor(created_at: Optional[datetime], key: str) -> str:
+    """Packs the (created_at, key) position of the last row into an opaque URL-safe token."""
+    payload = json.dumps([created_at.isoformat() if created_at else None, key], separators=(",", ":"))
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip("=")
+
+def decode_cursor(cursor: str) -> Tuple[Optional[datetime], str]:
+    """Unpacks a token produced by encode_cursor, rejecting anything malformed with a 400."""
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        created_at, key = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        if not isinstance(key, str):
+            raise ValueError("cursor key must be a string")
+        return (datetime.fromisoformat(created_at) if created_at else None), key
+    except (binascii.Error, ValueError, TypeError, UnicodeDecodeError):
+        raise HTTPException(status_code=400, detail="Invalid pagination cursor")
+
+def keyset_predicate(created_col, key_col, cursor: str):
+    """
+    Builds the WHERE clause for the page after `cursor` under
+    ORDER BY created_col DESC, key_col DESC (Postgres sorts NULLs first in DESC order).
+    """
+    created_at, key = decode_cursor(cursor)
+
+    if created_at is None:
+        # Still inside the leading block of NULL timestamps
+        return ((created_col.is_(None)) & (key_col < key)) | created_col.is_not(None)
+
+    # Row-value comparison lets Postgres seek straight into the composite index
+    return tuple_(created_col, key_col) < tuple_(created_at, key)
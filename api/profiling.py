@@ -0,0 +1,208 @@
+import logging
+import os
+import random
+import re
+import secrets
+import tempfile
+import threading
+import time
+from contextvars import ContextVar
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Callable, Optional, TypeVar
+
+import orjson
+from starlette.concurrency import run_in_threadpool
+from starlette.datastructures import MutableHeaders
+
+from api.metrics import route_template
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+# A request carrying this header with the PROFILE_TOKEN value is profiled; unset disables the header
+PROFILE_TOKEN = os.environ.get("PROFILE_TOKEN", "")
+# Fraction of API requests profiled at random, e.g. 0.001
+PROFILE_SAMPLE_RATE = float(os.environ.get("PROFILE_SAMPLE_RATE", "0"))
+PROFILE_DIR = Path(os.environ.get("PROFILE_DIR", os.path.join(tempfile.gettempdir(), "api-profiles")))
+# Profiles kept on disk; the oldest are deleted first
+PROFILE_KEEP = int(os.environ.get("PROFILE_KEEP", "50"))
+PROFILE_INTERVAL = float(os.environ.get("PROFILE_INTERVAL", "0.001"))
+
+PROFILE_HEADER = "X-Profile"
+PROFILE_ID_HEADER = "X-Profile-Id"
+_PROFILE_HEADER_KEY = PROFILE_HEADER.lower().encode()
+_API_KEY_HEADER_KEY = b"x-api-key"
+
+# Never sampled: probes, scrapes and the profile endpoints themselves
+UNSAMPLED_PATHS = ("/health", "/ready", "/metrics", "/profiles")
+
+PROFILE_ID_PATTERN = re.compile(r"^\d{8}T\d{12}-[0-9a-f]{8}$")
+
+def profiling_enabled() -> bool:
+    return bool(PROFILE_TOKEN) or PROFILE_SAMPLE_RATE > 0
+
+class ProfileCapture:
+    """
+    The profile of one request. The middleware profiles the request's task on the event loop;
+    units of work that run_query hands to worker threads (SQL, ORM hydration) are profiled
+    there and added as sibling thread subtrees.
+    """
+
+    def __init__(self):
+        self.thread_sessions = []
+        self._lock = threading.Lock()
+
+    def run_in_thread(self, fn: Callable[..., T], *args) -> T:
+        from pyinstrument import Profiler
+        profiler = Profiler(interval=PROFILE_INTERVAL, async_mode="disabled")
+        profiler.start()
+        try:
+            return fn(*args)
+        finally:
+            session = profiler.stop()
+            with self._lock:
+                self.thread_sessions.append(session)
+
+# The capture of the request being profiled; worker threads inherit a copy of the context
+_current_capture: ContextVar[Optional[ProfileCapture]] = ContextVar("profile_capture", default=None)
+
+def current_capture() -> Optional[ProfileCapture]:
+    return _current_capture.get()
+
+class ProfileStore:
+    """
+    Bounded on-disk ring of pyinstrument sessions: <id>.pyisession plus <id>.meta.json per
+    profile, newest PROFILE_KEEP kept. IDs sort by capture time, so the ring needs no index
+    and several worker processes can share one directory.
+    """
+
+    def __init__(self, directory: Path, keep: int):
+        self.directory = directory
+        self.keep = keep
+
+    @staticmethod
+    def new_id() -> str:
+        return f"{datetime.now(timezone.utc):%Y%m%dT%H%M%S%f}-{secrets.token_hex(4)}"
+
+    def save(self, profile_id: str, session, meta: dict) -> None:
+        self.directory.mkdir(parents=True, exist_ok=True)
+        session.save(str(self.directory / f"{profile_id}.pyisession"))
+        # The meta file lands last: listings only show complete profiles
+        (self.directory / f"{profile_id}.meta.json").write_bytes(orjson.dumps(meta))
+        self._prune()
+
+    def _prune(self) -> None:
+        for meta in sorted(self.directory.glob("*.meta.json"), reverse=True)[self.keep:]:
+            profile_id = meta.name.removesuffix(".meta.json")
+            meta.unlink(missing_ok=True)
+            (self.directory / f"{profile_id}.pyisession").unlink(missing_ok=True)
+
+    def list(self) -> list:
+        """Metadata of the stored profiles, newest first."""
+        if not self.directory.exists():
+            return []
+        profiles = []
+        for meta in sorted(self.directory.glob("*.meta.json"), reverse=True):
+            try:
+                profiles.append(orjson.loads(meta.read_bytes()))
+            except (FileNotFoundError, orjson.JSONDecodeError):
+                continue  # Pruned by another worker mid-listing
+        return profiles
+
+    def session_path(self, profile_id: str) -> Optional[Path]:
+        if not PROFILE_ID_PATTERN.match(profile_id):
+            return None
+        path = self.directory / f"{profile_id}.pyisession"
+        return path if path.exists() else None
+
+profile_store = ProfileStore(PROFILE_DIR, PROFILE_KEEP)
+
+def _trigger(scope, api_key: Optional[str]) -> Optional[str]:
+    headers = dict(scope["headers"])
+    # The API key is only checked by the routers, after this middleware; requests that will be
+    # rejected are neither profiled nor stored
+    if api_key is not None and not secrets.compare_digest(headers.get(_API_KEY_HEADER_KEY, b""), api_key.encode()):
+        return None
+    if PROFILE_TOKEN and _PROFILE_HEADER_KEY in headers:
+        return "header" if secrets.compare_digest(headers[_PROFILE_HEADER_KEY], PROFILE_TOKEN.encode()) else None
+    if PROFILE_SAMPLE_RATE and random.random() < PROFILE_SAMPLE_RATE and not scope["path"].startswith(UNSAMPLED_PATHS):
+        return "sampled"
+    return None
+
+class ProfilerMiddleware:
+    """
+    Pure ASGI middleware that runs selected requests under pyinstrument: those carrying
+    X-Profile: <PROFILE_TOKEN>, and a PROFILE_SAMPLE_RATE share of the rest. The profile
+    ID is returned in X-Profile-Id and the profile is stored once the response is sent.
+    With `api_key`, only requests carrying that X-API-Key are candidates.
+    Only installed when profiling is configured; other requests pay one header scan.
+    """
+
+    def __init__(self, app, api_key: Optional[str] = None):
+        self.app = app
+        self.api_key = api_key
+
+    async def __call__(self, scope, receive, send):
+        trigger = _trigger(scope, self.api_key) if scope["type"] == "http" else None
+        if trigger is None:
+            await self.app(scope, receive, send)
+            return
+
+        from pyinstrument import Profiler
+        profile_id = profile_store.new_id()
+        capture = ProfileCapture()
+        token = _current_capture.set(capture)
+        status_code = None
+
+        async def send_with_id(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+                MutableHeaders(scope=message).append(PROFILE_ID_HEADER, profile_id)
+            await send(message)
+
+        profiler = Profiler(interval=PROFILE_INTERVAL, async_mode="enabled")
+        started = time.perf_counter()
+        profiler.start()
+        try:
+            await self.app(scope, receive, send_with_id)
+        finally:
+            session = profiler.stop()
+            duration_ms = round((time.perf_counter() - started) * 1000, 2)
+            _current_capture.reset(token)
+            meta = {
+                "id": profile_id,
+                "method": scope["method"],
+                "path": scope["path"],
+                "query": scope["query_string"].decode("latin-1"),
+                "route": route_template(scope),
+                "status": status_code,
+                "duration_ms": duration_ms,
+                "trigger": trigger,
+                "created_at": datetime.now(timezone.utc).isoformat(),
+            }
+            try:
+                await run_in_threadpool(_store, profile_id, session, capture, meta)
+            except Exception as e:
+                # A full disk or unwritable PROFILE_DIR must never fail the request
+                logger.warning(f"Could not store profile {profile_id}: {e!r}")
+
+def _store(profile_id: str, session, capture: ProfileCapture, meta: dict) -> None:
+    from pyinstrument.session import Session
+    for thread_session in capture.thread_sessions:
+        session = Session.combine(session, thread_session)
+    meta["samples"] = session.sample_count
+    profile_store.save(profile_id, session, meta)
+
+def render_profile(path: Path, fmt: str) -> tuple:
+    """(body, media type) of a stored session as a flamegraph page, speedscope JSON or text."""
+    from pyinstrument.renderers import ConsoleRenderer, HTMLRenderer, SpeedscopeRenderer
+    from pyinstrument.session import Session
+    session = Session.load(str(path))
+    if fmt == "html":
+        return HTMLRenderer().render(session), "text/html"
+    if fmt == "speedscope":
+        return SpeedscopeRenderer().render(session), "application/json"
+    return ConsoleRenderer(unicode=True, color=False).render(session), "text/plain"
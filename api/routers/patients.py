@@ -0,0 +1,56 @@
+from fastapi import APIRouter, Depends, HTTPException, Path, Request, Response
+from sqlalchemy import select
+from sqlalchemy.orm import Session, selectinload
+
+from api.dependencies import get_session, run_query
+from api.models import FrontendPatient, FrontendSample, FrontendRun
+from api.schemas import PatientResponse
+from api.etag import etag_matches, not_modified, patient_etag
+
+router = APIRouter(
+    prefix="/patients",
+    tags=["Patients"]
+)
+
+@router.get("/{patient_hash}", response_model=PatientResponse)
+async def get_patient(
+    request: Request,
+    response: Response,
+    patient_hash: str = Path(..., pattern="^[0-9a-f]{32}$", description="The patient's opaque MD5 surrogate key"),
+    db: Session = Depends(get_session)
+):
+    """
+    Retrieve a patient with every sample and its full run tree. The stored, indexed
+    patient_hash columns drive the lookups, and each level is eager loaded with one
+    selectinload, so the query count is fixed no matter how many samples or runs exist.
+    Responses carry a strong ETag; a matching If-None-Match is answered with 304.
+    The change announcements are keyed by sample, so patient trees are always read from
+    the session's replica, if any, and may trail a just-finished ingest by its lag.
+    """
+    etag = await run_query(db, lambda session: patient_etag(session, patient_hash))
+    if etag is None:
+        raise HTTPException(status_code=404, detail=f"Patient {patient_hash} not found")
+    if etag_matches(request, etag):
+        return not_modified(etag)
+
+    stmt = (
+        select(FrontendPatient)
+        .where(FrontendPatient.patient_hash == patient_hash)
+        .options(
+            selectinload(FrontendPatient.samples)
+            .selectinload(FrontendSample.runs)
+            .options(
+                selectinload(FrontendRun.files),
+                selectinload(FrontendRun.results),
+                selectinload(FrontendRun.endpoints),
+            )
+        )
+    )
+
+    result = await run_query(db, lambda session: session.execute(stmt).scalar_one_or_none())
+
+    if result is None:
+        raise HTTPException(status_code=404, detail=f"Patient {patient_hash} not found")
+
+    response.headers["ETag"] = etag
+    return result
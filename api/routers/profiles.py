@@ -0,0 +1,32 @@
+from fastapi import APIRouter, HTTPException, Query
+from fastapi.responses import Response
+from typing import List, Literal
+
+from api.profiling import profile_store, render_profile
+from api.schemas import ProfileInfo
+
+router = APIRouter(
+    prefix="/profiles",
+    tags=["Profiles"]
+)
+
+@router.get("/", response_model=List[ProfileInfo])
+def list_profiles():
+    """
+    List the request profiles kept on disk, newest first. Requests are profiled when they
+    carry X-Profile: <PROFILE_TOKEN> or are picked by PROFILE_SAMPLE_RATE; the response of
+    a profiled request names its profile in X-Profile-Id.
+    """
+    return profile_store.list()
+
+@router.get("/{profile_id}")
+def get_profile(
+    profile_id: str,
+    format: Literal["html", "speedscope", "text"] = Query("html", description="html flamegraph, speedscope JSON (speedscope.app) or a text call tree"),
+):
+    """Render a stored profile. Time spent in worker threads (SQL, ORM hydration) appears as its own thread subtree."""
+    path = profile_store.session_path(profile_id)
+    if path is None:
+        raise HTTPException(status_code=404, detail=f"Profile {profile_id} not found")
+    body, media_type = render_profile(path, format)
+    return Response(content=body, media_type=media_type)
@@ -0,0 +1,40 @@
+from fastapi import APIRouter, Depends, HTTPException
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from api.dependencies import get_session, run_query
+from api.models import FrontendRun, RunProfile
+from api.schemas import RunProfileResponse
+
+router = APIRouter(
+    prefix="/runs",
+    tags=["Runs"]
+)
+
+@router.get("/{run_id}/profiles", response_model=RunProfileResponse)
+async def get_run_profiles(
+    run_id: str,
+    db: Session = Depends(get_session)
+):
+    """
+    Retrieve the coverage and quality profile series behind a run's QC chart.
+    They live in the run_profiles table rather than the run metadata, so sample
+    list and detail responses never carry them; fetch them only when charting.
+    A run without stored profiles returns empty series.
+    """
+    stmt = (
+        select(FrontendRun.run_id, RunProfile.coverage_profile, RunProfile.quality_profile)
+        .outerjoin(RunProfile, RunProfile.run_id == FrontendRun.run_id)
+        .where(FrontendRun.run_id == run_id)
+    )
+    
+    row = await run_query(db, lambda session: session.execute(stmt).one_or_none())
+    
+    if row is None:
+        raise HTTPException(status_code=404, detail=f"Run {run_id} not found")
+        
+    return RunProfileResponse(
+        run_id=row.run_id,
+        coverage_profile=row.coverage_profile or [],
+        quality_profile=row.quality_profile or [],
+    )
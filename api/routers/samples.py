@@ -1,91 +1,277 @@
-from fastapi import APIRouter, Depends, HTTPException, Query
-from sqlalchemy import select
-from sqlalchemy.orm import Session, selectinload
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response
+from fastapi.responses import StreamingResponse
+from sqlalchemy import String, and_, any_, literal, select
+from sqlalchemy.dialects.postgresql import ARRAY
+from sqlalchemy.orm import Session
 from typing import List, Optional
 
-from core.database import get_db
+from api.dependencies import get_session, run_query
 from api.models import FrontendSample, FrontendRun
-from api.schemas import SampleResponse
+from api.schemas import SampleBatchRequest, SampleBatchResponse, SampleResponse
+from api.pagination import NEXT_CURSOR_HEADER, encode_cursor, keyset_predicate
+from api.expansion import Expansion, get_expansion
+from api.cache import sample_cache
+from api.etag import etag_matches, not_modified, page_etag, sample_etag
+from api.export import MEDIA_TYPES, export_query, stream_async, stream_sync
+from api.sql_json import SQL_JSON_ENABLED, fetch_sample_document
+from api.serialization import FAST_SERIALIZER_ENABLED, encode_samples
+from api.metadata_filters import metadata_eq, run_metadata_predicate
+from core.replicas import recent_changes, use_primary
 
 router = APIRouter(
     prefix="/samples",
     tags=["Samples"]
 )
 
+# Declared before /{sample_id} so "export" is not captured as a sample ID
+@router.get("/export", response_class=StreamingResponse)
+async def export_samples(
+    format: str = Query("ndjson", pattern="^(ndjson|csv)$", description="Output format: ndjson or csv"),
+    assay_type: Optional[str] = Query(None, description="Filter by assay type (e.g., WGS, RNA-Seq)"),
+    db: Session = Depends(get_session)
+):
+    """
+    Stream every run (with its sample and pipeline results) as NDJSON or CSV in a single request.
+    Rows are pulled through a server-side cursor and written without ORM or Pydantic
+    hydration, so memory stays flat regardless of how many runs are exported.
+    With read replicas the export reflects whatever the chosen replica has replayed.
+    """
+    stmt = export_query(format, assay_type)
+    chunks = stream_sync(db, stmt, format) if isinstance(db, Session) else stream_async(db, stmt, format)
+    
+    return StreamingResponse(
+        chunks,
+        media_type=MEDIA_TYPES[format],
+        headers={"Content-Disposition": f'attachment; filename="samples_export.{format}"'},
+    )
+
+@router.post("/batch", response_model=SampleBatchResponse)
+async def get_sample_batch(
+    batch: SampleBatchRequest,
+    expansion: Expansion = Depends(get_expansion),
+    db: Session = Depends(get_session)
+):
+    """
+    Resolve many sample IDs in one request. All samples are fetched by a single
+    `sample_id = ANY(:ids)` query whose selectinloads are shared across the batch, so the
+    query count does not grow with the number of IDs. Results are keyed by sample ID in
+    request order; IDs that do not exist are listed under `missing`.
+    Accepts the same include/fields query parameters as the single-sample lookup.
+    """
+    sample_ids = list(dict.fromkeys(batch.sample_ids))
+    if any(sample_id in recent_changes for sample_id in sample_ids):
+        use_primary(db)
+
+    # One array parameter keeps the statement text identical for every batch size
+    stmt = (
+        select(FrontendSample)
+        .where(FrontendSample.sample_id == any_(literal(sample_ids, ARRAY(String))))
+        .options(*expansion.load_options())
+    )
+    results = await run_query(db, lambda session: session.execute(stmt).scalars().all())
+
+    found = {sample.sample_id: sample for sample in results}
+    samples = [found[sample_id] for sample_id in sample_ids if sample_id in found]
+    missing = [sample_id for sample_id in sample_ids if sample_id not in found]
+    return expansion.render_batch(samples, missing)
+
 @router.get("/{sample_id}", response_model=SampleResponse)
-def get_single_sample(sample_id: str, db: Session = Depends(get_db)):
+async def get_single_sample(
+    sample_id: str,
+    request: Request,
+    response: Response,
+    expansion: Expansion = Depends(get_expansion),
+    db: Session = Depends(get_session)
+):
     """
     Retrieve a specific sample by its ID, including all associated sequencing runs, 
     files, pipeline results, and downstream endpoints.
+    Use include/fields to trim the tree to the relationships and fields actually needed.
+    Full-tree lookups are served from the NOTIFY-invalidated sample cache when it is enabled,
+    and assembled entirely inside Postgres when API_SQL_JSON is enabled.
+    API_FAST_SERIALIZER encodes responses from the ORM rows with orjson, skipping re-validation.
+    Responses carry a strong ETag; a matching If-None-Match is answered with 304.
     """
+    # A lagging replica could still serve the tree from before a change the primary just
+    # announced, and the cache would keep it until the next change: read the primary instead
+    if sample_id in recent_changes:
+        use_primary(db)
+
+    use_cache = sample_cache.enabled and expansion.is_default
+    if use_cache:
+        cached = sample_cache.get(sample_id)
+        if cached is not None:
+            rendered, etag = cached
+            if etag_matches(request, etag):
+                return not_modified(etag)
+            if isinstance(rendered, bytes):
+                return Response(rendered, media_type="application/json", headers={"ETag": etag})
+            response.headers["ETag"] = etag
+            return rendered
+        # Snapshot before querying so an invalidation racing this read prevents caching it
+        generation = sample_cache.generation
+
+    # Cheap aggregate over updated_at first, so unchanged trees are never loaded
+    etag = await run_query(db, lambda session: sample_etag(session, sample_id, expansion.variant))
+    if etag is None:
+        raise HTTPException(status_code=404, detail=f"Sample {sample_id} not found")
+    if etag_matches(request, etag):
+        return not_modified(etag)
+
+    if SQL_JSON_ENABLED and expansion.is_default:
+        # Single roundtrip: Postgres returns the finished document, which is passed through as bytes
+        document = await run_query(db, lambda session: fetch_sample_document(session, sample_id))
+        if document is None:
+            raise HTTPException(status_code=404, detail=f"Sample {sample_id} not found")
+        if use_cache:
+            sample_cache.put(sample_id, (document, etag), generation)
+        return Response(document, media_type="application/json", headers={"ETag": etag})
+
     stmt = (
         select(FrontendSample)
         .where(FrontendSample.sample_id == sample_id)
-        # Deep eager loading to prevent N+1 query bottlenecks
-        .options(
-            selectinload(FrontendSample.runs).selectinload(FrontendRun.files),
-            selectinload(FrontendSample.runs).selectinload(FrontendRun.results),
-            selectinload(FrontendSample.runs).selectinload(FrontendRun.endpoints)
-        )
+        # Eager load only the requested relationships to prevent N+1 query bottlenecks
+        .options(*expansion.load_options())
     )
     
-    result = db.execute(stmt).scalar_one_or_none()
+    result = await run_query(db, lambda session: session.execute(stmt).scalar_one_or_none())
     
     if result is None:
         raise HTTPException(status_code=404, detail=f"Sample {sample_id} not found")
+
+    headers = {"ETag": etag}
+    response.headers.update(headers)
+
+    if use_cache:
+        if FAST_SERIALIZER_ENABLED:
+            # Cache the encoded bytes so hits skip serialization too
+            document = encode_samples(result, expansion.serialization_include())
+            sample_cache.put(sample_id, (document, etag), generation)
+            return Response(document, media_type="application/json", headers=headers)
+        rendered = SampleResponse.model_validate(result)
+        sample_cache.put(sample_id, (rendered, etag), generation)
+        return rendered
         
-    return result
+    return expansion.render(result, headers)
 
 @router.get("/", response_model=List[SampleResponse])
-def list_samples(
+async def list_samples(
+    request: Request,
+    response: Response,
     skip: int = Query(0, ge=0, description="Pagination: rows to skip"),
     limit: int = Query(50, ge=1, le=100, description="Pagination: max rows to return"),
+    cursor: Optional[str] = Query(None, description=f"Keyset pagination: opaque token from the previous page's {NEXT_CURSOR_HEADER} header"),
     assay_type: Optional[str] = Query(None, description="Filter by assay type (e.g., WGS, RNA-Seq)"),
-    db: Session = Depends(get_db)
+    sequencer: Optional[str] = Query(None, description="Filter by run sequencer (e.g., NovaSeq 6000)"),
+    qc_passed: Optional[bool] = Query(None, description="Filter by run QC outcome"),
+    status: Optional[str] = Query(None, description="Filter by run status (e.g., complete)"),
+    expansion: Expansion = Depends(get_expansion),
+    db: Session = Depends(get_session)
 ):
     """
-    List samples with optional filtering by assay_type and basic pagination.
+    List samples with optional filtering by assay_type and the promoted run metadata
+    columns (sequencer, qc_passed, status). Run filters must all hold for the same run.
+
+    Supports offset pagination (skip/limit) for shallow pages and keyset pagination
+    (cursor/limit) for deep ones. Whenever a page comes back full, the token for the
+    next page is returned in the X-Next-Cursor response header.
+    Pages carry a strong ETag; a matching If-None-Match is answered with 304.
+    Unlike single-sample reads, pages are not redirected to the primary after a change:
+    with read replicas a new or updated sample can take up to the replica lag to appear.
     """
+    if cursor and skip:
+        raise HTTPException(status_code=400, detail="cursor and skip cannot be combined")
+
     stmt = select(FrontendSample)
     
-    # If filtering by assay, we must join the child run table
+    run_filters = []
     if assay_type:
-        stmt = stmt.join(FrontendSample.runs).where(FrontendRun.assay_type == assay_type)
-        
-    stmt = stmt.options(
-        selectinload(FrontendSample.runs).selectinload(FrontendRun.files),
-        selectinload(FrontendSample.runs).selectinload(FrontendRun.results),
-        selectinload(FrontendSample.runs).selectinload(FrontendRun.endpoints)
-    )
+        run_filters.append(FrontendRun.assay_type == assay_type)
+    if sequencer:
+        run_filters.append(FrontendRun.sequencer == sequencer)
+    if qc_passed is not None:
+        run_filters.append(FrontendRun.qc_passed == qc_passed)
+    if status:
+        run_filters.append(FrontendRun.status == status)
+
+    # Filter through a semi-join so a sample with several matching runs is only counted once per page
+    if run_filters:
+        stmt = stmt.where(FrontendSample.runs.any(and_(*run_filters)))
+
+    if cursor:
+        stmt = stmt.where(keyset_predicate(FrontendSample.created_at, FrontendSample.sample_id, cursor))
     
     stmt = stmt.order_by(FrontendSample.created_at.desc(), FrontendSample.sample_id.desc()).offset(skip).limit(limit)
+
+    etag = await run_query(db, lambda session: page_etag(session, stmt, expansion.variant))
+    if etag_matches(request, etag):
+        return not_modified(etag)
+        
+    stmt = stmt.options(*expansion.load_options())
     
-    # .unique() is required by SQLAlchemy when fetching joined collections to deduplicate the root objects
-    results = db.execute(stmt).scalars().unique().all()
-    return results
+    results = await run_query(db, lambda session: session.execute(stmt).scalars().all())
+
+    headers = {"ETag": etag}
+    if len(results) == limit:
+        last = results[-1]
+        headers[NEXT_CURSOR_HEADER] = encode_cursor(last.created_at, last.sample_id)
+    response.headers.update(headers)
+
+    return expansion.render(results, headers)
 
 @router.get("/search/metadata", response_model=List[SampleResponse])
-def search_samples_by_metadata(
-    key: str = Query(..., description="The metadata key to search for (e.g., 'sequencer')"),
-    value: str = Query(..., description="The value of the metadata key (e.g., 'NovaSeq 6000')"),
-    db: Session = Depends(get_db)
+async def search_samples_by_metadata(
+    response: Response,
+    key: Optional[str] = Query(None, description="The metadata key to search for (e.g., 'sequencer')"),
+    value: Optional[str] = Query(None, description="The value of the metadata key (e.g., 'NovaSeq 6000')"),
+    filters: List[str] = Query(
+        [],
+        alias="filter",
+        description=(
+            "Repeatable run metadata predicate as key:op[:value]. Operators: eq, in (comma-separated), "
+            "bool (true/false), exists, and numeric lt, lte, gt, gte "
+            "(e.g. filter=sequencer:eq:PromethION 24&filter=qc_passed:bool:true&filter=mean_coverage:gt:25)"
+        ),
+    ),
+    limit: int = Query(100, ge=1, le=100, description="Pagination: max rows to return"),
+    cursor: Optional[str] = Query(None, description=f"Keyset pagination: opaque token from the previous page's {NEXT_CURSOR_HEADER} header"),
+    expansion: Expansion = Depends(get_expansion),
+    db: Session = Depends(get_session)
 ):
     """
     Query the schema-less JSONB metadata column on the nested run.
-    The GIN index on runs.metadata keeps this query highly performant.
+    Returns samples with at least one run matching every predicate. Equality, IN, boolean
+    and key-exists predicates use the GIN index on runs.metadata (or, for promoted keys such
+    as sequencer, the btree-indexed generated column); numeric comparisons evaluate
+    metadata_numeric() on the runs left by the other predicates. Results page with the same keyset cursor as
+    list_samples. The legacy key/value pair is treated as an eq predicate.
+    Like list_samples, results may lag recent writes by the replica lag.
     """
+    if (key is None) != (value is None):
+        raise HTTPException(status_code=400, detail="key and value must be provided together")
+    # Built directly rather than as a key:eq:value filter string: the key may itself contain ':'
+    legacy = [metadata_eq(key, value)] if key is not None else []
+    if not filters and not legacy:
+        raise HTTPException(status_code=400, detail="At least one metadata filter is required")
+
+    # Semi-join on one run satisfying all predicates, so each sample appears once
+    stmt = select(FrontendSample).where(FrontendSample.runs.any(run_metadata_predicate(filters, *legacy)))
+
+    if cursor:
+        stmt = stmt.where(keyset_predicate(FrontendSample.created_at, FrontendSample.sample_id, cursor))
+
     stmt = (
-        select(FrontendSample)
-        .join(FrontendSample.runs)
-        # Use the SQLAlchemy JSON containment operator:
-        .where(FrontendRun.metadata_col.contains({key: value}))
-        .options(
-            selectinload(FrontendSample.runs).selectinload(FrontendRun.files),
-            selectinload(FrontendSample.runs).selectinload(FrontendRun.results),
-            selectinload(FrontendSample.runs).selectinload(FrontendRun.endpoints)
-        )
-        .limit(100)
+        stmt.order_by(FrontendSample.created_at.desc(), FrontendSample.sample_id.desc())
+        .limit(limit)
+        .options(*expansion.load_options())
     )
     
-    results = db.execute(stmt).scalars().unique().all()
-    return results
\ No newline at end of file
+    results = await run_query(db, lambda session: session.execute(stmt).scalars().all())
+
+    headers = {}
+    if len(results) == limit:
+        last = results[-1]
+        headers[NEXT_CURSOR_HEADER] = encode_cursor(last.created_at, last.sample_id)
+    response.headers.update(headers)
+
+    return expansion.render(results, headers)
@@ -1,4 +1,4 @@
-from pydantic import BaseModel, ConfigDict
+from pydantic import BaseModel, ConfigDict, Field
 from typing import List, Optional, Dict, Any
 from datetime import datetime
 
@@ -56,6 +56,26 @@ class SampleResponse(BaseModel):
     
     model_config = ConfigDict(from_attributes=True)
 
+# --- Batch Lookup ---
+# Most sample IDs one POST /samples/batch call may resolve
+SAMPLE_BATCH_LIMIT = 100
+
+class SampleBatchRequest(BaseModel):
+    sample_ids: List[str] = Field(min_length=1, max_length=SAMPLE_BATCH_LIMIT)
+
+class SampleBatchResponse(BaseModel):
+    # Keyed by sample_id, in request order
+    samples: Dict[str, SampleResponse] = {}
+    missing: List[str] = []
+
+# --- Run Chart Series (served separately from the sample tree) ---
+class RunProfileResponse(BaseModel):
+    run_id: str
+    coverage_profile: List[float] = []
+    quality_profile: List[float] = []
+    
+    model_config = ConfigDict(from_attributes=True)
+
 # --- The Root Subject (Patient) Schema ---
 class PatientResponse(BaseModel):
     patient_hash: str
@@ -64,4 +84,17 @@ class PatientResponse(BaseModel):
     
     samples: List[SampleResponse] = []
     
-    model_config = ConfigDict(from_attributes=True)
\ No newline at end of file
+    model_config = ConfigDict(from_attributes=True)
+
+# --- Request Profiles (api/profiling.py) ---
+class ProfileInfo(BaseModel):
+    id: str
+    method: str
+    path: str
+    query: str = ""
+    route: str
+    status: Optional[int] = None
+    duration_ms: float
+    trigger: str
+    samples: int = 0
+    created_at: datetime
@@ -0,0 +1,70 @@
+import os
+from typing import Optional
+
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+
+# Opt-in: build full sample documents inside Postgres instead of via the ORM and Pydantic
+SQL_JSON_ENABLED = os.environ.get("API_SQL_JSON", "false").lower() in ("1", "true", "yes")
+
+# Mirrors the SampleResponse tree in api/schemas.py key-for-key. Child collections are
+# ordered by primary key so documents are deterministic. Timestamps are rendered by
+# Postgres as ISO 8601 with a numeric offset (+00:00) rather than Pydantic's "Z".
+SAMPLE_DOCUMENT_SQL = text("""
+    SELECT json_build_object(
+        'sample_id', s.sample_id,
+        'patient_hash', s.patient_hash,
+        'created_at', s.created_at,
+        'updated_at', s.updated_at,
+        'runs', COALESCE((
+            SELECT json_agg(json_build_object(
+                'run_id', r.run_id,
+                'assay_type', r.assay_type,
+                'metadata_col', r.metadata,
+                'created_at', r.created_at,
+                'updated_at', r.updated_at,
+                'files', COALESCE((
+                    SELECT json_agg(json_build_object(
+                        'id', f.id,
+                        'file_type', f.file_type,
+                        's3_uri', f.s3_uri,
+                        'created_at', f.created_at
+                    ) ORDER BY f.id)
+                    FROM public.file_locations f
+                    WHERE f.run_id = r.run_id
+                ), '[]'::json),
+                'results', COALESCE((
+                    SELECT json_agg(json_build_object(
+                        'id', pr.id,
+                        'clinical_report_json_uri', pr.clinical_report_json_uri,
+                        'pipeline_version', pr.pipeline_version,
+                        'metrics', pr.metrics,
+                        'run_date', pr.run_date
+                    ) ORDER BY pr.id)
+                    FROM public.pipeline_results pr
+                    WHERE pr.run_id = r.run_id
+                ), '[]'::json),
+                'endpoints', COALESCE((
+                    SELECT json_agg(json_build_object(
+                        'id', e.id,
+                        'service_name', e.service_name,
+                        'endpoint_url', e.endpoint_url,
+                        'method', e.method,
+                        'created_at', e.created_at
+                    ) ORDER BY e.id)
+                    FROM public.api_endpoints e
+                    WHERE e.run_id = r.run_id
+                ), '[]'::json)
+            ) ORDER BY r.run_id)
+            FROM public.frontend_runs r
+            WHERE r.sample_id = s.sample_id
+        ), '[]'::json)
+    )::text
+    FROM public.frontend_samples s
+    WHERE s.sample_id = :sample_id
+""")
+
+def fetch_sample_document(session: Session, sample_id: str) -> Optional[bytes]:
+    """Returns the complete SampleResponse-shaped JSON document in one roundtrip, or None."""
+    document = session.execute(SAMPLE_DOCUMENT_SQL, {"sample_id": sample_id}).scalar_one_or_none()
+    return document.encode() if document is not None else None
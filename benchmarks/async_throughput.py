@@ -0,0 +1,103 @@
+"""
+Throughput comparison of the psycopg2 (threadpool) and asyncpg (DB_ASYNC) session paths.
+
+Boots the API under uvicorn once per mode against the database described by the usual
+DB_* environment variables, then drives it with a fixed number of concurrent clients.
+
+Usage:
+    python -m benchmarks.async_throughput --concurrency 200 --duration 20
+"""
+import argparse
+import asyncio
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+import httpx
+
+API_KEY = os.environ.get("API_KEY", "benchmark_api_key")
+
+async def _wait_until_up(base_url: str, timeout: float = 30.0):
+    deadline = time.monotonic() + timeout
+    async with httpx.AsyncClient(base_url=base_url) as client:
+        while time.monotonic() < deadline:
+            try:
+                if (await client.get("/health")).status_code == 200:
+                    return
+            except httpx.TransportError:
+                pass
+            await asyncio.sleep(0.2)
+    raise RuntimeError(f"API at {base_url} did not come up within {timeout}s")
+
+async def _drive(base_url: str, paths: list, concurrency: int, duration: float) -> dict:
+    """Runs `concurrency` closed-loop clients for `duration` seconds and collects latencies."""
+    latencies, errors = [], 0
+    deadline = time.monotonic() + duration
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+
+    async with httpx.AsyncClient(base_url=base_url, headers={"X-API-Key": API_KEY}, limits=limits, timeout=60) as client:
+        async def worker(offset: int):
+            nonlocal errors
+            i = offset
+            while time.monotonic() < deadline:
+                started = time.perf_counter()
+                try:
+                    response = await client.get(paths[i % len(paths)])
+                    if response.status_code != 200:
+                        errors += 1
+                except httpx.HTTPError:
+                    errors += 1
+                latencies.append(time.perf_counter() - started)
+                i += 1
+
+        await asyncio.gather(*(worker(n) for n in range(concurrency)))
+
+    latencies.sort()
+    return {
+        "requests": len(latencies),
+        "rps": len(latencies) / duration,
+        "p50_ms": statistics.median(latencies) * 1000,
+        "p95_ms": latencies[int(len(latencies) * 0.95) - 1] * 1000,
+        "errors": errors,
+    }
+
+async def _sample_paths(base_url: str) -> list:
+    async with httpx.AsyncClient(base_url=base_url, headers={"X-API-Key": API_KEY}) as client:
+        samples = (await client.get("/samples/", params={"limit": 20, "include": ""})).json()
+    if not samples:
+        raise RuntimeError("No samples found; seed the database first (python -m etl.jobs.seed_database)")
+    return [f"/samples/{s['sample_id']}" for s in samples] + ["/samples/?limit=20"]
+
+def run_mode(async_mode: bool, port: int, concurrency: int, duration: float) -> dict:
+    env = dict(os.environ, API_KEY=API_KEY, DB_ASYNC="true" if async_mode else "false")
+    server = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "api.main:app", "--port", str(port), "--log-level", "warning"],
+        env=env,
+    )
+    base_url = f"http://127.0.0.1:{port}"
+    try:
+        asyncio.run(_wait_until_up(base_url))
+        paths = asyncio.run(_sample_paths(base_url))
+        # Short warm-up so both modes start with a filled connection pool
+        asyncio.run(_drive(base_url, paths, concurrency, min(3.0, duration)))
+        return asyncio.run(_drive(base_url, paths, concurrency, duration))
+    finally:
+        server.terminate()
+        server.wait()
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare sync and async DB session throughput under concurrent load.")
+    parser.add_argument("--concurrency", type=int, default=200, help="Number of concurrent closed-loop clients")
+    parser.add_argument("--duration", type=float, default=20.0, help="Measured seconds per mode")
+    parser.add_argument("--port", type=int, default=8765)
+    args = parser.parse_args()
+
+    print(f"{'mode':<8}{'requests':>10}{'req/s':>10}{'p50 ms':>10}{'p95 ms':>10}{'errors':>8}")
+    for label, async_mode in (("sync", False), ("async", True)):
+        stats = run_mode(async_mode, args.port, args.concurrency, args.duration)
+        print(f"{label:<8}{stats['requests']:>10}{stats['rps']:>10.1f}{stats['p50_ms']:>10.1f}{stats['p95_ms']:>10.1f}{stats['errors']:>8}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,78 @@
+"""
+Ingest throughput (runs/sec) of the per-run path vs. bulk manifest ingestion.
+
+Both paths commit for real, so it needs write credentials and ENCRYPTION_KEY (e.g.
+DB_USER=etl_worker). Everything it creates is keyed by a BENCH-INGEST prefix and deleted
+afterwards.
+
+Usage:
+    python -m benchmarks.bulk_ingest --runs 500 5000 --chunk-size 1000
+"""
+import argparse
+import contextlib
+import io
+import time
+
+from sqlalchemy import text
+
+from core.database import SessionLocal
+from etl.jobs.bulk_ingest import ManifestRow, bulk_ingest
+from etl.jobs.process_run import insert_pipeline_results
+
+# Deleting the patients cascades to their samples, runs and file locations
+CLEANUP_SQL = text("""
+    DELETE FROM patients WHERE patient_id IN (
+        SELECT patient_id FROM samples WHERE sample_id LIKE 'SAMP-BENCH-INGEST-%'
+    )
+""")
+
+def manifest(n: int, path: str) -> list:
+    # Roughly a sequencing batch: 4 runs per sample, 2 samples per patient
+    return [
+        ManifestRow(
+            sample_id=f"SAMP-BENCH-INGEST-{path}-{i // 4}",
+            patient_id=f"PAT-BENCH-INGEST-{path}-{i // 8}",
+            assay_type="ONT_WGS",
+            files={"FASTQ_R1": f"s3://bench/{path}/{i}_R1.fastq.gz", "FASTQ_R2": f"s3://bench/{path}/{i}_R2.fastq.gz"},
+        )
+        for i in range(n)
+    ]
+
+def per_run(rows: list) -> float:
+    started = time.perf_counter()
+    # insert_pipeline_results prints a line per run
+    with contextlib.redirect_stdout(io.StringIO()):
+        for row in rows:
+            insert_pipeline_results(row.sample_id, row.patient_id, row.assay_type, row.files["FASTQ_R1"], row.files["FASTQ_R2"])
+    return time.perf_counter() - started
+
+def cleanup():
+    db = SessionLocal()
+    try:
+        db.execute(CLEANUP_SQL)
+        db.commit()
+    finally:
+        db.close()
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark per-run vs. bulk manifest ingestion.")
+    parser.add_argument("--runs", type=int, nargs="+", default=[500, 5000], help="Runs per manifest")
+    parser.add_argument("--chunk-size", type=int, default=1000)
+    parser.add_argument("--skip-per-run-above", type=int, default=5000, help="Only time the per-run path up to this many runs")
+    args = parser.parse_args()
+
+    try:
+        print(f"{'runs':>7}{'per-run s':>11}{'runs/s':>9}{'bulk s':>9}{'runs/s':>9}{'speedup':>9}")
+        for n in args.runs:
+            bulk_s = bulk_ingest(manifest(n, "bulk"), chunk_size=args.chunk_size).seconds
+            if n <= args.skip_per_run_above:
+                per_run_s = per_run(manifest(n, "single"))
+                print(f"{n:>7}{per_run_s:>11.2f}{n / per_run_s:>9.0f}{bulk_s:>9.2f}{n / bulk_s:>9.0f}{per_run_s / bulk_s:>8.1f}x")
+            else:
+                print(f"{n:>7}{'-':>11}{'-':>9}{bulk_s:>9.2f}{n / bulk_s:>9.0f}{'-':>9}")
+            cleanup()
+    finally:
+        cleanup()
+
+if __name__ == "__main__":
+    main()
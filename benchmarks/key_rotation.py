@@ -0,0 +1,70 @@
+"""
+Throughput of the key-rotation job (etl.jobs.rotate_encryption_key) on a synthetic table.
+
+Seeds N patients (one sample each) encrypted under a throwaway old key, rotates them to a
+throwaway new key and deletes them again. Needs write credentials (e.g. DB_USER=etl_worker);
+patients already in the database are scanned but, being under neither key, left untouched.
+
+Usage:
+    python -m benchmarks.key_rotation --patients 100000 --chunk-size 5000 --workers 1 2 4
+"""
+import argparse
+import io
+import secrets
+import time
+
+from cryptography.fernet import Fernet
+from sqlalchemy import text
+
+from core.database import SessionLocal
+from etl.jobs import rotate_encryption_key as job
+from etl.security import PHICryptoManager
+
+CLEANUP_SQL = text("DELETE FROM patients WHERE patient_id IN (SELECT patient_id FROM samples WHERE sample_id LIKE 'SAMP-BENCH-ROT-%')")
+
+def seed(manager: PHICryptoManager, n: int):
+    with manager.process_pool() as pool:
+        patient_ids = manager.encrypt_patient_ids([f"PAT-BENCH-ROT-{i}" for i in range(n)], executor=pool)
+    patients = io.StringIO("".join(f"{patient_id}\n" for patient_id in patient_ids))
+    samples = io.StringIO("".join(f"SAMP-BENCH-ROT-{i}\t{patient_id}\n" for i, patient_id in enumerate(patient_ids)))
+    db = SessionLocal()
+    try:
+        cursor = db.connection().connection.driver_connection.cursor()
+        cursor.copy_expert("COPY patients (patient_id) FROM STDIN", patients)
+        cursor.copy_expert("COPY samples (sample_id, patient_id) FROM STDIN", samples)
+        db.commit()
+    finally:
+        db.close()
+
+def cleanup():
+    db = SessionLocal()
+    try:
+        db.execute(CLEANUP_SQL)
+        db.commit()
+    finally:
+        db.close()
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the patient key-rotation job.")
+    parser.add_argument("--patients", type=int, default=100000)
+    parser.add_argument("--chunk-size", type=int, default=job.DEFAULT_CHUNK_SIZE)
+    parser.add_argument("--workers", type=int, nargs="+", default=[1], help="Pool sizes to compare (1 = in-process)")
+    args = parser.parse_args()
+
+    index_key = secrets.token_hex(32)
+    try:
+        print(f"{'workers':>8}{'rotated':>10}{'seconds':>9}{'patients/s':>12}")
+        for workers in args.workers:
+            old_key, new_key = Fernet.generate_key().decode(), Fernet.generate_key().decode()
+            seed(PHICryptoManager([old_key], index_key), args.patients)
+            job.crypto_manager = PHICryptoManager([new_key, old_key], index_key)
+            started = time.perf_counter()
+            stats = job.rotate_encryption_key(chunk_size=args.chunk_size, workers=workers)
+            seconds = time.perf_counter() - started
+            print(f"{workers:>8}{stats.rotated:>10}{seconds:>9.1f}{stats.rotated / seconds:>12.0f}")
+            cleanup()
+    finally:
+        cleanup()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,309 @@
+"""
+Capacity load test: many concurrent clients driving a realistic mix of the sample endpoints.
+
+Boots the API under uvicorn (or targets --url), then runs --clients closed-loop clients for
+--duration seconds after a --warmup. Each client follows a scenario from SCENARIOS: a weighted
+mix of list pages (first pages, next-cursor pages, filtered pages), sample detail lookups with
+Zipf-skewed popularity, and metadata searches. Every client draws from its own seeded RNG, so
+the same --seed replays the same request sequence per client.
+
+Reported: p50/p95/p99 latency, throughput and errors per route and overall, plus a timeline
+per --interval seconds. The timeline's pool columns come from polling /ready:
+  pool out        peak connections checked out of the API's pool
+  saturated       share of polls that found every connection checked out
+  checkout ms     average wait for a pooled connection, over the checkouts in the interval
+  thread wait ms  median /ready response time. /ready is a sync route and does no I/O, so this
+                  is how long a request queues for one of AnyIO's worker threads.
+
+Sample IDs are read from the database the server uses. --runs N loads the fixed query-path
+benchmark dataset first (TRUNCATEs the pipeline tables, so it needs --reset-database).
+
+Usage:
+    python -m benchmarks.load_test --runs 100000 --reset-database --clients 200 --duration 60
+    python -m benchmarks.load_test --scenario search --env DB_POOL_SIZE=20 --output report.json
+"""
+import argparse
+import asyncio
+import json
+import math
+import os
+import random
+import statistics
+import subprocess
+import sys
+import time
+from dataclasses import dataclass, field
+
+import httpx
+from sqlalchemy import text
+
+from api.pagination import NEXT_CURSOR_HEADER
+from benchmarks.async_throughput import API_KEY, _wait_until_up
+from core.database import SessionLocal
+
+ASSAYS = ["ONT_WGS", "ONT_RNASEQ", "ONT_TARGETED"]
+SEQUENCERS = ["PromethION 24", "GridION", "MinION Mk1B"]
+SEARCH_FILTERS = [
+    lambda rng: f"sequencer:eq:{rng.choice(SEQUENCERS)}",
+    lambda rng: "status:eq:failed",
+    lambda rng: "qc_passed:eq:false",
+    lambda rng: f"flowcell:eq:FAX{rng.randrange(100_000):05d}",
+    lambda rng: f"attr_{rng.randrange(4)}:exists",
+]
+
+@dataclass
+class ClientState:
+    rng: random.Random
+    cursor: str = None  # Next page of the list this client is browsing
+
+def list_first(state: ClientState, ids: "SampleIds") -> tuple:
+    return "/samples/", {"limit": 50}
+
+def list_next(state: ClientState, ids: "SampleIds") -> tuple:
+    if state.cursor is None:
+        return list_first(state, ids)
+    return "/samples/", {"limit": 50, "cursor": state.cursor}
+
+def list_filtered(state: ClientState, ids: "SampleIds") -> tuple:
+    if state.rng.random() < 0.5:
+        return "/samples/", {"limit": 50, "assay_type": state.rng.choice(ASSAYS)}
+    return "/samples/", {"limit": 50, "sequencer": state.rng.choice(SEQUENCERS), "status": "complete"}
+
+def detail(state: ClientState, ids: "SampleIds") -> tuple:
+    return f"/samples/{ids.pick(state.rng)}", {}
+
+def search(state: ClientState, ids: "SampleIds") -> tuple:
+    return "/samples/search/metadata", {"filter": state.rng.choice(SEARCH_FILTERS)(state.rng), "limit": 50}
+
+# name -> [(weight, request builder)]
+SCENARIOS = {
+    "browse": [(20, list_first), (15, list_next), (10, list_filtered), (40, detail), (15, search)],
+    "list": [(40, list_first), (40, list_next), (20, list_filtered)],
+    "detail": [(100, detail)],
+    "search": [(100, search)],
+}
+
+# Labels for reporting, matching the route templates of the /metrics histograms
+ROUTES = {list_first: "/samples/", list_next: "/samples/", list_filtered: "/samples/", detail: "/samples/{sample_id}", search: "/samples/search/metadata"}
+
+class SampleIds:
+    """Sample IDs with Zipf (s=1) popularity: the k-th ID is requested with weight 1/k."""
+
+    def __init__(self, sample_ids: list):
+        self.sample_ids = sample_ids
+        self.cum_weights = []
+        total = 0.0
+        for rank in range(1, len(sample_ids) + 1):
+            total += 1 / rank
+            self.cum_weights.append(total)
+
+    def pick(self, rng: random.Random) -> str:
+        return rng.choices(self.sample_ids, cum_weights=self.cum_weights)[0]
+
+def load_sample_ids(limit: int, seed: int) -> SampleIds:
+    db = SessionLocal()
+    try:
+        sample_ids = db.scalars(text("SELECT sample_id FROM samples ORDER BY sample_id LIMIT :limit"), {"limit": limit}).all()
+    finally:
+        db.close()
+    if not sample_ids:
+        sys.exit("No samples found; seed the database first or pass --runs N --reset-database")
+    # Which samples are popular is fixed by the seed, not by ID order
+    random.Random(seed).shuffle(sample_ids)
+    return SampleIds(sample_ids)
+
+@dataclass
+class RequestRecord:
+    at: float  # Seconds since the measured phase started, at completion
+    route: str
+    latency: float
+    error: str = None  # HTTP status or exception name
+
+@dataclass
+class PoolPoll:
+    at: float
+    latency: float
+    pool: dict
+
+@dataclass
+class Recording:
+    requests: list = field(default_factory=list)
+    polls: list = field(default_factory=list)
+
+async def _drive(client: httpx.AsyncClient, scenario: list, ids: SampleIds, clients: int, duration: float,
+                 seed: int, think_ms: float, recording: Recording):
+    started = time.monotonic()
+    deadline = started + duration
+    weights = [weight for weight, _ in scenario]
+    builders = [builder for _, builder in scenario]
+
+    async def run_client(n: int):
+        state = ClientState(random.Random(f"{seed}:{n}"))
+        while time.monotonic() < deadline:
+            builder = state.rng.choices(builders, weights)[0]
+            path, params = builder(state, ids)
+            error = None
+            request_started = time.perf_counter()
+            try:
+                response = await client.get(path, params=params)
+                if response.status_code >= 400:
+                    error = str(response.status_code)
+                elif ROUTES[builder] == "/samples/":
+                    state.cursor = response.headers.get(NEXT_CURSOR_HEADER)
+            except httpx.HTTPError as e:
+                error = type(e).__name__
+            latency = time.perf_counter() - request_started
+            recording.requests.append(RequestRecord(time.monotonic() - started, ROUTES[builder], latency, error))
+            if think_ms:
+                await asyncio.sleep(state.rng.expovariate(1000 / think_ms))
+
+    async def poll_pool():
+        while time.monotonic() < deadline:
+            poll_started = time.perf_counter()
+            try:
+                # 503 while saturated still carries the pool body
+                pool = (await client.get("/ready")).json()["pool"]
+            except (httpx.HTTPError, ValueError, KeyError):
+                pool = None
+            if pool is not None:
+                recording.polls.append(PoolPoll(time.monotonic() - started, time.perf_counter() - poll_started, pool))
+            await asyncio.sleep(0.5)
+
+    await asyncio.gather(poll_pool(), *(run_client(n) for n in range(clients)))
+
+async def run_load(base_url: str, scenario: list, ids: SampleIds, args) -> Recording:
+    limits = httpx.Limits(max_connections=args.clients + 1, max_keepalive_connections=args.clients + 1)
+    async with httpx.AsyncClient(base_url=base_url, headers={"X-API-Key": API_KEY}, limits=limits, timeout=args.timeout) as client:
+        if args.warmup:
+            await _drive(client, scenario, ids, args.clients, args.warmup, args.seed, args.think_ms, Recording())
+        recording = Recording()
+        await _drive(client, scenario, ids, args.clients, args.duration, args.seed, args.think_ms, recording)
+    return recording
+
+def percentile(values: list, q: float) -> float:
+    """Nearest-rank percentile of sorted values."""
+    return values[max(0, math.ceil(q * len(values)) - 1)] if values else 0.0
+
+def latency_summary(records: list, seconds: float) -> dict:
+    latencies = sorted(record.latency * 1000 for record in records)
+    errors = {}
+    for record in records:
+        if record.error:
+            errors[record.error] = errors.get(record.error, 0) + 1
+    return {
+        "requests": len(records),
+        "rps": round(len(records) / seconds, 1),
+        "p50_ms": round(percentile(latencies, 0.50), 1),
+        "p95_ms": round(percentile(latencies, 0.95), 1),
+        "p99_ms": round(percentile(latencies, 0.99), 1),
+        "errors": sum(errors.values()),
+        "error_rate": round(sum(errors.values()) / len(records), 4) if records else 0.0,
+        "errors_by_kind": errors,
+    }
+
+def pool_summary(polls: list, previous: PoolPoll = None) -> dict:
+    """Pool columns for one interval; checkout wait is the delta of the cumulative counters."""
+    if not polls:
+        return {}
+    first = previous or polls[0]
+    last = polls[-1]
+    checkouts = last.pool["checkouts"] - first.pool["checkouts"]
+    wait_ms = last.pool["checkout_wait_ms_total"] - first.pool["checkout_wait_ms_total"]
+    return {
+        "pool_checked_out_max": max(poll.pool["checked_out"] for poll in polls),
+        "pool_saturated_share": round(sum(poll.pool["saturated"] for poll in polls) / len(polls), 2),
+        "checkout_wait_ms_avg": round(wait_ms / checkouts, 2) if checkouts > 0 else 0.0,
+        "checkout_timeouts": last.pool["checkout_timeouts"] - first.pool["checkout_timeouts"],
+        "thread_wait_ms": round(statistics.median(poll.latency for poll in polls) * 1000, 1),
+    }
+
+def report(recording: Recording, duration: float, interval: float) -> dict:
+    routes = sorted({record.route for record in recording.requests})
+    summary = {route: latency_summary([r for r in recording.requests if r.route == route], duration) for route in routes}
+    summary["all"] = latency_summary(recording.requests, duration)
+
+    timeline, previous = [], None
+    for start in range(0, math.ceil(duration / interval)):
+        low, high = start * interval, min((start + 1) * interval, duration)
+        records = [r for r in recording.requests if low <= r.at < high]
+        polls = [p for p in recording.polls if low <= p.at < high]
+        row = {"t": high, **latency_summary(records, high - low), **pool_summary(polls, previous)}
+        del row["errors_by_kind"]
+        timeline.append(row)
+        previous = polls[-1] if polls else previous
+    pool = pool_summary(recording.polls) if recording.polls else {}
+    return {"summary": summary, "pool": pool, "timeline": timeline}
+
+def print_report(result: dict):
+    print(f"\n{'route':<28}{'requests':>9}{'req/s':>8}{'p50 ms':>9}{'p95 ms':>9}{'p99 ms':>9}{'errors':>8}")
+    for route, row in result["summary"].items():
+        print(f"{route:<28}{row['requests']:>9}{row['rps']:>8.1f}{row['p50_ms']:>9.1f}{row['p95_ms']:>9.1f}{row['p99_ms']:>9.1f}{row['errors']:>8}")
+    errors = result["summary"]["all"]["errors_by_kind"]
+    if errors:
+        print("errors: " + ", ".join(f"{kind} x{count}" for kind, count in sorted(errors.items())))
+
+    print(f"\n{'t s':>5}{'req/s':>8}{'p50 ms':>9}{'p95 ms':>9}{'p99 ms':>9}{'errors':>8}{'pool out':>10}{'saturated':>11}{'checkout ms':>13}{'thread wait ms':>16}")
+    for row in result["timeline"]:
+        print(
+            f"{row['t']:>5.0f}{row['rps']:>8.1f}{row['p50_ms']:>9.1f}{row['p95_ms']:>9.1f}{row['p99_ms']:>9.1f}{row['errors']:>8}"
+            f"{row.get('pool_checked_out_max', '-'):>10}{row.get('pool_saturated_share', '-'):>11}"
+            f"{row.get('checkout_wait_ms_avg', '-'):>13}{row.get('thread_wait_ms', '-'):>16}"
+        )
+
+def start_server(port: int, async_mode: bool, env_overrides: list) -> subprocess.Popen:
+    env = dict(os.environ, API_KEY=API_KEY, DB_ASYNC="true" if async_mode else "false")
+    for override in env_overrides:
+        key, _, value = override.partition("=")
+        env[key] = value
+    return subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "api.main:app", "--port", str(port), "--log-level", "warning"], env=env,
+    )
+
+def main():
+    parser = argparse.ArgumentParser(description="Drive the API with concurrent clients and report latency, errors and pool pressure.")
+    parser.add_argument("--scenario", choices=sorted(SCENARIOS), default="browse")
+    parser.add_argument("--clients", type=int, default=200, help="Concurrent closed-loop clients")
+    parser.add_argument("--duration", type=float, default=60.0, help="Measured seconds")
+    parser.add_argument("--warmup", type=float, default=10.0, help="Unmeasured seconds before the measurement")
+    parser.add_argument("--interval", type=float, default=5.0, help="Timeline resolution in seconds")
+    parser.add_argument("--think-ms", type=float, default=0.0, help="Mean (exponential) pause between a client's requests")
+    parser.add_argument("--timeout", type=float, default=30.0, help="Client-side request timeout in seconds")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--sample-ids", type=int, default=10000, help="Distinct sample IDs detail lookups draw from")
+    parser.add_argument("--runs", type=int, help="Load the fixed benchmark dataset of this many runs first")
+    parser.add_argument("--reset-database", action="store_true", help="Allow TRUNCATE + reload for --runs")
+    parser.add_argument("--url", help="Target a running API instead of booting one (e.g. http://127.0.0.1:8000)")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--async", dest="async_mode", action="store_true", help="Boot the API with DB_ASYNC=true")
+    parser.add_argument("--env", action="append", default=[], metavar="KEY=VALUE", help="Extra server environment, e.g. DB_POOL_SIZE=20")
+    parser.add_argument("--output", help="Also write the report, timeline included, as JSON")
+    args = parser.parse_args()
+
+    if args.runs:
+        from benchmarks.query_paths import ensure_dataset
+        ensure_dataset(args.runs, args.reset_database)
+    ids = load_sample_ids(args.sample_ids, args.seed)
+
+    server = None if args.url else start_server(args.port, args.async_mode, args.env)
+    base_url = args.url or f"http://127.0.0.1:{args.port}"
+    try:
+        asyncio.run(_wait_until_up(base_url))
+        recording = asyncio.run(run_load(base_url, SCENARIOS[args.scenario], ids, args))
+    finally:
+        if server:
+            server.terminate()
+            server.wait()
+
+    result = report(recording, args.duration, args.interval)
+    result["config"] = {key: value for key, value in vars(args).items() if key not in ("output", "reset_database")}
+    if recording.polls:
+        pool = recording.polls[-1].pool
+        result["config"]["pool"] = f"{pool['pool_size']}+{pool['max_overflow']}"
+    print(f"Scenario {args.scenario}: {args.clients} clients, {args.duration:.0f}s measured after {args.warmup:.0f}s warm-up, pool {result['config'].get('pool', '?')}")
+    print_report(result)
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(result, f, indent=2)
+
+if __name__ == "__main__":
+    main()
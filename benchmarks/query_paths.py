@@ -0,0 +1,225 @@
+"""
+Query-path regression suite for the sample endpoints, against recorded baselines.
+
+For each dataset size (runs), the database is loaded with a fixed synthetic dataset
+(etl.jobs.generate_dataset, fixed seed), then every case below is requested in-process through
+the real app: end-to-end latency, SQL time and statement count (from the Server-Timing header
+of api.metrics), and the EXPLAIN plan shape of every statement the request ran.
+
+Results are compared with benchmarks/baselines/query_paths.json. The run fails (exit 1) when a
+best-of-N latency regresses by more than --threshold (and --min-delta-ms), a case runs more
+SQL statements than before, or a plan shape changes (e.g. an index scan turning into a seq
+scan). The gate uses the fastest iteration rather than the median: on a shared host the median
+drifts by a third between identical runs, while a slower code path slows every iteration.
+
+Loading a dataset TRUNCATEs every pipeline table, so it is only done with --reset-database;
+point DB_NAME at a dedicated, migrated database. A database already holding the requested
+dataset is reused as is.
+
+Usage:
+    python -m benchmarks.query_paths --sizes 10000 100000 --reset-database           # compare
+    python -m benchmarks.query_paths --sizes 10000 100000 --reset-database --record  # new baselines
+"""
+import argparse
+import gc
+import json
+import os
+import platform
+import statistics
+import sys
+import time
+from pathlib import Path
+
+os.environ.setdefault("API_KEY", "benchmark_api_key")
+
+from fastapi.testclient import TestClient
+from sqlalchemy import event, text
+
+from api.main import create_app
+from api.pagination import NEXT_CURSOR_HEADER
+from core.database import SessionLocal, init_database
+from core.slow_queries import plan_shape
+
+BASELINES = Path(__file__).parent / "baselines" / "query_paths.json"
+DATASET_PREFIX = "BENCH"
+DATASET_SEED = 7
+PIPELINE_TABLES = "patients, samples, runs, file_locations, pipeline_results, api_endpoints, run_profiles"
+
+def ensure_dataset(runs: int, reset: bool):
+    db = SessionLocal()
+    try:
+        total = db.scalar(text("SELECT count(*) FROM runs"))
+        ours = db.scalar(text("SELECT count(*) FROM runs WHERE run_id LIKE :prefix"), {"prefix": f"{DATASET_PREFIX}-RUN-%"})
+        if total == ours == runs:
+            return
+        if not reset:
+            sys.exit(f"The database holds {total} runs, not the {runs}-run benchmark dataset. Rerun with --reset-database against a dedicated database.")
+        superuser = db.scalar(text("SELECT rolsuper FROM pg_roles WHERE rolname = current_user"))
+        db.execute(text(f"TRUNCATE {PIPELINE_TABLES} RESTART IDENTITY"))
+        db.commit()
+    finally:
+        db.close()
+
+    # Imported here so comparing against an existing dataset needs no encryption keys
+    from etl.jobs.generate_dataset import DatasetSpec, generate_dataset
+    print(f"Loading the {runs}-run dataset...", file=sys.stderr)
+    stats = generate_dataset(DatasetSpec(runs=runs, seed=DATASET_SEED, prefix=DATASET_PREFIX), disable_triggers=superuser)
+    print(f"Loaded in {stats.seconds:.0f}s", file=sys.stderr)
+
+    with init_database().engine.connect() as conn:
+        # Plans depend on fresh statistics and on the visibility map that index-only scans are
+        # costed on; without the VACUUM they flip with whenever autovacuum happens to get there.
+        # Roles that do not own the tables get a warning instead.
+        conn.execution_options(isolation_level="AUTOCOMMIT").execute(text(f"VACUUM (ANALYZE) {PIPELINE_TABLES}"))
+
+def build_cases(client: TestClient) -> dict:
+    """name -> (path, params). Sample IDs come from the deterministic dataset."""
+    db = SessionLocal()
+    try:
+        heaviest = db.scalar(text("SELECT sample_id FROM runs GROUP BY sample_id ORDER BY count(*) DESC, sample_id LIMIT 1"))
+    finally:
+        db.close()
+    cursor = client.get("/samples/", params={"limit": 50}).headers[NEXT_CURSOR_HEADER]
+    return {
+        "list_samples": ("/samples/", {"limit": 50}),
+        "list_samples_offset": ("/samples/", {"skip": 1000, "limit": 50}),
+        "list_samples_cursor": ("/samples/", {"limit": 50, "cursor": cursor}),
+        "list_samples_assay": ("/samples/", {"limit": 50, "assay_type": "ONT_WGS"}),
+        "list_samples_promoted": ("/samples/", {"limit": 50, "sequencer": "GridION", "qc_passed": "true", "status": "complete"}),
+        "get_single_sample": (f"/samples/{DATASET_PREFIX}-SMPL-000000000", {}),
+        "get_single_sample_heaviest": (f"/samples/{heaviest}", {}),
+        "search_promoted_eq": ("/samples/search/metadata", {"filter": "sequencer:eq:GridION"}),
+        "search_jsonb_eq": ("/samples/search/metadata", {"filter": "flowcell:eq:FAX00042"}),
+        "search_jsonb_exists": ("/samples/search/metadata", {"filter": "attr_3:exists"}),
+    }
+
+def capture_plans(client: TestClient, path: str, params: dict) -> list:
+    engine = init_database().engine
+    statements = []
+
+    def capture(conn, cursor, statement, parameters, context, executemany):
+        statements.append((statement, parameters))
+
+    event.listen(engine, "before_cursor_execute", capture)
+    try:
+        client.get(path, params=params)
+    finally:
+        event.remove(engine, "before_cursor_execute", capture)
+
+    shapes = []
+    with engine.connect() as conn:
+        for statement, parameters in statements:
+            [[plan]] = conn.exec_driver_sql(f"EXPLAIN (FORMAT JSON) {statement}", parameters).all()
+            shapes.append(plan_shape(plan[0]["Plan"]))
+    # selectinload issues its per-relationship statements in no fixed order
+    return sorted(shapes)
+
+def _server_timing(header: str) -> tuple:
+    # db;dur=1.23;desc="3 queries, 50 rows", total;dur=4.56
+    db_part = header.split(",")[0]
+    db_ms = float(db_part.split("dur=")[1].split(";")[0])
+    queries = int(db_part.split('desc="')[1].split(" ")[0])
+    return db_ms, queries
+
+def measure(client: TestClient, cases: dict, iterations: int, warmup: int) -> dict:
+    """
+    Times every case round-robin, one request per case per round, so a slow stretch on the
+    host costs each case one iteration instead of one case all of them.
+    """
+    for path, params in cases.values():
+        for _ in range(warmup):
+            client.get(path, params=params)
+    samples = {name: ([], []) for name in cases}
+    queries = {}
+    for _ in range(iterations):
+        for name, (path, params) in cases.items():
+            # Collect outside the timed window: a cyclic-GC pause landing in one request is noise
+            gc.collect()
+            started = time.perf_counter()
+            response = client.get(path, params=params)
+            elapsed = (time.perf_counter() - started) * 1000
+            response.raise_for_status()
+            db_ms, queries[name] = _server_timing(response.headers["Server-Timing"])
+            samples[name][0].append(elapsed)
+            samples[name][1].append(db_ms)
+
+    results = {}
+    for name, (latencies, db_times) in samples.items():
+        latencies.sort()
+        results[name] = {
+            "best_ms": round(latencies[0], 2),
+            "median_ms": round(statistics.median(latencies), 2),
+            "p95_ms": round(latencies[int(0.95 * (len(latencies) - 1))], 2),
+            "db_ms": round(statistics.median(db_times), 2),
+            "queries": queries[name],
+        }
+    return results
+
+def compare(baseline: dict, result: dict, threshold: float, min_delta_ms: float, check_plans: bool = True) -> list:
+    """Regression messages for one case; empty when it is within budget."""
+    problems = []
+    budget = baseline["best_ms"] * (1 + threshold)
+    if result["best_ms"] > budget and result["best_ms"] - baseline["best_ms"] > min_delta_ms:
+        problems.append(f"best {result['best_ms']:.2f} ms vs baseline {baseline['best_ms']:.2f} ms (+{threshold:.0%} budget)")
+    if result["queries"] > baseline["queries"]:
+        problems.append(f"{result['queries']} SQL statements vs baseline {baseline['queries']}")
+    if check_plans and result["plans"] != baseline["plans"]:
+        changed = [f"{old} -> {new}" for old, new in zip(baseline["plans"], result["plans"]) if old != new]
+        problems.append("plan changed: " + ("; ".join(changed) or f"{len(baseline['plans'])} -> {len(result['plans'])} statements"))
+    return problems
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the sample query paths against recorded baselines.")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10000, 100000], help="Dataset sizes in runs (e.g. 10000 100000 1000000)")
+    parser.add_argument("--iterations", type=int, default=20)
+    parser.add_argument("--warmup", type=int, default=3)
+    parser.add_argument("--threshold", type=float, default=0.25, help="Allowed relative slowdown of the best iteration")
+    parser.add_argument("--min-delta-ms", type=float, default=1.0, help="Slowdowns smaller than this never count")
+    parser.add_argument("--ignore-plans", action="store_true", help="Report plan changes without failing on them")
+    parser.add_argument("--record", action="store_true", help="Write the results as the new baselines")
+    parser.add_argument("--reset-database", action="store_true", help="Allow TRUNCATE + reload when the dataset differs")
+    args = parser.parse_args()
+
+    baselines = json.loads(BASELINES.read_text()) if BASELINES.exists() else {"results": {}}
+    results, failures = {}, 0
+
+    for size in args.sizes:
+        ensure_dataset(size, args.reset_database)
+        with TestClient(create_app(), headers={"X-API-Key": os.environ["API_KEY"]}) as client:
+            cases = build_cases(client)
+            print(f"\n{size} runs")
+            print(f"{'case':<28}{'best ms':>9}{'median ms':>10}{'p95 ms':>9}{'db ms':>8}{'queries':>8}{'baseline':>10}  verdict")
+            measured = measure(client, cases, args.iterations, args.warmup)
+            for name, (path, params) in cases.items():
+                result = measured[name]
+                result["plans"] = capture_plans(client, path, params)
+                results.setdefault(str(size), {})[name] = result
+
+                baseline = baselines["results"].get(str(size), {}).get(name)
+                problems = compare(baseline, result, args.threshold, args.min_delta_ms, not args.ignore_plans) if baseline else []
+                if args.ignore_plans and baseline and result["plans"] != baseline["plans"]:
+                    print(f"  note: {name} plan changed: {result['plans']}")
+                verdict = "new" if baseline is None else ("REGRESSION: " + "; ".join(problems) if problems else "ok")
+                failures += bool(problems)
+                base_ms = f"{baseline['best_ms']:.2f}" if baseline else "-"
+                print(
+                    f"{name:<28}{result['best_ms']:>9.2f}{result['median_ms']:>10.2f}{result['p95_ms']:>9.2f}{result['db_ms']:>8.2f}"
+                    f"{result['queries']:>8}{base_ms:>10}  {verdict}"
+                )
+
+    if args.record:
+        baselines["results"].update(results)
+        db = SessionLocal()
+        try:
+            server_version = db.scalar(text("SHOW server_version"))
+        finally:
+            db.close()
+        baselines["host"] = {"cpus": os.cpu_count(), "python": platform.python_version(), "postgres": server_version}
+        BASELINES.parent.mkdir(exist_ok=True)
+        BASELINES.write_text(json.dumps(baselines, indent=2, sort_keys=True) + "\n")
+        print(f"\nRecorded baselines for {', '.join(map(str, args.sizes))} runs in {BASELINES}")
+    elif failures:
+        sys.exit(f"\n{failures} case(s) regressed")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,95 @@
+"""
+Latency of the ORM + Pydantic path vs. the SQL-side JSON assembly path for get_single_sample.
+
+Seeds one sample per size bucket inside a transaction that is rolled back afterwards, so it
+needs write credentials (e.g. DB_USER=etl_worker).
+
+Usage:
+    python -m benchmarks.sample_json --runs 1 10 100 500 --iterations 30
+"""
+import argparse
+import json
+import statistics
+import time
+
+from sqlalchemy import select, text
+from sqlalchemy.orm import selectinload
+
+from core.database import engine, SessionLocal
+from api.models import FrontendSample, FrontendRun
+from api.schemas import SampleResponse
+from api.sql_json import fetch_sample_document
+
+SEED_SQL = text("""
+    INSERT INTO patients (patient_id) VALUES ('PAT-BENCH-' || :n) ON CONFLICT DO NOTHING;
+    INSERT INTO samples (sample_id, patient_id) VALUES ('SAMP-BENCH-' || :n, 'PAT-BENCH-' || :n);
+    INSERT INTO runs (run_id, sample_id, assay_type, metadata)
+    SELECT 'RUN-BENCH-' || :n || '-' || g, 'SAMP-BENCH-' || :n, 'ONT_WGS',
+           jsonb_build_object('sequencer', 'PromethION 24', 'qc_passed', true, 'flowcell', 'FAX' || g)
+    FROM generate_series(1, :n) g;
+    INSERT INTO file_locations (run_id, file_type, s3_uri)
+    SELECT r.run_id, t.file_type, 's3://bench/' || r.run_id || '/' || t.file_type
+    FROM runs r CROSS JOIN (VALUES ('FASTQ_ONT'), ('REFERENCE')) t(file_type)
+    WHERE r.sample_id = 'SAMP-BENCH-' || :n;
+    INSERT INTO pipeline_results (run_id, pipeline_version, metrics)
+    SELECT r.run_id, 'v1.2.' || v, jsonb_build_object('mean_coverage', 30 + v, 'reads', 1000000 * v, 'qc', jsonb_build_object('n50', 12000, 'pass', true))
+    FROM runs r CROSS JOIN generate_series(1, 2) v
+    WHERE r.sample_id = 'SAMP-BENCH-' || :n;
+    INSERT INTO api_endpoints (run_id, service_name, endpoint_url)
+    SELECT r.run_id, 'lims', 'https://lims.example/runs/' || r.run_id
+    FROM runs r WHERE r.sample_id = 'SAMP-BENCH-' || :n;
+""")
+
+def orm_path(session, sample_id: str) -> bytes:
+    stmt = (
+        select(FrontendSample)
+        .where(FrontendSample.sample_id == sample_id)
+        .options(
+            selectinload(FrontendSample.runs).selectinload(FrontendRun.files),
+            selectinload(FrontendSample.runs).selectinload(FrontendRun.results),
+            selectinload(FrontendSample.runs).selectinload(FrontendRun.endpoints)
+        )
+    )
+    sample = session.execute(stmt).scalar_one()
+    # Mirrors FastAPI's response_model serialization followed by its JSONResponse encoding
+    payload = SampleResponse.model_validate(sample).model_dump(mode="json")
+    return json.dumps(payload, ensure_ascii=False, separators=(",", ":")).encode()
+
+def sql_path(session, sample_id: str) -> bytes:
+    return fetch_sample_document(session, sample_id)
+
+def time_path(fn, session, sample_id: str, iterations: int) -> float:
+    timings = []
+    for _ in range(iterations):
+        # Start every iteration with an empty identity map, as a fresh request would
+        session.expunge_all()
+        started = time.perf_counter()
+        fn(session, sample_id)
+        timings.append(time.perf_counter() - started)
+    return statistics.median(timings) * 1000
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark ORM vs. SQL-side JSON assembly for one sample tree.")
+    parser.add_argument("--runs", type=int, nargs="+", default=[1, 10, 100, 500], help="Runs per benchmarked sample")
+    parser.add_argument("--iterations", type=int, default=30)
+    args = parser.parse_args()
+
+    connection = engine.connect()
+    transaction = connection.begin()
+    session = SessionLocal(bind=connection)
+    try:
+        print(f"{'runs':>6}{'orm ms':>10}{'sql ms':>10}{'speedup':>9}{'kB':>8}")
+        for n in args.runs:
+            session.execute(SEED_SQL, {"n": n})
+            sample_id = f"SAMP-BENCH-{n}"
+            orm_ms = time_path(orm_path, session, sample_id, args.iterations)
+            sql_ms = time_path(sql_path, session, sample_id, args.iterations)
+            size_kb = len(sql_path(session, sample_id)) / 1024
+            print(f"{n:>6}{orm_ms:>10.2f}{sql_ms:>10.2f}{orm_ms / sql_ms:>8.1f}x{size_kb:>8.0f}")
+    finally:
+        session.close()
+        transaction.rollback()
+        connection.close()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,77 @@
+"""
+Micro-benchmark of the response_model encoding vs. the opt-in orjson serializer for
+list_samples-sized payloads. Runs on in-memory ORM objects, so no database is needed.
+
+Usage:
+    python -m benchmarks.serialization --samples 50 --runs 1 5 20 --iterations 50
+"""
+import argparse
+import statistics
+import time
+from datetime import datetime, timedelta, timezone
+
+from api.expansion import Expansion, EXPANDABLE
+from api.models import FrontendSample, FrontendRun, FileLocation, PipelineResult, ApiEndpoint
+from api.serialization import encode_samples, encode_validated
+
+def build_page(samples: int, runs: int) -> list:
+    """Transient sample trees shaped like the seeded data, with realistically sized JSONB."""
+    now = datetime(2026, 10, 17, 12, 0, 0, 123456, tzinfo=timezone.utc)
+    page = []
+    for s in range(samples):
+        sample = FrontendSample(sample_id=f"SAMP-{s:05d}", patient_hash=f"{s:032x}", created_at=now, updated_at=now)
+        for r in range(runs):
+            run_id = f"RUN-{s:05d}-{r:03d}"
+            run = FrontendRun(
+                run_id=run_id, sample_id=sample.sample_id, assay_type="ONT_WGS", created_at=now, updated_at=now + timedelta(seconds=r),
+                metadata_col={
+                    "sequencer": "PromethION 24", "qc_passed": True, "flowcell": f"FAX{r:05d}",
+                    "kit": "SQK-LSK114", "basecaller": {"model": "dna_r10.4.1_e8.2_400bps_sup@v4.3.0", "version": "7.4.12"},
+                    "lanes": list(range(8)),
+                },
+            )
+            run.files = [
+                FileLocation(id=r * 2 + i, file_type=file_type, s3_uri=f"s3://bucket/{run_id}/{file_type.lower()}.gz", created_at=now)
+                for i, file_type in enumerate(["FASTQ_ONT", "REFERENCE"])
+            ]
+            run.results = [
+                PipelineResult(
+                    id=r * 2 + v, clinical_report_json_uri=f"s3://reports/{run_id}.json", pipeline_version=f"v1.2.{v}", run_date=now,
+                    metrics={"mean_coverage": 31.5 + v, "reads": 1200000 * (v + 1), "n50": 12034, "pct_q20": 0.9731,
+                             "per_chrom_coverage": {f"chr{c}": 30.0 + c / 10 for c in range(1, 23)}},
+                )
+                for v in range(2)
+            ]
+            run.endpoints = [ApiEndpoint(id=r, service_name="lims", endpoint_url=f"https://lims.example/runs/{run_id}", method="POST", created_at=now)]
+            sample.runs.append(run)
+        page.append(sample)
+    return page
+
+def time_encoder(encode, page: list, spec: dict, iterations: int) -> float:
+    timings = []
+    for _ in range(iterations):
+        started = time.perf_counter()
+        encode(page, spec)
+        timings.append(time.perf_counter() - started)
+    return statistics.median(timings) * 1000
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark response_model vs. orjson encoding of sample pages.")
+    parser.add_argument("--samples", type=int, default=50, help="Samples per page (list_samples default limit)")
+    parser.add_argument("--runs", type=int, nargs="+", default=[1, 5, 20], help="Runs per sample")
+    parser.add_argument("--iterations", type=int, default=50)
+    args = parser.parse_args()
+
+    spec = Expansion(frozenset(EXPANDABLE)).serialization_include()
+    print(f"{'runs':>6}{'pydantic ms':>13}{'orjson ms':>11}{'speedup':>9}{'kB':>8}")
+    for runs in args.runs:
+        page = build_page(args.samples, runs)
+        reference = encode_validated(page, spec)
+        assert encode_samples(page, spec) == reference, "fast serializer output diverged from the response_model"
+
+        validated_ms = time_encoder(encode_validated, page, spec, args.iterations)
+        fast_ms = time_encoder(encode_samples, page, spec, args.iterations)
+        print(f"{runs:>6}{validated_ms:>13.2f}{fast_ms:>11.2f}{validated_ms / fast_ms:>8.1f}x{len(reference) / 1024:>8.0f}")
+
+if __name__ == "__main__":
+    main()
@@ -1,9 +1,15 @@
 import os
-from sqlalchemy import create_engine
+import sys
+import threading
+from sqlalchemy import create_engine, text
 from sqlalchemy.orm import sessionmaker
 from dotenv import load_dotenv
 load_dotenv()
 
+from core.pool import TimedAsyncQueuePool, TimedQueuePool, pool_options
+from core.replicas import DB_REPLICA_HOSTS, ReplicaSet, RoutingSession
+from core.slow_queries import slow_query_log
+
 # We remove the hardcoded fallbacks to prevent privilege escalation.
 # The process running this (API or ETL) MUST provide its specific role in the environment.
 DB_HOST = os.environ.get("DB_HOST", "localhost")
@@ -12,18 +18,165 @@ DB_NAME = os.environ.get("DB_NAME", "pipeline_db")
 DB_USER = os.environ.get("DB_USER")
 DB_PASSWORD = os.environ.get("DB_PASSWORD")
 
-if not DB_USER or not DB_PASSWORD:
-    raise ValueError("CRITICAL: DB_USER and DB_PASSWORD must be set in the environment.")
+# Opt-in asyncpg engine for the API. ETL jobs and pipeline scripts always stay on the sync engine.
+DB_ASYNC = os.environ.get("DB_ASYNC", "false").lower() in ("1", "true", "yes")
+
+def _url(driver: str, host: str, port: str) -> str:
+    return f"postgresql+{driver}://{DB_USER}:{DB_PASSWORD}@{host}:{port}/{DB_NAME}"
+
+def _replica_addresses():
+    for address in DB_REPLICA_HOSTS:
+        host, _, port = address.partition(":")
+        yield host, port or DB_PORT
+
+class _Database:
+    """
+    Every engine and session factory of the process. Built on first use rather than at
+    import, so importing this module (test collection, pipeline scripts, a preforking
+    server's master) neither needs credentials nor opens sockets; each worker process
+    builds its own after the fork.
+    """
+
+    def __init__(self):
+        if not DB_USER or not DB_PASSWORD:
+            raise ValueError("CRITICAL: DB_USER and DB_PASSWORD must be set in the environment.")
+
+        self.DATABASE_URL = _url("psycopg2", DB_HOST, DB_PORT)
+        self.ASYNC_DATABASE_URL = _url("asyncpg", DB_HOST, DB_PORT)
+        self.REPLICA_URLS = [_url("psycopg2", host, port) for host, port in _replica_addresses()]
+        self.ASYNC_REPLICA_URLS = [_url("asyncpg", host, port) for host, port in _replica_addresses()]
+
+        # The primary: ETL jobs and pipeline scripts use SessionLocal and always write here
+        self.engine = create_engine(self.DATABASE_URL, **pool_options(TimedQueuePool))
+        self.SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=self.engine)
+
+        # Optional read replicas for the API's sessions. pool_pre_ping turns a dead replica's stale
+        # connections into connect errors, which eject it from the rotation.
+        self.replica_set = None
+        self.ReadSessionLocal = None
+        if self.REPLICA_URLS:
+            self.replica_set = ReplicaSet([
+                create_engine(url, pool_pre_ping=True, **pool_options(TimedQueuePool)) for url in self.REPLICA_URLS
+            ])
+            self.ReadSessionLocal = sessionmaker(
+                class_=RoutingSession, primary=self.engine, replicas=self.replica_set, autocommit=False, autoflush=False,
+            )
+
+        self.async_engine = None
+        self.AsyncSessionLocal = None
+        self.async_replica_set = None
+        if DB_ASYNC:
+            # Imported lazily so asyncpg is only required by deployments that enable it
+            from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker
+            self.async_engine = create_async_engine(self.ASYNC_DATABASE_URL, **pool_options(TimedAsyncQueuePool))
+            self.AsyncSessionLocal = async_sessionmaker(self.async_engine, autoflush=False, expire_on_commit=False)
+            if self.ASYNC_REPLICA_URLS:
+                # RoutingSession drives the AsyncSession's sync session, so it routes between sync_engines
+                self.async_replica_set = ReplicaSet([
+                    create_async_engine(url, pool_pre_ping=True, **pool_options(TimedAsyncQueuePool)).sync_engine
+                    for url in self.ASYNC_REPLICA_URLS
+                ])
+                self.AsyncSessionLocal = async_sessionmaker(
+                    sync_session_class=RoutingSession, primary=self.async_engine.sync_engine, replicas=self.async_replica_set,
+                    autoflush=False, expire_on_commit=False,
+                )
+
+        # Slow-query capture (SLOW_QUERY_MS) on every engine the process talks through
+        if slow_query_log.enabled:
+            for engine in self.engines():
+                slow_query_log.install(engine)
+
+    def engines(self) -> list:
+        """Every sync Engine of the process; the asyncpg engines by their sync facade."""
+        engines = [self.engine, *(self.replica_set.engines if self.replica_set else [])]
+        if self.async_engine is not None:
+            engines.append(self.async_engine.sync_engine)
+            engines.extend(self.async_replica_set.engines if self.async_replica_set else [])
+        return engines
+
+_database = None
+_database_lock = threading.Lock()
+
+def init_database() -> _Database:
+    """Builds the engines once per process; later calls return the same instance."""
+    global _database
+    if _database is None:
+        with _database_lock:
+            if _database is None:
+                _database = _Database()
+    return _database
+
+def is_initialized() -> bool:
+    return _database is not None
 
-DATABASE_URL = f"postgresql+psycopg2://{DB_USER}:{DB_PASSWORD}@{DB_HOST}:{DB_PORT}/{DB_NAME}"
+# Module attributes resolved on first access, e.g. `from core.database import engine`
+_LAZY_ATTRIBUTES = {
+    "DATABASE_URL", "ASYNC_DATABASE_URL", "REPLICA_URLS", "ASYNC_REPLICA_URLS",
+    "engine", "replica_set", "ReadSessionLocal",
+    "async_engine", "AsyncSessionLocal", "async_replica_set",
+}
 
-engine = create_engine(DATABASE_URL)
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+def __getattr__(name):
+    if name in _LAZY_ATTRIBUTES:
+        return getattr(init_database(), name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+# Attribute lookups (unlike bare global names) honour both __getattr__ and test patches
+_module = sys.modules[__name__]
+
+class _LazySessionmaker:
+    """Stands in for the primary sessionmaker so `from core.database import SessionLocal` stays free."""
+
+    def __call__(self, **kw):
+        return init_database().SessionLocal(**kw)
+
+SessionLocal = _LazySessionmaker()
+
+def warm_up(connections: int) -> None:
+    """Opens `connections` pooled connections at once and returns them to the pool warm."""
+    engine = init_database().engine
+    opened = []
+    try:
+        for _ in range(connections):
+            conn = engine.connect()
+            opened.append(conn)
+            conn.execute(text("SELECT 1"))
+    finally:
+        for conn in opened:
+            conn.close()
+
+async def warm_up_async(connections: int) -> None:
+    """warm_up() for the asyncpg engine."""
+    import asyncio
+    engine = init_database().async_engine
+
+    async def ping(conn):
+        await conn.execute(text("SELECT 1"))
+
+    opened = []
+    try:
+        for _ in range(connections):
+            opened.append(await engine.connect())
+        await asyncio.gather(*(ping(conn) for conn in opened))
+    finally:
+        for conn in opened:
+            await conn.close()
 
 def get_db():
-    """Unified session generator for safe transactions."""
-    db = SessionLocal()
+    """
+    Unified session generator for safe transactions. The API's dependency: with
+    DB_REPLICA_HOSTS set, reads are routed to the replicas. Loaded objects survive a commit,
+    as with AsyncSessionLocal, since api.dependencies.run_query commits after every query.
+    """
+    db = (_module.ReadSessionLocal or _module.SessionLocal)(expire_on_commit=False)
     try:
         yield db
     finally:
         db.close()
+
+async def get_async_db():
+    """Async session generator; only usable when DB_ASYNC is enabled."""
+    if _module.AsyncSessionLocal is None:
+        raise RuntimeError("The async engine is disabled. Set DB_ASYNC=true to enable it.")
+    async with _module.AsyncSessionLocal() as db:
+        yield db
@@ -0,0 +1,56 @@
+"""
+Registry of run metadata keys promoted to stored generated columns on `runs`.
+
+Promoting a key is a three-step change: add it to PROMOTED_METADATA_KEYS, declare the
+matching Computed column on PromotedMetadataMixin (core/models.py), and write an Alembic
+revision that calls promote_metadata_key() and recreates the frontend_runs view with
+frontend_runs_view_sql(). The JSONB document stays the source of truth; Postgres keeps
+the columns in sync on every write, so ETL code never sets them.
+"""
+from typing import Dict, Iterable
+
+# key -> Postgres type of its generated column
+PROMOTED_METADATA_KEYS: Dict[str, str] = {
+    "sequencer": "text",
+    "qc_passed": "boolean",
+    "status": "text",
+}
+
+# frontend_runs columns as defined before any key was promoted
+FRONTEND_RUNS_BASE_COLUMNS = ["run_id", "sample_id", "assay_type", "metadata", "created_at", "updated_at"]
+
+def generated_expression(key: str, sql_type: str) -> str:
+    """
+    The generation expression for a promoted key. Values of the wrong JSON type become
+    NULL rather than failing the write that stored them.
+    """
+    if sql_type == "text":
+        return f"(metadata ->> '{key}')"
+    if sql_type == "boolean":
+        return f"(CASE WHEN jsonb_typeof(metadata -> '{key}') = 'boolean' THEN (metadata -> '{key}')::boolean END)"
+    raise ValueError(f"Unsupported promoted metadata type '{sql_type}' for key '{key}'")
+
+def promote_metadata_key(op, key: str, sql_type: str) -> None:
+    """Adds the generated column for a key to runs, plus its btree index. Rewrites runs."""
+    op.execute(
+        f"ALTER TABLE runs ADD COLUMN {key} {sql_type} "
+        f"GENERATED ALWAYS AS {generated_expression(key, sql_type)} STORED;"
+    )
+    op.execute(f"CREATE INDEX idx_runs_{key} ON runs ({key});")
+
+def demote_metadata_key(op, key: str) -> None:
+    """Drops a promoted column (and with it, its index). The JSONB value is untouched."""
+    op.execute(f"ALTER TABLE runs DROP COLUMN IF EXISTS {key};")
+
+def frontend_runs_view_sql(promoted: Iterable[str]) -> str:
+    """
+    CREATE OR REPLACE for frontend_runs exposing the promoted columns. They are appended
+    after the base columns, which is the only change OR REPLACE allows on a view.
+    """
+    columns = ",\n            ".join([*FRONTEND_RUNS_BASE_COLUMNS, *promoted])
+    return f"""
+        CREATE OR REPLACE VIEW public.frontend_runs AS
+        SELECT
+            {columns}
+        FROM public.runs;
+    """
@@ -1,8 +1,9 @@
 from datetime import datetime
-from typing import Optional
-from sqlalchemy import String, ForeignKey, Text
+from typing import List, Optional
+from sqlalchemy import Boolean, Computed, String, ForeignKey, Text, REAL
 from sqlalchemy.orm import Mapped, mapped_column, declared_attr
-from sqlalchemy.dialects.postgresql import JSONB
+from sqlalchemy.dialects.postgresql import ARRAY, JSONB
+from core.metadata_columns import PROMOTED_METADATA_KEYS, generated_expression
 
 class FileLocationMixin:
     @declared_attr
@@ -38,3 +39,24 @@ class ApiEndpointMixin:
     endpoint_url: Mapped[str] = mapped_column(Text, nullable=False)
     method: Mapped[str] = mapped_column(String(10), default="GET")
     created_at: Mapped[datetime]
+
+class RunProfileMixin:
+    @declared_attr
+    def __tablename__(cls):
+        return "run_profiles"
+        
+    # Chart series for a run, kept out of runs.metadata so list/search reads stay small
+    run_id: Mapped[str] = mapped_column(ForeignKey("runs.run_id", ondelete="CASCADE"), primary_key=True)
+    coverage_profile: Mapped[Optional[List[float]]] = mapped_column(ARRAY(REAL))
+    quality_profile: Mapped[Optional[List[float]]] = mapped_column(ARRAY(REAL))
+    updated_at: Mapped[Optional[datetime]] = mapped_column(nullable=True)
+
+def _promoted(key: str, column_type):
+    return mapped_column(column_type, Computed(generated_expression(key, PROMOTED_METADATA_KEYS[key]), persisted=True))
+
+class PromotedMetadataMixin:
+    # Read-only copies of hot runs.metadata keys, generated and btree-indexed by Postgres
+    # (see core/metadata_columns.py). Filter on these instead of JSONB containment.
+    sequencer: Mapped[Optional[str]] = _promoted("sequencer", Text)
+    qc_passed: Mapped[Optional[bool]] = _promoted("qc_passed", Boolean)
+    status: Mapped[Optional[str]] = _promoted("status", Text)
@@ -0,0 +1,90 @@
+import os
+import threading
+import time
+
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+from sqlalchemy.pool import AsyncAdaptedQueuePool, QueuePool
+
+# Connection pool sizing, tunable per deployment. Defaults are SQLAlchemy's own.
+DB_POOL_SIZE = int(os.environ.get("DB_POOL_SIZE", "5"))
+DB_MAX_OVERFLOW = int(os.environ.get("DB_MAX_OVERFLOW", "10"))
+DB_POOL_TIMEOUT = float(os.environ.get("DB_POOL_TIMEOUT", "30"))
+# Seconds before a pooled connection is replaced; -1 keeps connections indefinitely
+DB_POOL_RECYCLE = int(os.environ.get("DB_POOL_RECYCLE", "-1"))
+
+class CheckoutTimer:
+    """
+    Accumulates how long callers waited to obtain a pooled connection. The time includes
+    opening a new connection when the pool has to grow, and a full pool_timeout when none
+    frees up in time.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.checkouts = 0
+        self.timeouts = 0
+        self.wait_seconds_total = 0.0
+        self.wait_seconds_max = 0.0
+
+    def record(self, seconds: float, timed_out: bool) -> None:
+        with self._lock:
+            self.checkouts += 1
+            self.timeouts += timed_out
+            self.wait_seconds_total += seconds
+            self.wait_seconds_max = max(self.wait_seconds_max, seconds)
+
+class _TimedCheckout:
+    # QueuePool._do_get is where a checkout blocks on the queue (or connects to grow the pool)
+    def _do_get(self):
+        started = time.perf_counter()
+        timed_out = False
+        try:
+            return super()._do_get()
+        except PoolTimeoutError:
+            timed_out = True
+            raise
+        finally:
+            self.checkout_timer.record(time.perf_counter() - started, timed_out)
+
+class TimedQueuePool(_TimedCheckout, QueuePool):
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.checkout_timer = CheckoutTimer()
+
+class TimedAsyncQueuePool(_TimedCheckout, AsyncAdaptedQueuePool):
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.checkout_timer = CheckoutTimer()
+
+def pool_options(poolclass) -> dict:
+    """create_engine()/create_async_engine() keyword arguments for the configured pool."""
+    return {
+        "poolclass": poolclass,
+        "pool_size": DB_POOL_SIZE,
+        "max_overflow": DB_MAX_OVERFLOW,
+        "pool_timeout": DB_POOL_TIMEOUT,
+        "pool_recycle": DB_POOL_RECYCLE,
+    }
+
+def pool_status(pool) -> dict:
+    """
+    Snapshot of a timed pool. `saturated` means every connection the pool may open is
+    checked out, so the next checkout has to wait for one to be returned (never the case
+    with an unbounded max_overflow of -1).
+    """
+    timer = pool.checkout_timer
+    checked_out = pool.checkedout()
+    return {
+        "pool_size": pool.size(),
+        "max_overflow": pool._max_overflow,
+        "checked_out": checked_out,
+        "checked_in": pool.checkedin(),
+        # QueuePool counts overflow from -pool_size until the pool has filled up once
+        "overflow": max(pool.overflow(), 0),
+        "saturated": pool._max_overflow > -1 and checked_out >= pool.size() + pool._max_overflow,
+        "checkouts": timer.checkouts,
+        "checkout_timeouts": timer.timeouts,
+        "checkout_wait_ms_total": round(timer.wait_seconds_total * 1000, 3),
+        "checkout_wait_ms_avg": round(timer.wait_seconds_total * 1000 / timer.checkouts, 3) if timer.checkouts else 0.0,
+        "checkout_wait_ms_max": round(timer.wait_seconds_max * 1000, 3),
+    }
@@ -0,0 +1,152 @@
+import functools
+import itertools
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, Hashable, List, Optional
+
+from sqlalchemy import Delete, Insert, Update, event
+from sqlalchemy.engine import Engine
+from sqlalchemy.orm import Session
+
+# Comma-separated host[:port] list of streaming replicas. Empty keeps every session on the primary.
+DB_REPLICA_HOSTS = [host.strip() for host in os.environ.get("DB_REPLICA_HOSTS", "").split(",") if host.strip()]
+# How long a replica that failed to connect (or dropped a connection) is skipped
+DB_REPLICA_EJECT_SECONDS = float(os.environ.get("DB_REPLICA_EJECT_SECONDS", "30"))
+# Reads of a sample go to the primary for this long after the primary announces it changed
+DB_REPLICA_STALENESS_SECONDS = float(os.environ.get("DB_REPLICA_STALENESS_SECONDS", "5"))
+
+class ReplicaSet:
+    """
+    Round-robin over replica engines, skipping any that recently failed. Ejection is
+    passive: a connect failure or dropped connection takes a replica out of rotation for
+    `eject_seconds`, after which it is tried again.
+    """
+
+    def __init__(self, engines: List[Engine], eject_seconds: float = DB_REPLICA_EJECT_SECONDS):
+        self.engines = engines
+        self.eject_seconds = eject_seconds
+        self._ejected_until: Dict[Engine, float] = {}
+        self._counter = itertools.count()
+        for engine in engines:
+            event.listen(engine, "do_connect", functools.partial(self._connect, engine))
+            event.listen(engine, "handle_error", self._on_error)
+
+    def _connect(self, engine: Engine, dialect, connection_record, cargs, cparams):
+        # Performs the connect itself: asyncpg's connect errors never reach handle_error
+        try:
+            return dialect.connect(*cargs, **cparams)
+        except Exception:
+            self.eject(engine)
+            raise
+
+    def _on_error(self, context) -> None:
+        if context.is_disconnect:
+            self.eject(context.engine)
+
+    def eject(self, engine: Engine) -> None:
+        self._ejected_until[engine] = time.monotonic() + self.eject_seconds
+
+    def is_ejected(self, engine: Engine) -> bool:
+        return self._ejected_until.get(engine, 0.0) > time.monotonic()
+
+    def pick(self) -> Optional[Engine]:
+        """The next healthy replica, or None when all of them are ejected."""
+        for _ in range(len(self.engines)):
+            engine = self.engines[next(self._counter) % len(self.engines)]
+            if not self.is_ejected(engine):
+                return engine
+        return None
+
+class RecentChanges:
+    """
+    Keys the primary announced as changed (NOTIFY, see api.cache.SampleChangeListener) within
+    the last `window` seconds. A replica may not have replayed such a change yet, so reads of
+    those keys go to the primary. The announcements come from whichever process wrote (ETL,
+    pipeline scripts, bulk ingest), so this works in the API processes, which never write.
+    While nobody is `watching` the channel, changes could go unnoticed and every key counts
+    as recently changed.
+
+    Only reads addressed by sample_id consult it (single and batch sample lookups). Lists,
+    searches, exports and patient trees cannot know in advance which samples they will
+    return, and rather than sending them all to the primary during every ingest, they read
+    the replica and may lag by its replay delay.
+    """
+
+    def __init__(self, window: float):
+        self.window = window
+        self.watching = threading.Event()
+        self._changed: "OrderedDict[Hashable, float]" = OrderedDict()
+        self._all_until = float("-inf")
+        self._lock = threading.Lock()
+
+    def mark(self, key: Hashable) -> None:
+        now = time.monotonic()
+        with self._lock:
+            self._changed[key] = now
+            self._changed.move_to_end(key)
+            while self._changed and next(iter(self._changed.values())) <= now - self.window:
+                self._changed.popitem(last=False)
+
+    def mark_all(self) -> None:
+        """Announcements may have been missed (listener reconnects): every key counts as changed for a window."""
+        with self._lock:
+            self._all_until = time.monotonic() + self.window
+
+    def __contains__(self, key: Hashable) -> bool:
+        if self.window <= 0:
+            return False
+        if not self.watching.is_set():
+            return True
+        now = time.monotonic()
+        with self._lock:
+            changed = self._changed.get(key, float("-inf"))
+            return now < self._all_until or now - changed < self.window
+
+recent_changes = RecentChanges(DB_REPLICA_STALENESS_SECONDS)
+
+# A write pins the rest of its transaction to the primary; the next transaction reads again
+@event.listens_for(Session, "after_flush")
+def _mark_flushed(session, flush_context):
+    session.info["wrote"] = True
+
+@event.listens_for(Session, "after_commit")
+def _end_write(session):
+    session.info.pop("wrote", None)
+
+def use_primary(db) -> None:
+    """
+    Sends every later read of a routing session (or an AsyncSession over one) to the primary.
+    A no-op for sessions bound to the primary anyway.
+    """
+    session = getattr(db, "sync_session", db)
+    if isinstance(session, RoutingSession):
+        session.replica = session.primary
+
+class RoutingSession(Session):
+    """
+    Sends reads to a replica and writes to the primary. A session picks one replica on its
+    first read and keeps it for its whole life, across commits, so all of a request's queries
+    (ETag checks, bodies and selectinloads, in however many run_query transactions) see the
+    same replica. It only moves on when that replica is ejected. Once a transaction writes,
+    the rest of it stays on the primary. Reads also go to the primary when every replica is
+    ejected, or for the rest of the session after use_primary(), which the routers call for
+    samples in `recent_changes`.
+    """
+
+    def __init__(self, primary: Engine, replicas: ReplicaSet, **kw):
+        super().__init__(**kw)
+        self.primary = primary
+        self.replicas = replicas
+        self.replica: Optional[Engine] = None
+
+    def get_bind(self, mapper=None, clause=None, **kw):
+        if self._flushing or isinstance(clause, (Insert, Update, Delete)):
+            self.info["wrote"] = True
+        if self.info.get("wrote"):
+            return self.primary
+
+        if self.replica is None or self.replicas.is_ejected(self.replica):
+            self.replica = self.replicas.pick() or self.primary
+        return self.replica
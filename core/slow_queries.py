@@ -0,0 +1,297 @@
+"""
+Slow-query capture: statements slower than SLOW_QUERY_MS are logged with their (redacted)
+parameters and labels (API route, ETL run_id), and recorded under SLOW_QUERY_DIR, one JSON
+file per normalized statement fingerprint. With SLOW_QUERY_EXPLAIN, a SELECT is re-run once
+per SLOW_QUERY_EXPLAIN_INTERVAL under EXPLAIN (ANALYZE, BUFFERS) inside a savepoint that is
+rolled back. Its plan shape is kept per fingerprint, so a plan flip on the frontend_* views or
+the JSONB searches is logged the first time the new plan shows up.
+
+Usage:
+    python -m core.slow_queries    # captured fingerprints, slowest first
+"""
+import hashlib
+import json
+import logging
+import os
+import re
+import sys
+import tempfile
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar, Token
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Optional
+
+from sqlalchemy import event
+
+logger = logging.getLogger(__name__)
+
+# Statements at least this slow are captured; 0 disables the hook
+SLOW_QUERY_MS = float(os.environ.get("SLOW_QUERY_MS", "0"))
+SLOW_QUERY_EXPLAIN = os.environ.get("SLOW_QUERY_EXPLAIN", "false").lower() in ("1", "true", "yes")
+SLOW_QUERY_DIR = Path(os.environ.get("SLOW_QUERY_DIR", os.path.join(tempfile.gettempdir(), "slow-queries")))
+# A fingerprint is re-explained at most this often; EXPLAIN ANALYZE runs the statement again
+SLOW_QUERY_EXPLAIN_INTERVAL = float(os.environ.get("SLOW_QUERY_EXPLAIN_INTERVAL", "300"))
+SLOW_QUERY_EXPLAIN_TIMEOUT_MS = int(os.environ.get("SLOW_QUERY_EXPLAIN_TIMEOUT_MS", "10000"))
+
+EXPLAIN_SAVEPOINT = "slow_query_explain"
+
+# --- Fingerprints ---
+_STRING_LITERAL = re.compile(r"'(?:[^']|'')*'")
+_PLACEHOLDER = re.compile(r"%\(\w+\)s|%s|\$\d+|\b\d+(?:\.\d+)?\b")
+_VALUE_LIST = re.compile(r"\(\s*\?(?:\s*,\s*\?)+\s*\)")
+_WHITESPACE = re.compile(r"\s+")
+
+def normalize_statement(statement: str) -> str:
+    """Literals and placeholders become ?, IN-lists of any length one (?...), whitespace one space."""
+    normalized = _STRING_LITERAL.sub("?", statement)
+    normalized = _PLACEHOLDER.sub("?", normalized)
+    normalized = _VALUE_LIST.sub("(?...)", normalized)
+    return _WHITESPACE.sub(" ", normalized).strip()
+
+def fingerprint(statement: str) -> str:
+    return hashlib.sha1(normalize_statement(statement).encode()).hexdigest()[:16]
+
+def plan_shape(node: dict) -> str:
+    """
+    An EXPLAIN (FORMAT JSON) plan tree as node types and index/relation names only, e.g.
+    Limit[Index Scan:idx_x]. Children are sorted: the planner flips join sides between
+    equally cheap orders.
+    """
+    label = node["Node Type"]
+    target = node.get("Index Name") or node.get("Relation Name")
+    if target:
+        label += f":{target}"
+    children = sorted(plan_shape(child) for child in node.get("Plans", []))
+    return label + (f"[{', '.join(children)}]" if children else "")
+
+# --- Redaction ---
+# Fernet tokens: base64url of version byte 0x80 and a timestamp, so always "gAAAAA..."
+_FERNET_TOKEN = re.compile(r"gAAAAA[A-Za-z0-9_\-]{40,}={0,2}")
+MAX_PARAM_LENGTH = 200
+MAX_PARAM_ITEMS = 20
+
+def _redact_value(value):
+    if isinstance(value, str):
+        value = _FERNET_TOKEN.sub("<encrypted>", value)
+        return value if len(value) <= MAX_PARAM_LENGTH else value[:MAX_PARAM_LENGTH] + "..."
+    if isinstance(value, (list, tuple)):
+        items = [_redact_value(item) for item in value[:MAX_PARAM_ITEMS]]
+        if len(value) > MAX_PARAM_ITEMS:
+            items.append(f"... {len(value) - MAX_PARAM_ITEMS} more")
+        return items
+    if isinstance(value, dict):
+        return {key: _redact_value(item) for key, item in value.items()}
+    if value is None or isinstance(value, (int, float, bool)):
+        return value
+    return _redact_value(str(value))
+
+def redact_parameters(parameters):
+    """
+    Bound parameters safe to log: encrypted patient IDs (Fernet tokens, in any value) and
+    anything bound under a patient-named parameter are replaced, long values truncated.
+    """
+    if isinstance(parameters, dict):
+        # Expanding IN-lists bind one parameter per value
+        redacted = {
+            key: "<redacted>" if "patient" in str(key).lower() else _redact_value(value)
+            for key, value in list(parameters.items())[:MAX_PARAM_ITEMS]
+        }
+        if len(parameters) > MAX_PARAM_ITEMS:
+            redacted["..."] = f"{len(parameters) - MAX_PARAM_ITEMS} more"
+        return redacted
+    return _redact_value(parameters)
+
+# --- Labels ---
+# Attached to every record: the API sets the route, ETL jobs the run_id. A value may be a
+# zero-argument callable, resolved only when a slow statement is captured.
+_query_labels: ContextVar[dict] = ContextVar("slow_query_labels", default={})
+
+def push_query_labels(**labels) -> Token:
+    """The token form of query_labels(), for functions that already end in a try/finally."""
+    return _query_labels.set({**_query_labels.get(), **labels})
+
+def pop_query_labels(token: Token) -> None:
+    _query_labels.reset(token)
+
+@contextmanager
+def query_labels(**labels):
+    token = push_query_labels(**labels)
+    try:
+        yield
+    finally:
+        pop_query_labels(token)
+
+def current_labels() -> dict:
+    return {key: value() if callable(value) else value for key, value in _query_labels.get().items()}
+
+# --- Capture ---
+def _explain(cursor, statement: str, parameters, timeout_ms: int) -> dict:
+    """
+    EXPLAIN (ANALYZE, BUFFERS) of the statement on its own DBAPI connection, inside a savepoint
+    (or a transaction of its own under autocommit) that is always rolled back, so neither the
+    re-run nor a failure touches the caller's transaction. SET LOCAL ends with the savepoint.
+    """
+    dbapi_connection = cursor.connection
+    explain_cursor = dbapi_connection.cursor()
+    autocommit = getattr(dbapi_connection, "autocommit", False)
+    explain_cursor.execute("BEGIN" if autocommit else f"SAVEPOINT {EXPLAIN_SAVEPOINT}")
+    try:
+        explain_cursor.execute(f"SET LOCAL statement_timeout = {int(timeout_ms)}")
+        started = time.perf_counter()
+        explain_cursor.execute(f"EXPLAIN (ANALYZE, BUFFERS, FORMAT JSON) {statement}", parameters)
+        [plan] = explain_cursor.fetchone()
+        explain_ms = (time.perf_counter() - started) * 1000
+    finally:
+        explain_cursor.execute("ROLLBACK" if autocommit else f"ROLLBACK TO SAVEPOINT {EXPLAIN_SAVEPOINT}")
+        if not autocommit:
+            explain_cursor.execute(f"RELEASE SAVEPOINT {EXPLAIN_SAVEPOINT}")
+        explain_cursor.close()
+    plan = json.loads(plan) if isinstance(plan, str) else plan  # asyncpg returns json as text
+    return {"plan": plan, "shape": plan_shape(plan[0]["Plan"]), "explain_ms": round(explain_ms, 2)}
+
+class SlowQueryLog:
+    """
+    Engine event hook plus the per-fingerprint record files. Records are rewritten whole
+    (write to a temp file, then rename), so readers never see a partial file.
+    """
+
+    def __init__(self, threshold_ms: float, directory: Path, explain: bool = False,
+                 explain_interval: float = 300, explain_timeout_ms: int = 10000):
+        self.threshold_ms = threshold_ms
+        self.directory = directory
+        self.explain = explain
+        self.explain_interval = explain_interval
+        self.explain_timeout_ms = explain_timeout_ms
+        self._last_explained = {}
+        self._lock = threading.Lock()
+
+    @property
+    def enabled(self) -> bool:
+        return self.threshold_ms > 0
+
+    def install(self, engine) -> None:
+        """Hooks a sync Engine (for the asyncpg engine, its sync_engine)."""
+        if not event.contains(engine, "before_cursor_execute", self._before_cursor_execute):
+            event.listen(engine, "before_cursor_execute", self._before_cursor_execute)
+            event.listen(engine, "after_cursor_execute", self._after_cursor_execute)
+
+    # The start time lives on the execution context, not conn.info: after_cursor_execute never
+    # fires for a failed statement, and conn.info lives as long as the pooled connection
+    def _before_cursor_execute(self, conn, cursor, statement, parameters, context, executemany):
+        if context is not None:
+            context.slow_query_started = time.perf_counter()
+
+    def _after_cursor_execute(self, conn, cursor, statement, parameters, context, executemany):
+        started = getattr(context, "slow_query_started", None)
+        if started is None:
+            return
+        duration_ms = (time.perf_counter() - started) * 1000
+        if duration_ms < self.threshold_ms or executemany:
+            return
+        try:
+            self.capture(cursor, statement, parameters, duration_ms, streaming=bool(context.execution_options.get("stream_results")))
+        except Exception as e:
+            # Capturing is best effort; it must never fail the statement that triggered it
+            logger.warning(f"Slow-query capture failed: {e!r}")
+
+    def _should_explain(self, key: str, statement: str, streaming: bool) -> bool:
+        # Only reads are re-run; a server-side cursor's portal must not be disturbed
+        if not self.explain or streaming or statement.lstrip().split(None, 1)[0].upper() != "SELECT":
+            return False
+        now = time.monotonic()
+        with self._lock:
+            if now - self._last_explained.get(key, float("-inf")) < self.explain_interval:
+                return False
+            self._last_explained[key] = now
+        return True
+
+    def capture(self, cursor, statement: str, parameters, duration_ms: float, streaming: bool = False) -> dict:
+        key = fingerprint(statement)
+        labels = current_labels()
+        params = redact_parameters(parameters)
+        logger.warning(
+            f"Slow query {duration_ms:.0f} ms [{key}] "
+            + " ".join(f"{name}={value}" for name, value in labels.items())
+            + f": {_WHITESPACE.sub(' ', statement)[:1000]} params={params}"
+        )
+        explained = None
+        if self._should_explain(key, statement, streaming):
+            try:
+                explained = _explain(cursor, statement, parameters, self.explain_timeout_ms)
+            except Exception as e:
+                explained = {"error": repr(e)}
+        return self.record(key, statement, params, labels, duration_ms, explained)
+
+    def record(self, key: str, statement: str, params, labels: dict, duration_ms: float, explained: Optional[dict]) -> dict:
+        now = datetime.now(timezone.utc).isoformat()
+        path = self.directory / f"{key}.json"
+        with self._lock:
+            try:
+                record = json.loads(path.read_text())
+            except (FileNotFoundError, ValueError):
+                record = {
+                    "fingerprint": key, "statement": normalize_statement(statement), "count": 0,
+                    "first_seen": now, "max_ms": 0.0, "total_ms": 0.0, "plans": [],
+                }
+            record["count"] += 1
+            record["last_seen"] = now
+            record["max_ms"] = round(max(record["max_ms"], duration_ms), 2)
+            record["total_ms"] = round(record["total_ms"] + duration_ms, 2)
+            record["last"] = {"at": now, "duration_ms": round(duration_ms, 2), "params": params, "labels": labels}
+            if explained and "error" in explained:
+                record["last_explain_error"] = explained["error"]
+            elif explained:
+                self._add_plan(record, explained, now)
+
+            self.directory.mkdir(parents=True, exist_ok=True)
+            scratch = path.with_suffix(f".{os.getpid()}.tmp")
+            scratch.write_text(json.dumps(record, indent=2, default=str))
+            os.replace(scratch, path)
+        return record
+
+    @staticmethod
+    def _add_plan(record: dict, explained: dict, now: str) -> None:
+        for known in record["plans"]:
+            if known["shape"] == explained["shape"]:
+                known.update(last_seen=now, count=known["count"] + 1, plan=explained["plan"], explain_ms=explained["explain_ms"])
+                return
+        if record["plans"]:
+            logger.warning(
+                f"Plan changed for slow query [{record['fingerprint']}]: "
+                f"{record['plans'][-1]['shape']} -> {explained['shape']}"
+            )
+        record["plans"].append({"first_seen": now, "last_seen": now, "count": 1, **explained})
+
+    def records(self) -> list:
+        """Every captured fingerprint, slowest first."""
+        if not self.directory.exists():
+            return []
+        records = []
+        for path in self.directory.glob("*.json"):
+            try:
+                records.append(json.loads(path.read_text()))
+            except (FileNotFoundError, ValueError):
+                continue
+        return sorted(records, key=lambda record: record["max_ms"], reverse=True)
+
+slow_query_log = SlowQueryLog(
+    SLOW_QUERY_MS, SLOW_QUERY_DIR, SLOW_QUERY_EXPLAIN, SLOW_QUERY_EXPLAIN_INTERVAL, SLOW_QUERY_EXPLAIN_TIMEOUT_MS,
+)
+
+def main():
+    records = slow_query_log.records()
+    if not records:
+        sys.exit(f"No slow queries recorded in {slow_query_log.directory}")
+    print(f"{'fingerprint':<18}{'count':>7}{'max ms':>10}{'avg ms':>10}{'plans':>7}  statement")
+    for record in records:
+        flipped = "*" if len(record["plans"]) > 1 else ""
+        print(
+            f"{record['fingerprint']:<18}{record['count']:>7}{record['max_ms']:>10.1f}"
+            f"{record['total_ms'] / record['count']:>10.1f}{len(record['plans']):>6}{flipped:1}  {record['statement'][:100]}"
+        )
+
+if __name__ == "__main__":
+    main()
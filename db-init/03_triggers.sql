@@ -1,13 +1,200 @@
 -- Syncronize updated_at columns with current timestamp
+-- clock_timestamp() is used instead of CURRENT_TIMESTAMP (frozen at transaction start) and is
+-- nudged past the previous value, so every update strictly advances updated_at. The API's
+-- ETags are derived from these values and must change on every committed write.
 CREATE OR REPLACE FUNCTION update_modified_column()
 RETURNS TRIGGER AS $$
 BEGIN
-    NEW.updated_at = CURRENT_TIMESTAMP;
+    NEW.updated_at = GREATEST(clock_timestamp(), OLD.updated_at + interval '1 microsecond');
     RETURN NEW;
 END;
 $$ language 'plpgsql';
 
-CREATE TRIGGER update_samples_modtime
+CREATE OR REPLACE TRIGGER update_patients_modtime
+    BEFORE UPDATE ON public.patients
+    FOR EACH ROW
+    EXECUTE FUNCTION update_modified_column();
+
+CREATE OR REPLACE TRIGGER update_samples_modtime
     BEFORE UPDATE ON public.samples
     FOR EACH ROW
-    EXECUTE FUNCTION update_modified_column();
\ No newline at end of file
+    EXECUTE FUNCTION update_modified_column();
+
+CREATE OR REPLACE TRIGGER update_runs_modtime
+    BEFORE UPDATE ON public.runs
+    FOR EACH ROW
+    EXECUTE FUNCTION update_modified_column();
+
+CREATE OR REPLACE TRIGGER update_run_profiles_modtime
+    BEFORE UPDATE ON public.run_profiles
+    FOR EACH ROW
+    EXECUTE FUNCTION update_modified_column();
+
+-- Roll changes up the hierarchy: a write to a run's child tables bumps the run, and any write
+-- to a run bumps its sample. samples.updated_at therefore reflects the newest change anywhere
+-- in the sample's subtree (child tables have no updated_at of their own).
+-- The triggers are statement-level and read the transition tables, so each parent is touched
+-- once per statement however many of its children the statement wrote. Row-level triggers
+-- issued one parent UPDATE per child row, which dominated bulk loads.
+CREATE OR REPLACE FUNCTION touch_parent_updated_at()
+RETURNS TRIGGER AS $$
+DECLARE
+    parent TEXT := CASE WHEN TG_TABLE_NAME = 'runs' THEN 'samples' ELSE 'runs' END;
+    parent_key TEXT := CASE WHEN TG_TABLE_NAME = 'runs' THEN 'sample_id' ELSE 'run_id' END;
+    changed TEXT;
+BEGIN
+    -- Only the transition tables of the firing event exist; both sides are touched on UPDATE
+    -- in case rows were re-parented.
+    changed := CASE TG_OP
+        WHEN 'INSERT' THEN format('SELECT %I FROM new_rows', parent_key)
+        WHEN 'DELETE' THEN format('SELECT %I FROM old_rows', parent_key)
+        ELSE format('SELECT %1$I FROM new_rows UNION SELECT %1$I FROM old_rows', parent_key)
+    END;
+    EXECUTE format(
+        'UPDATE public.%I SET updated_at = CURRENT_TIMESTAMP WHERE %I IN (%s)',
+        parent, parent_key, changed
+    );
+    RETURN NULL;
+END;
+$$ language 'plpgsql';
+
+-- Replaces the earlier row-level trigger of the same name
+DROP TRIGGER IF EXISTS touch_samples_from_runs ON public.runs;
+
+CREATE OR REPLACE TRIGGER touch_samples_from_runs_insert
+    AFTER INSERT ON public.runs
+    REFERENCING NEW TABLE AS new_rows
+    FOR EACH STATEMENT
+    EXECUTE FUNCTION touch_parent_updated_at();
+
+CREATE OR REPLACE TRIGGER touch_samples_from_runs_update
+    AFTER UPDATE ON public.runs
+    REFERENCING OLD TABLE AS old_rows NEW TABLE AS new_rows
+    FOR EACH STATEMENT
+    EXECUTE FUNCTION touch_parent_updated_at();
+
+CREATE OR REPLACE TRIGGER touch_samples_from_runs_delete
+    AFTER DELETE ON public.runs
+    REFERENCING OLD TABLE AS old_rows
+    FOR EACH STATEMENT
+    EXECUTE FUNCTION touch_parent_updated_at();
+
+-- Replaces the earlier row-level trigger of the same name
+DROP TRIGGER IF EXISTS touch_runs_from_file_locations ON public.file_locations;
+
+CREATE OR REPLACE TRIGGER touch_runs_from_file_locations_insert
+    AFTER INSERT ON public.file_locations
+    REFERENCING NEW TABLE AS new_rows
+    FOR EACH STATEMENT
+    EXECUTE FUNCTION touch_parent_updated_at();
+
+CREATE OR REPLACE TRIGGER touch_runs_from_file_locations_update
+    AFTER UPDATE ON public.file_locations
+    REFERENCING OLD TABLE AS old_rows NEW TABLE AS new_rows
+    FOR EACH STATEMENT
+    EXECUTE FUNCTION touch_parent_updated_at();
+
+CREATE OR REPLACE TRIGGER touch_runs_from_file_locations_delete
+    AFTER DELETE ON public.file_locations
+    REFERENCING OLD TABLE AS old_rows
+    FOR EACH STATEMENT
+    EXECUTE FUNCTION touch_parent_updated_at();
+
+-- Replaces the earlier row-level trigger of the same name
+DROP TRIGGER IF EXISTS touch_runs_from_pipeline_results ON public.pipeline_results;
+
+CREATE OR REPLACE TRIGGER touch_runs_from_pipeline_results_insert
+    AFTER INSERT ON public.pipeline_results
+    REFERENCING NEW TABLE AS new_rows
+    FOR EACH STATEMENT
+    EXECUTE FUNCTION touch_parent_updated_at();
+
+CREATE OR REPLACE TRIGGER touch_runs_from_pipeline_results_update
+    AFTER UPDATE ON public.pipeline_results
+    REFERENCING OLD TABLE AS old_rows NEW TABLE AS new_rows
+    FOR EACH STATEMENT
+    EXECUTE FUNCTION touch_parent_updated_at();
+
+CREATE OR REPLACE TRIGGER touch_runs_from_pipeline_results_delete
+    AFTER DELETE ON public.pipeline_results
+    REFERENCING OLD TABLE AS old_rows
+    FOR EACH STATEMENT
+    EXECUTE FUNCTION touch_parent_updated_at();
+
+-- Replaces the earlier row-level trigger of the same name
+DROP TRIGGER IF EXISTS touch_runs_from_api_endpoints ON public.api_endpoints;
+
+CREATE OR REPLACE TRIGGER touch_runs_from_api_endpoints_insert
+    AFTER INSERT ON public.api_endpoints
+    REFERENCING NEW TABLE AS new_rows
+    FOR EACH STATEMENT
+    EXECUTE FUNCTION touch_parent_updated_at();
+
+CREATE OR REPLACE TRIGGER touch_runs_from_api_endpoints_update
+    AFTER UPDATE ON public.api_endpoints
+    REFERENCING OLD TABLE AS old_rows NEW TABLE AS new_rows
+    FOR EACH STATEMENT
+    EXECUTE FUNCTION touch_parent_updated_at();
+
+CREATE OR REPLACE TRIGGER touch_runs_from_api_endpoints_delete
+    AFTER DELETE ON public.api_endpoints
+    REFERENCING OLD TABLE AS old_rows
+    FOR EACH STATEMENT
+    EXECUTE FUNCTION touch_parent_updated_at();
+
+-- Publish the owning sample_id on the 'sample_changed' channel whenever any part of a
+-- sample's tree changes, so API processes can evict their cached copy of that sample.
+-- pg_notify is transactional: listeners only hear about committed changes, and duplicate
+-- payloads raised within one transaction are collapsed into a single notification.
+CREATE OR REPLACE FUNCTION notify_sample_changed()
+RETURNS TRIGGER AS $$
+DECLARE
+    changed_run_id TEXT;
+BEGIN
+    IF TG_TABLE_NAME IN ('samples', 'runs') THEN
+        IF TG_OP <> 'INSERT' THEN
+            PERFORM pg_notify('sample_changed', OLD.sample_id);
+        END IF;
+        IF TG_OP <> 'DELETE' THEN
+            PERFORM pg_notify('sample_changed', NEW.sample_id);
+        END IF;
+        RETURN NULL;
+    END IF;
+
+    -- Child tables hang off a run; resolve it back to its sample
+    IF TG_OP = 'DELETE' THEN
+        changed_run_id := OLD.run_id;
+    ELSE
+        changed_run_id := NEW.run_id;
+    END IF;
+    PERFORM pg_notify('sample_changed', r.sample_id)
+    FROM public.runs r
+    WHERE r.run_id = changed_run_id;
+    RETURN NULL;
+END;
+$$ language 'plpgsql';
+
+CREATE OR REPLACE TRIGGER notify_samples_changed
+    AFTER INSERT OR UPDATE OR DELETE ON public.samples
+    FOR EACH ROW
+    EXECUTE FUNCTION notify_sample_changed();
+
+CREATE OR REPLACE TRIGGER notify_runs_changed
+    AFTER INSERT OR UPDATE OR DELETE ON public.runs
+    FOR EACH ROW
+    EXECUTE FUNCTION notify_sample_changed();
+
+CREATE OR REPLACE TRIGGER notify_file_locations_changed
+    AFTER INSERT OR UPDATE OR DELETE ON public.file_locations
+    FOR EACH ROW
+    EXECUTE FUNCTION notify_sample_changed();
+
+CREATE OR REPLACE TRIGGER notify_pipeline_results_changed
+    AFTER INSERT OR UPDATE OR DELETE ON public.pipeline_results
+    FOR EACH ROW
+    EXECUTE FUNCTION notify_sample_changed();
+
+CREATE OR REPLACE TRIGGER notify_api_endpoints_changed
+    AFTER INSERT OR UPDATE OR DELETE ON public.api_endpoints
+    FOR EACH ROW
+    EXECUTE FUNCTION notify_sample_changed();
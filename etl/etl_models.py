@@ -1,8 +1,8 @@
 from datetime import datetime
 from typing import List, Optional
-from sqlalchemy import String, ForeignKey, Text
+from sqlalchemy import FetchedValue, String, ForeignKey, Text
 from sqlalchemy.orm import DeclarativeBase, Mapped, mapped_column, relationship
-from core.models import FileLocationMixin, PipelineResultMixin, ApiEndpointMixin
+from core.models import FileLocationMixin, PipelineResultMixin, ApiEndpointMixin, RunProfileMixin, PromotedMetadataMixin
 from sqlalchemy.dialects.postgresql import JSONB
 
 class Base(DeclarativeBase):
@@ -13,6 +13,11 @@ class Patient(Base):
     
     # Primary Key is the application-level encrypted string
     patient_id: Mapped[str] = mapped_column(String(255), primary_key=True)
+    # The surrogate key the frontend views expose: set by a trigger on insert, then never changed
+    # (key rotation rewrites patient_id, not this)
+    patient_hash: Mapped[str] = mapped_column(Text, server_default=FetchedValue())
+    # HMAC of the plaintext patient ID (crypto_manager.blind_index); unique, the get-or-create lookup key
+    patient_blind_index: Mapped[Optional[str]] = mapped_column(String(64), unique=True, nullable=True)
     created_at: Mapped[Optional[datetime]] = mapped_column(nullable=True)
     updated_at: Mapped[Optional[datetime]] = mapped_column(nullable=True)
 
@@ -25,7 +30,10 @@ class Sample(Base):
     __tablename__ = "samples"
     
     sample_id: Mapped[str] = mapped_column(String(50), primary_key=True)
-    patient_id: Mapped[str] = mapped_column(ForeignKey("patients.patient_id", ondelete="CASCADE"), nullable=False)
+    # ON UPDATE CASCADE: key rotation rewrites the patient's ciphertext primary key
+    patient_id: Mapped[str] = mapped_column(ForeignKey("patients.patient_id", ondelete="CASCADE", onupdate="CASCADE"), nullable=False)
+    # Copied from the owning patient by a trigger
+    patient_hash: Mapped[str] = mapped_column(Text, server_default=FetchedValue())
     created_at: Mapped[Optional[datetime]] = mapped_column(nullable=True)
     updated_at: Mapped[Optional[datetime]] = mapped_column(nullable=True)
 
@@ -35,7 +43,7 @@ class Sample(Base):
         cascade="all, delete-orphan"
     )
 
-class Run(Base):
+class Run(PromotedMetadataMixin, Base):
     __tablename__ = "runs"
     
     run_id: Mapped[str] = mapped_column(String(50), primary_key=True)
@@ -51,6 +59,7 @@ class Run(Base):
     files: Mapped[List["FileLocation"]] = relationship(back_populates="run", cascade="all, delete-orphan")
     results: Mapped[List["PipelineResult"]] = relationship(back_populates="run", cascade="all, delete-orphan")
     endpoints: Mapped[List["ApiEndpoint"]] = relationship(back_populates="run", cascade="all, delete-orphan")
+    profile: Mapped[Optional["RunProfile"]] = relationship(back_populates="run", cascade="all, delete-orphan")
 
 class FileLocation(FileLocationMixin, Base):
     run: Mapped["Run"] = relationship(back_populates="files")
@@ -59,4 +68,7 @@ class PipelineResult(PipelineResultMixin, Base):
     run: Mapped["Run"] = relationship(back_populates="results")
 
 class ApiEndpoint(ApiEndpointMixin, Base):
-    run: Mapped["Run"] = relationship(back_populates="endpoints")
\ No newline at end of file
+    run: Mapped["Run"] = relationship(back_populates="endpoints")
+
+class RunProfile(RunProfileMixin, Base):
+    run: Mapped["Run"] = relationship(back_populates="profile")
\ No newline at end of file
@@ -0,0 +1,78 @@
+"""
+One-off backfill of patients.patient_blind_index for rows written before it existed.
+
+Those rows were never deduplicated (Fernet ciphertexts never matched), so the same person
+may appear as several patients. Each row is decrypted and blind-indexed; the first row per
+index keeps it, and every later duplicate has its samples moved over and is deleted.
+Rows that cannot be decrypted with the current ENCRYPTION_KEY are left untouched.
+
+Usage:
+    python -m etl.jobs.backfill_blind_index --batch-size 500
+"""
+import argparse
+from dataclasses import dataclass
+
+from cryptography.fernet import InvalidToken
+from sqlalchemy import delete, select, update
+
+from etl.etl_models import Patient, Sample
+from etl.security import crypto_manager
+
+from core.database import SessionLocal
+
+@dataclass
+class BackfillStats:
+    indexed: int = 0
+    merged: int = 0
+    skipped: int = 0
+
+def backfill_blind_index(batch_size: int = 500, session_factory=SessionLocal) -> BackfillStats:
+    """Walks the unindexed patients in primary-key order, one transaction per batch."""
+    stats = BackfillStats()
+    last_patient_id = ""
+    while True:
+        db = session_factory()
+        try:
+            batch = db.scalars(
+                select(Patient.patient_id)
+                .where(Patient.patient_blind_index.is_(None), Patient.patient_id > last_patient_id)
+                .order_by(Patient.patient_id)
+                .limit(batch_size)
+            ).all()
+            if not batch:
+                return stats
+
+            for patient_id in batch:
+                try:
+                    blind_index = crypto_manager.blind_index(crypto_manager.decrypt_patient_id(patient_id))
+                except InvalidToken:
+                    stats.skipped += 1
+                    continue
+                # Sees rows indexed earlier in this same transaction too
+                canonical = db.scalar(select(Patient.patient_id).where(Patient.patient_blind_index == blind_index))
+                if canonical:
+                    db.execute(update(Sample).where(Sample.patient_id == patient_id).values(patient_id=canonical))
+                    db.execute(delete(Patient).where(Patient.patient_id == patient_id))
+                    stats.merged += 1
+                else:
+                    db.execute(update(Patient).where(Patient.patient_id == patient_id).values(patient_blind_index=blind_index))
+                    stats.indexed += 1
+            db.commit()
+            last_patient_id = batch[-1]
+        except Exception as e:
+            db.rollback()
+            print(f"Blind index backfill failed: {e}")
+            raise
+        finally:
+            db.close()
+
+def main():
+    parser = argparse.ArgumentParser(description="Backfill patient blind indexes and merge duplicate patients.")
+    parser.add_argument("--batch-size", type=int, default=500, help="Patients per transaction")
+    args = parser.parse_args()
+
+    stats = backfill_blind_index(batch_size=args.batch_size)
+    print(f"Indexed {stats.indexed} patients, merged {stats.merged} duplicates, skipped {stats.skipped} undecryptable rows.")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,256 @@
+"""
+Bulk manifest ingestion: the set-based counterpart of process_run.insert_pipeline_results.
+
+A manifest row describes one sequencing run (sample, patient, assay and its file URIs).
+Each chunk of rows is COPYed into a temporary staging table, then patients, samples, runs
+and file_locations are resolved with a handful of INSERT ... SELECT ... ON CONFLICT
+statements, committed as one transaction per chunk. A 5,000-run batch costs a few dozen
+roundtrips instead of tens of thousands.
+
+Manifest formats (chosen by file extension):
+    CSV    header with sample_id, patient_id, assay_type, optional run_id and metadata (a JSON
+           object); every other non-empty column is a file location, keyed by its file type
+           (e.g. FASTQ_R1,FASTQ_R2).
+    JSONL  one object per line with the same keys, plus "files": {"<file type>": "<uri>"}.
+
+Usage:
+    python -m etl.jobs.bulk_ingest manifest.csv --chunk-size 1000
+"""
+import argparse
+import csv
+import io
+import json
+import time
+import uuid
+from dataclasses import dataclass, field
+from itertools import islice
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+from sqlalchemy import text
+
+from etl.security import crypto_manager
+
+from core.database import SessionLocal
+
+REQUIRED_FIELDS = ("sample_id", "patient_id", "assay_type")
+OPTIONAL_FIELDS = ("run_id", "metadata")
+
+DEFAULT_CHUNK_SIZE = 1000
+
+@dataclass
+class ManifestRow:
+    sample_id: str
+    patient_id: str  # Plaintext; encrypted before it is staged
+    assay_type: str
+    files: Dict[str, str] = field(default_factory=dict)
+    run_id: Optional[str] = None
+    metadata: dict = field(default_factory=dict)
+
+@dataclass
+class IngestStats:
+    rows: int = 0
+    chunks: int = 0
+    patients: int = 0
+    samples: int = 0
+    runs: int = 0
+    files: int = 0
+    seconds: float = 0.0
+
+    @property
+    def runs_per_second(self) -> float:
+        return self.runs / self.seconds if self.seconds else 0.0
+
+def _manifest_row(record: dict, line: int) -> ManifestRow:
+    missing = [name for name in REQUIRED_FIELDS if not record.get(name)]
+    if missing:
+        raise ValueError(f"Manifest line {line}: missing {', '.join(missing)}")
+    metadata = record.get("metadata") or {}
+    if isinstance(metadata, str):
+        metadata = json.loads(metadata)
+    return ManifestRow(
+        sample_id=record["sample_id"],
+        patient_id=record["patient_id"],
+        assay_type=record["assay_type"],
+        files=record.get("files") or {},
+        run_id=record.get("run_id") or None,
+        metadata=metadata,
+    )
+
+def read_manifest(path: str) -> Iterator[ManifestRow]:
+    """Yields the rows of a CSV or JSONL manifest, raising ValueError on incomplete rows."""
+    with open(path, newline="") as f:
+        if path.endswith((".jsonl", ".ndjson")):
+            for line, raw in enumerate(f, start=1):
+                if raw.strip():
+                    yield _manifest_row(json.loads(raw), line)
+            return
+        # Line 1 is the header
+        for line, record in enumerate(csv.DictReader(f), start=2):
+            files = {
+                column: uri for column, uri in record.items()
+                if column not in REQUIRED_FIELDS + OPTIONAL_FIELDS and uri
+            }
+            yield _manifest_row({**record, "files": files}, line)
+
+STAGE_TABLE_SQL = text("""
+    CREATE TEMP TABLE ingest_stage (
+        line integer NOT NULL,
+        sample_id varchar(50) NOT NULL,
+        patient_id varchar(255) NOT NULL,
+        patient_blind_index varchar(64) NOT NULL,
+        assay_type varchar(50) NOT NULL,
+        run_id varchar(50) NOT NULL,
+        generated_run_id boolean NOT NULL,
+        metadata jsonb NOT NULL,
+        files jsonb NOT NULL
+    ) ON COMMIT DROP
+""")
+
+COPY_STAGE_SQL = "COPY ingest_stage (line, sample_id, patient_id, patient_blind_index, assay_type, run_id, generated_run_id, metadata, files) FROM STDIN WITH (FORMAT csv)"
+
+# Patients are deduplicated on their blind index, and only for samples that do not exist yet:
+# an existing sample keeps its patient, as in insert_pipeline_results. Only the first staged row
+# of each new sample counts, since that is the patient INSERT_SAMPLES_SQL attaches the sample to;
+# patients named on its later rows would be left without a sample.
+INSERT_PATIENTS_SQL = text("""
+    INSERT INTO patients (patient_id, patient_blind_index)
+    SELECT DISTINCT ON (f.patient_blind_index) f.patient_id, f.patient_blind_index
+    FROM (
+        SELECT DISTINCT ON (sample_id) sample_id, patient_id, patient_blind_index, line
+        FROM ingest_stage
+        ORDER BY sample_id, line
+    ) f
+    WHERE NOT EXISTS (SELECT 1 FROM samples x WHERE x.sample_id = f.sample_id)
+    ORDER BY f.patient_blind_index, f.line
+    ON CONFLICT (patient_blind_index) DO NOTHING
+""")
+
+# New samples point at whichever ciphertext the patient row already holds
+INSERT_SAMPLES_SQL = text("""
+    INSERT INTO samples (sample_id, patient_id)
+    SELECT DISTINCT ON (s.sample_id) s.sample_id, p.patient_id
+    FROM ingest_stage s
+    JOIN patients p ON p.patient_blind_index = s.patient_blind_index
+    ORDER BY s.sample_id, s.line
+    ON CONFLICT (sample_id) DO NOTHING
+""")
+
+# Runs that already exist are skipped together with their files, so re-ingesting a manifest
+# with run_ids is idempotent. The first manifest row wins when a run_id repeats. A generated
+# run_id must never be skipped that way: those rows are returned so the chunk can fail.
+INSERT_RUNS_AND_FILES_SQL = text("""
+    WITH first_rows AS (
+        SELECT DISTINCT ON (run_id) run_id, sample_id, assay_type, metadata, files
+        FROM ingest_stage
+        ORDER BY run_id, line
+    ), new_runs AS (
+        INSERT INTO runs (run_id, sample_id, assay_type, metadata)
+        SELECT run_id, sample_id, assay_type, metadata FROM first_rows
+        ON CONFLICT (run_id) DO NOTHING
+        RETURNING run_id
+    ), new_files AS (
+        INSERT INTO file_locations (run_id, file_type, s3_uri)
+        SELECT r.run_id, f.key, f.value
+        FROM first_rows r
+        JOIN new_runs USING (run_id)
+        CROSS JOIN LATERAL jsonb_each_text(r.files) f
+        RETURNING 1
+    )
+    SELECT
+        (SELECT count(*) FROM new_runs),
+        (SELECT count(*) FROM new_files),
+        (SELECT array_agg(s.run_id ORDER BY s.line) FROM ingest_stage s
+         WHERE s.generated_run_id AND NOT EXISTS (SELECT 1 FROM new_runs n WHERE n.run_id = s.run_id))
+""")
+
+def new_run_id() -> str:
+    """A run_id for a manifest row without one: the full 128-bit UUID, so collisions stay negligible at any table size."""
+    return f"RUN-{uuid.uuid4().hex.upper()}"
+
+def _stage_csv(rows: List[ManifestRow], patients: Dict[str, Tuple[str, str]]) -> io.StringIO:
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    for line, row in enumerate(rows):
+        writer.writerow([
+            line, row.sample_id, *patients[row.patient_id], row.assay_type,
+            row.run_id or new_run_id(), "f" if row.run_id else "t",
+            json.dumps(row.metadata), json.dumps(row.files),
+        ])
+    buffer.seek(0)
+    return buffer
+
+def ingest_chunk(db, rows: List[ManifestRow], patients: Dict[str, Tuple[str, str]], stats: IngestStats) -> None:
+    """
+    Stages and resolves one chunk on the session's current transaction. The caller commits.
+    `patients` maps each plaintext patient ID to its (ciphertext, blind index).
+    """
+    db.execute(STAGE_TABLE_SQL)
+    # COPY goes through the raw psycopg2 cursor of the session's own connection
+    cursor = db.connection().connection.driver_connection.cursor()
+    try:
+        cursor.copy_expert(COPY_STAGE_SQL, _stage_csv(rows, patients))
+    finally:
+        cursor.close()
+
+    stats.patients += db.execute(INSERT_PATIENTS_SQL).rowcount
+    stats.samples += db.execute(INSERT_SAMPLES_SQL).rowcount
+    runs, files, collided = db.execute(INSERT_RUNS_AND_FILES_SQL).one()
+    if collided:
+        raise ValueError(f"Generated run_id(s) already exist, their runs would be dropped: {', '.join(collided)}")
+    stats.runs += runs
+    stats.files += files
+    # ON COMMIT DROP only fires on a real commit; drop it here too so chunks can share a transaction
+    db.execute(text("DROP TABLE ingest_stage"))
+    stats.rows += len(rows)
+    stats.chunks += 1
+
+def _chunks(rows: Iterable[ManifestRow], size: int) -> Iterator[List[ManifestRow]]:
+    iterator = iter(rows)
+    while chunk := list(islice(iterator, size)):
+        yield chunk
+
+def bulk_ingest(rows: Iterable[ManifestRow], chunk_size: int = DEFAULT_CHUNK_SIZE, session_factory=SessionLocal) -> IngestStats:
+    """
+    Ingests manifest rows in chunks, one transaction per chunk. A failing chunk is rolled back
+    and re-raised; chunks committed before it stay committed.
+
+    Each distinct plaintext patient is encrypted and blind-indexed once per call. A patient
+    whose blind index already exists keeps its stored ciphertext.
+    """
+    stats = IngestStats()
+    patients = {}
+    started = time.perf_counter()
+    for chunk in _chunks(rows, chunk_size):
+        for row in chunk:
+            if row.patient_id not in patients:
+                patients[row.patient_id] = (
+                    crypto_manager.encrypt_patient_id(row.patient_id),
+                    crypto_manager.blind_index(row.patient_id),
+                )
+        db = session_factory()
+        try:
+            ingest_chunk(db, chunk, patients, stats)
+            db.commit()
+        except Exception as e:
+            db.rollback()
+            print(f"Bulk ingest failed in chunk {stats.chunks + 1}: {e}")
+            raise
+        finally:
+            db.close()
+    stats.seconds = time.perf_counter() - started
+    return stats
+
+def main():
+    parser = argparse.ArgumentParser(description="Bulk-ingest a CSV/JSONL run manifest.")
+    parser.add_argument("manifest", help="Path to a .csv or .jsonl manifest")
+    parser.add_argument("--chunk-size", type=int, default=DEFAULT_CHUNK_SIZE, help="Rows per transaction")
+    args = parser.parse_args()
+
+    stats = bulk_ingest(read_manifest(args.manifest), chunk_size=args.chunk_size)
+    print(
+        f"Ingested {stats.rows} rows in {stats.chunks} chunk(s): {stats.patients} patients, {stats.samples} samples, "
+        f"{stats.runs} runs, {stats.files} files in {stats.seconds:.2f}s ({stats.runs_per_second:.0f} runs/s)."
+    )
+
+if __name__ == "__main__":
+    main()
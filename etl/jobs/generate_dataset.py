@@ -0,0 +1,315 @@
+"""
+Synthetic dataset generator for load tests and benchmarks (100k to 10M runs).
+
+Unlike seed_database, nothing goes through the ORM: every table is streamed into Postgres
+with COPY in chunks, and all random draws come from one seeded NumPy Generator, so the same
+spec and seed always produce the same hierarchy, metadata and profiles. (Patient ciphertexts
+still differ between loads, since Fernet is randomised; their blind indexes do not.)
+
+Distributions:
+    * every sample gets one run, and the remaining runs go to samples in proportion to
+      lognormal weights (--run-skew), so a few samples carry most of the runs;
+    * each run's metadata carries the promoted keys plus a lognormal number of extra keys
+      (--metadata-keys median, --metadata-skew);
+    * coverage/quality profiles are drawn as whole (runs x length) matrices and COPYed in
+      binary, so no per-value Python work happens at all.
+
+Row triggers (updated_at roll-ups, cache NOTIFYs) dominate COPY time on fresh data. With
+--disable-triggers the load runs with session_replication_role = replica, which needs a
+superuser and also skips foreign key checks (the generator only emits consistent rows). The
+patient_hash columns are normally filled by triggers too, so the generator always COPYs them
+itself: md5 of the ciphertext for patients, the owning patient's hash for samples.
+
+Usage:
+    python -m etl.jobs.generate_dataset --runs 1000000 --seed 42 --disable-triggers
+"""
+import argparse
+import hashlib
+import io
+import struct
+import time
+from dataclasses import dataclass, field
+from typing import Optional
+
+import numpy as np
+from sqlalchemy import text
+
+from etl.security import crypto_manager
+
+from core.database import SessionLocal
+
+SEQUENCERS = np.array(["PromethION 24", "GridION", "MinION Mk1B"])
+ASSAYS = np.array(["ONT_WGS", "ONT_RNASEQ", "ONT_TARGETED"])
+STATUSES = np.array(["complete", "running", "failed"])
+FILE_TYPES = ["FASTQ_ONT", "REFERENCE", "BAM", "VCF", "BED"]
+
+FLOAT4_OID = 700
+COPY_BINARY_HEADER = b"PGCOPY\n\xff\r\n\x00" + struct.pack(">ii", 0, 0)
+COPY_BINARY_TRAILER = struct.pack(">h", -1)
+
+@dataclass
+class DatasetSpec:
+    runs: int = 100_000
+    samples: Optional[int] = None  # Default: runs // 4
+    patients: Optional[int] = None  # Default: samples // 2
+    files_per_run: int = 2
+    results_per_run: int = 1
+    profile_fraction: float = 1.0  # Share of runs that get a run_profiles row
+    profile_length: int = 100
+    run_skew: float = 1.0  # Sigma of the lognormal runs-per-sample weights
+    metadata_keys: float = 2.0  # Median number of extra metadata keys per run
+    metadata_skew: float = 1.0
+    days: int = 365  # created_at spread
+    seed: int = 0
+    prefix: str = "SYN"
+
+    def __post_init__(self):
+        self.samples = self.samples or max(1, self.runs // 4)
+        self.patients = self.patients or max(1, self.samples // 2)
+        if not self.runs >= self.samples >= self.patients >= 1:
+            raise ValueError("Expected runs >= samples >= patients >= 1")
+        if self.files_per_run > len(FILE_TYPES):
+            raise ValueError(f"files_per_run is capped at {len(FILE_TYPES)}")
+
+@dataclass
+class DatasetPlan:
+    """Every random draw that shapes the hierarchy, made once up front."""
+    sample_patient: np.ndarray  # Owning patient index per sample
+    sample_created: np.ndarray  # Seconds before now
+    run_sample: np.ndarray  # Owning sample index per run, sorted
+    run_created: np.ndarray
+    run_profiled: np.ndarray  # Indexes of runs that get a profile
+
+@dataclass
+class GenerateStats:
+    rows: dict = field(default_factory=dict)
+    seconds: float = 0.0
+
+    @property
+    def runs_per_second(self) -> float:
+        return self.rows.get("runs", 0) / self.seconds if self.seconds else 0.0
+
+def plan_dataset(spec: DatasetSpec) -> DatasetPlan:
+    rng = np.random.default_rng([spec.seed, 0])
+    # Every patient owns at least one sample and every sample at least one run
+    sample_patient = np.concatenate([np.arange(spec.patients), rng.integers(0, spec.patients, spec.samples - spec.patients)])
+    rng.shuffle(sample_patient)
+    weights = rng.lognormal(0.0, spec.run_skew, spec.samples)
+    extra_runs = rng.choice(spec.samples, spec.runs - spec.samples, p=weights / weights.sum())
+    run_sample = np.sort(np.concatenate([np.arange(spec.samples), extra_runs]))
+
+    horizon = spec.days * 86400
+    sample_created = rng.integers(0, horizon, spec.samples)
+    # Runs follow their sample by up to 30 days, capped at now
+    run_created = np.maximum(sample_created[run_sample] - rng.integers(0, 30 * 86400, spec.runs), 0)
+    run_profiled = np.flatnonzero(rng.random(spec.runs) < spec.profile_fraction)
+    return DatasetPlan(sample_patient, sample_created, run_sample, run_created, run_profiled)
+
+def _ids(prefix: str, kind: str, indexes: np.ndarray) -> list:
+    return [f"{prefix}-{kind}-{i:09d}" for i in indexes.tolist()]
+
+def _timestamps(now: np.datetime64, seconds_ago: np.ndarray) -> np.ndarray:
+    return np.datetime_as_string(now - seconds_ago.astype("timedelta64[s]"), unit="s")
+
+def _copy(db, sql: str, lines) -> int:
+    buffer = io.StringIO("".join(lines))
+    cursor = db.connection().connection.driver_connection.cursor()
+    try:
+        cursor.copy_expert(sql, buffer)
+        return cursor.rowcount
+    finally:
+        cursor.close()
+
+def profile_copy_data(run_ids: list, coverage: np.ndarray, quality: np.ndarray) -> bytes:
+    """
+    Binary COPY payload for run_profiles(run_id, coverage_profile, quality_profile), built as
+    one NumPy structured array: each tuple is fixed-width, so the whole chunk is a single
+    tobytes(). Run IDs must share one length.
+    """
+    n, length = coverage.shape
+    width = len(run_ids[0])
+    element = np.dtype([("len", ">i4"), ("val", ">f4")])
+    array_bytes = 20 + length * element.itemsize
+    row = np.dtype([
+        ("fields", ">i2"),
+        ("id_len", ">i4"), ("run_id", f"S{width}"),
+        ("cov_len", ">i4"), ("cov_hdr", ">i4", (5,)), ("cov", element, (length,)),
+        ("q_len", ">i4"), ("q_hdr", ">i4", (5,)), ("q", element, (length,)),
+    ])
+    # ndim, has_nulls, element type, then (size, lower bound) of the one dimension
+    header = [1, 0, FLOAT4_OID, length, 1]
+    rows = np.empty(n, dtype=row)
+    rows["fields"] = 3
+    rows["id_len"] = width
+    rows["run_id"] = run_ids
+    for name, values in (("cov", coverage), ("q", quality)):
+        rows[f"{name}_len"] = array_bytes
+        rows[f"{name}_hdr"] = header
+        rows[name]["len"] = element["val"].itemsize
+        rows[name]["val"] = values
+    return COPY_BINARY_HEADER + rows.tobytes() + COPY_BINARY_TRAILER
+
+def _patients(db, spec, chunk, workers_pool):
+    raw_ids = _ids(spec.prefix, "PT", chunk)
+    encrypted = crypto_manager.encrypt_patient_ids(raw_ids, executor=workers_pool)
+    hashes = [hashlib.md5(pid.encode()).hexdigest() for pid in encrypted]
+    lines = (f"{pid}\t{crypto_manager.blind_index(raw)}\t{h}\n" for raw, pid, h in zip(raw_ids, encrypted, hashes))
+    count = _copy(db, "COPY patients (patient_id, patient_blind_index, patient_hash) FROM STDIN", lines)
+    # Samples reference the stored ciphertexts and carry their patient's hash
+    return count, list(zip(encrypted, hashes))
+
+def _samples(db, spec, plan, chunk, patient_keys, now) -> int:
+    created = _timestamps(now, plan.sample_created[chunk])
+    lines = (
+        f"{sid}\t{patient_keys[p][0]}\t{patient_keys[p][1]}\t{ts}+00\n"
+        for sid, p, ts in zip(_ids(spec.prefix, "SMPL", chunk), plan.sample_patient[chunk].tolist(), created)
+    )
+    return _copy(db, "COPY samples (sample_id, patient_id, patient_hash, created_at) FROM STDIN", lines)
+
+def _runs(db, spec, plan, chunk, rng, now) -> dict:
+    n = len(chunk)
+    run_ids = _ids(spec.prefix, "RUN", chunk)
+    sample_ids = _ids(spec.prefix, "SMPL", plan.run_sample[chunk])
+    created = _timestamps(now, plan.run_created[chunk])
+    assays = ASSAYS[rng.integers(0, len(ASSAYS), n)]
+    sequencers = SEQUENCERS[rng.integers(0, len(SEQUENCERS), n)]
+    qc_passed = np.where(rng.random(n) < 0.9, "true", "false")
+    statuses = STATUSES[rng.choice(len(STATUSES), n, p=[0.85, 0.1, 0.05])]
+    flowcells = rng.integers(0, 100_000, n)
+    extra_keys = np.floor(rng.lognormal(np.log(max(spec.metadata_keys, 1e-9)), spec.metadata_skew, n)).astype(int)
+    extra_values = rng.integers(0, 1_000_000, int(extra_keys.sum()))
+
+    lines, offset = [], 0
+    for i in range(n):
+        extras = "".join(f', "attr_{k}": "v{extra_values[offset + k]}"' for k in range(extra_keys[i]))
+        offset += extra_keys[i]
+        metadata = (
+            f'{{"sequencer": "{sequencers[i]}", "qc_passed": {qc_passed[i]}, "status": "{statuses[i]}", '
+            f'"flowcell": "FAX{flowcells[i]:05d}"{extras}}}'
+        )
+        lines.append(f"{run_ids[i]}\t{sample_ids[i]}\t{assays[i]}\t{metadata}\t{created[i]}+00\n")
+    rows = {"runs": _copy(db, "COPY runs (run_id, sample_id, assay_type, metadata, created_at) FROM STDIN", lines)}
+
+    files = (
+        f"{run_id}\t{file_type}\ts3://synthetic-bucket/{run_id}/{file_type.lower()}\n"
+        for run_id in run_ids for file_type in FILE_TYPES[:spec.files_per_run]
+    )
+    rows["file_locations"] = _copy(db, "COPY file_locations (run_id, file_type, s3_uri) FROM STDIN", files)
+
+    k = spec.results_per_run
+    coverage = np.round(rng.normal(30, 6, n * k), 2)
+    reads = rng.integers(100_000, 50_000_000, n * k)
+    n50 = rng.integers(2_000, 40_000, n * k)
+    results = (
+        f'{run_ids[j // k]}\tv1.{j % k}.0\t{{"mean_coverage": {coverage[j]}, "reads": {reads[j]}, '
+        f'"qc": {{"n50": {n50[j]}, "pass": {qc_passed[j // k]}}}}}\t{created[j // k]}+00\n'
+        for j in range(n * k)
+    )
+    rows["pipeline_results"] = _copy(db, "COPY pipeline_results (run_id, pipeline_version, metrics, run_date) FROM STDIN", results)
+
+    lo, hi = np.searchsorted(plan.run_profiled, [chunk[0], chunk[-1] + 1])
+    profiled = plan.run_profiled[lo:hi] - chunk[0]
+    rows["run_profiles"] = 0
+    if len(profiled):
+        m, length = len(profiled), spec.profile_length
+        # Per-run depth and quality levels with per-position noise, whole matrices at once
+        depth = rng.normal(30, 8, (m, 1))
+        cov = np.clip(np.round(depth + rng.normal(0, 5, (m, length)), 1), 0, None)
+        qual = np.clip(np.round(rng.normal(32, 2, (m, 1)) + rng.normal(0, 3, (m, length)), 1), 10, 40)
+        payload = profile_copy_data([run_ids[i] for i in profiled.tolist()], cov, qual)
+        cursor = db.connection().connection.driver_connection.cursor()
+        try:
+            cursor.copy_expert("COPY run_profiles (run_id, coverage_profile, quality_profile) FROM STDIN WITH (FORMAT binary)", io.BytesIO(payload))
+            rows["run_profiles"] = cursor.rowcount
+        finally:
+            cursor.close()
+    return rows
+
+def generate_dataset(
+    spec: DatasetSpec,
+    chunk_size: int = 50_000,
+    workers: Optional[int] = None,
+    disable_triggers: bool = False,
+    session_factory=SessionLocal,
+) -> GenerateStats:
+    """Loads the dataset in chunked COPYs, one transaction per chunk; `workers` sizes the encryption pool."""
+    stats = GenerateStats()
+    plan = plan_dataset(spec)
+    now = np.datetime64("now", "s")
+    pool = crypto_manager.process_pool(workers) if workers != 1 and spec.patients > chunk_size else None
+    started = time.perf_counter()
+
+    def chunks(total):
+        for start in range(0, total, chunk_size):
+            yield np.arange(start, min(start + chunk_size, total))
+
+    def load(step):
+        db = session_factory()
+        try:
+            if disable_triggers:
+                db.execute(text("SET LOCAL session_replication_role = replica"))
+            result = step(db)
+            db.commit()
+            return result
+        except Exception as e:
+            db.rollback()
+            print(f"Dataset generation failed: {e}")
+            raise
+        finally:
+            db.close()
+
+    def add(rows):
+        for table, count in rows.items():
+            stats.rows[table] = stats.rows.get(table, 0) + count
+
+    try:
+        patient_keys = []
+        for chunk in chunks(spec.patients):
+            count, keys = load(lambda db: _patients(db, spec, chunk, pool))
+            patient_keys.extend(keys)
+            add({"patients": count})
+        for chunk in chunks(spec.samples):
+            add({"samples": load(lambda db: _samples(db, spec, plan, chunk, patient_keys, now))})
+        for index, chunk in enumerate(chunks(spec.runs)):
+            # Seeded per chunk, so a chunk's contents do not depend on what was drawn before it
+            rng = np.random.default_rng([spec.seed, 1, index])
+            add(load(lambda db: _runs(db, spec, plan, chunk, rng, now)))
+    finally:
+        if pool:
+            pool.shutdown()
+    stats.seconds = time.perf_counter() - started
+    return stats
+
+def main():
+    defaults = DatasetSpec()
+    parser = argparse.ArgumentParser(description="Stream a reproducible synthetic dataset into Postgres.")
+    parser.add_argument("--runs", type=int, default=defaults.runs)
+    parser.add_argument("--samples", type=int, help="Default: runs / 4")
+    parser.add_argument("--patients", type=int, help="Default: samples / 2")
+    parser.add_argument("--files-per-run", type=int, default=defaults.files_per_run)
+    parser.add_argument("--results-per-run", type=int, default=defaults.results_per_run)
+    parser.add_argument("--profile-fraction", type=float, default=defaults.profile_fraction)
+    parser.add_argument("--profile-length", type=int, default=defaults.profile_length)
+    parser.add_argument("--run-skew", type=float, default=defaults.run_skew, help="Lognormal sigma of runs per sample")
+    parser.add_argument("--metadata-keys", type=float, default=defaults.metadata_keys, help="Median extra metadata keys per run")
+    parser.add_argument("--metadata-skew", type=float, default=defaults.metadata_skew)
+    parser.add_argument("--seed", type=int, default=defaults.seed)
+    parser.add_argument("--prefix", default=defaults.prefix, help="ID prefix, so several datasets can coexist")
+    parser.add_argument("--chunk-size", type=int, default=50_000, help="Rows per COPY and transaction")
+    parser.add_argument("--workers", type=int, help="Encryption processes (1 = in-process)")
+    parser.add_argument("--disable-triggers", action="store_true", help="Skip row triggers and FK checks (superuser only)")
+    args = parser.parse_args()
+
+    spec = DatasetSpec(
+        runs=args.runs, samples=args.samples, patients=args.patients,
+        files_per_run=args.files_per_run, results_per_run=args.results_per_run,
+        profile_fraction=args.profile_fraction, profile_length=args.profile_length,
+        run_skew=args.run_skew, metadata_keys=args.metadata_keys, metadata_skew=args.metadata_skew,
+        seed=args.seed, prefix=args.prefix,
+    )
+    stats = generate_dataset(spec, chunk_size=args.chunk_size, workers=args.workers, disable_triggers=args.disable_triggers)
+    counts = ", ".join(f"{count} {table}" for table, count in stats.rows.items())
+    print(f"Generated {counts} in {stats.seconds:.1f}s ({stats.runs_per_second:.0f} runs/s).")
+
+if __name__ == "__main__":
+    main()
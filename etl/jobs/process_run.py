@@ -1,5 +1,6 @@
 import uuid
 from sqlalchemy import create_engine
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.orm import sessionmaker
 
 # Import the centralized models instead of redefining them locally
@@ -7,6 +8,29 @@ from etl.etl_models import Patient, Sample, Run, FileLocation
 from etl.security import crypto_manager
 
 from core.database import SessionLocal
+from core.slow_queries import pop_query_labels, push_query_labels
+
+def get_or_create_patient(db, raw_patient_id: str) -> Patient:
+    """
+    Looks the patient up by its blind index (a unique btree probe) and creates it on a miss.
+    The ciphertext itself cannot be matched on: Fernet encrypts the same ID differently every time.
+    """
+    blind_index = crypto_manager.blind_index(raw_patient_id)
+    patient = db.query(Patient).filter_by(patient_blind_index=blind_index).first()
+    if patient:
+        return patient
+
+    patient = Patient(
+        patient_id=crypto_manager.encrypt_patient_id(raw_patient_id),
+        patient_blind_index=blind_index,
+    )
+    try:
+        # A savepoint, so losing a race with a concurrent ingest only undoes this insert
+        with db.begin_nested():
+            db.add(patient)
+    except IntegrityError:
+        patient = db.query(Patient).filter_by(patient_blind_index=blind_index).one()
+    return patient
 
 # 2. The Insertion Logic
 def insert_pipeline_results(sample_id: str, raw_patient_id: str, assay: str, fastq_r1: str, fastq_r2: str):
@@ -14,26 +38,22 @@ def insert_pipeline_results(sample_id: str, raw_patient_id: str, assay: str, fas
     Parses pipeline outputs and inserts them securely into the biological hierarchy.
     """
     
-    # Concept: Encrypt the PHI before it touches the database
-    encrypted_patient_id = crypto_manager.encrypt_patient_id(raw_patient_id)
-    
     # Generate a unique Run ID for this specific sequencing event
     run_id = f"RUN-{uuid.uuid4().hex[:8].upper()}"
     
     db = SessionLocal()
+    # Slow statements captured while the run is written are tagged with its run_id
+    labels = push_query_labels(run_id=run_id)
     
     try:
-        # Step 1: Get or Create the Patient (Top of Hierarchy)
-        patient = db.query(Patient).filter_by(patient_id=encrypted_patient_id).first()
-        if not patient:
-            patient = Patient(patient_id=encrypted_patient_id)
-            db.add(patient)
-            db.flush() # Ensure the DB recognizes it before creating the sample
+        # Step 1: Get or Create the Patient (Top of Hierarchy). The PHI is encrypted before it
+        # touches the database; lookups go through the blind index.
+        patient = get_or_create_patient(db, raw_patient_id)
         
         # Step 2: Get or Create the physical Sample
         sample = db.query(Sample).filter_by(sample_id=sample_id).first()
         if not sample:
-            sample = Sample(sample_id=sample_id, patient_id=encrypted_patient_id)
+            sample = Sample(sample_id=sample_id, patient_id=patient.patient_id)
             db.add(sample)
             db.flush()
             
@@ -65,6 +85,7 @@ def insert_pipeline_results(sample_id: str, raw_patient_id: str, assay: str, fas
         raise
     finally:
         db.close()
+        pop_query_labels(labels)
 
 # Example Execution
 if __name__ == "__main__":
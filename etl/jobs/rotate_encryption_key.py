@@ -0,0 +1,110 @@
+"""
+Re-encrypts every patient ID under the primary (first) key of ENCRYPTION_KEY.
+
+Rotation procedure:
+    1. Prepend the new key to ENCRYPTION_KEY everywhere ("new,old"), so new writes use it and
+       old ciphertexts still decrypt.
+    2. Run this job. It walks patients in primary-key order, a chunk at a time: ciphertexts are
+       rotated across a process pool, then rewritten with one UPDATE per chunk, in its own short
+       transaction. ON UPDATE CASCADE rewrites the owning samples.patient_id in the same statement.
+    3. Once it reports nothing left to rotate, drop the old key from ENCRYPTION_KEY.
+
+The job is resumable: ciphertexts already under the primary key are left alone, so an
+interrupted run can simply be started again (or continued with --after <last patient_id>).
+
+patient_hash is assigned once when a patient is created and samples copy it, so rotation leaves
+GET /patients/{patient_hash} URLs alone; only the ETags of the rewritten rows change, once.
+The blind index is unaffected.
+
+Usage:
+    python -m etl.jobs.rotate_encryption_key --chunk-size 5000 --workers 4
+"""
+import argparse
+import time
+from dataclasses import dataclass
+
+from sqlalchemy import select, text
+
+from etl.etl_models import Patient
+from etl.security import crypto_manager
+
+from core.database import SessionLocal
+
+DEFAULT_CHUNK_SIZE = 5000
+
+# Rows rewritten or deleted since the chunk was read simply match nothing
+ROTATE_CHUNK_SQL = text("""
+    UPDATE patients p
+    SET patient_id = v.new_id
+    FROM unnest(CAST(:old_ids AS text[]), CAST(:new_ids AS text[])) AS v (old_id, new_id)
+    WHERE p.patient_id = v.old_id
+""")
+
+@dataclass
+class RotationStats:
+    scanned: int = 0
+    rotated: int = 0
+    skipped: int = 0  # Ciphertexts no configured key can decrypt
+    chunks: int = 0
+    last_patient_id: str = ""
+    seconds: float = 0.0
+
+def rotate_encryption_key(chunk_size: int = DEFAULT_CHUNK_SIZE, workers: int = None, after: str = "", session_factory=SessionLocal) -> RotationStats:
+    """Rotates all patients after `after` in keyset order. `workers=1` stays in-process."""
+    stats = RotationStats(last_patient_id=after)
+    executor = crypto_manager.process_pool(workers) if workers != 1 else None
+    started = time.perf_counter()
+    try:
+        while True:
+            db = session_factory()
+            try:
+                # Rewritten IDs may sort after the cursor and be read again; they are already
+                # under the primary key by then, so they come back unchanged.
+                batch = db.scalars(
+                    select(Patient.patient_id)
+                    .where(Patient.patient_id > stats.last_patient_id)
+                    .order_by(Patient.patient_id)
+                    .limit(chunk_size)
+                ).all()
+                db.rollback()  # Do not hold the read snapshot while the pool works
+                if not batch:
+                    break
+
+                rotated = crypto_manager.rotate_patient_ids(batch, executor)
+                changed = [(old, new) for old, new in zip(batch, rotated) if new is not None and new != old]
+                if changed:
+                    old_ids, new_ids = map(list, zip(*changed))
+                    stats.rotated += db.execute(ROTATE_CHUNK_SQL, {"old_ids": old_ids, "new_ids": new_ids}).rowcount
+                    db.commit()
+            except Exception as e:
+                db.rollback()
+                print(f"Key rotation failed after patient_id {stats.last_patient_id!r}: {e}")
+                raise
+            finally:
+                db.close()
+
+            stats.scanned += len(batch)
+            stats.skipped += rotated.count(None)
+            stats.chunks += 1
+            stats.last_patient_id = batch[-1]
+    finally:
+        if executor:
+            executor.shutdown()
+    stats.seconds = time.perf_counter() - started
+    return stats
+
+def main():
+    parser = argparse.ArgumentParser(description="Re-encrypt patient IDs under the primary ENCRYPTION_KEY.")
+    parser.add_argument("--chunk-size", type=int, default=DEFAULT_CHUNK_SIZE, help="Patients per transaction")
+    parser.add_argument("--workers", type=int, default=None, help="Encryption processes (default: one per CPU; 1 = in-process)")
+    parser.add_argument("--after", default="", help="Resume after this patient_id")
+    args = parser.parse_args()
+
+    stats = rotate_encryption_key(chunk_size=args.chunk_size, workers=args.workers, after=args.after)
+    print(
+        f"Rotated {stats.rotated} of {stats.scanned} patients in {stats.chunks} chunk(s), {stats.seconds:.1f}s; "
+        f"skipped {stats.skipped} undecryptable rows."
+    )
+
+if __name__ == "__main__":
+    main()
@@ -1,5 +1,6 @@
 import os
 import random
+import secrets
 import uuid
 from cryptography.fernet import Fernet
 
@@ -7,11 +8,14 @@ from cryptography.fernet import Fernet
 if "ENCRYPTION_KEY" not in os.environ:
     os.environ["ENCRYPTION_KEY"] = Fernet.generate_key().decode()
     print(f"Set temporary ENCRYPTION_KEY: {os.environ['ENCRYPTION_KEY']}")
+if "BLIND_INDEX_KEY" not in os.environ:
+    os.environ["BLIND_INDEX_KEY"] = secrets.token_hex(32)
+    print(f"Set temporary BLIND_INDEX_KEY: {os.environ['BLIND_INDEX_KEY']}")
 
 # Import your database session, models, and encryption manager
 from core.database import SessionLocal
-from etl.etl_models import Patient, Sample, Run, FileLocation
-from etl.security import crypto_manager
+from etl.etl_models import Sample, Run, FileLocation, RunProfile
+from etl.jobs.process_run import get_or_create_patient
 
 def generate_synthetic_data(num_runs: int = 50):
     db = SessionLocal()
@@ -30,17 +34,11 @@ def generate_synthetic_data(num_runs: int = 50):
             sample_id = random.choice(samples)
             run_id = f"RUN-{uuid.uuid4().hex[:8].upper()}"
             
-            encrypted_phi = crypto_manager.encrypt_patient_id(raw_patient_id)
-            
-            patient_record = db.query(Patient).filter_by(patient_id=encrypted_phi).first()
-            if not patient_record:
-                patient_record = Patient(patient_id=encrypted_phi)
-                db.add(patient_record)
-                db.flush() 
+            patient_record = get_or_create_patient(db, raw_patient_id)
             
             sample_record = db.query(Sample).filter_by(sample_id=sample_id).first()
             if not sample_record:
-                sample_record = Sample(sample_id=sample_id, patient_id=encrypted_phi)
+                sample_record = Sample(sample_id=sample_id, patient_id=patient_record.patient_id)
                 db.add(sample_record)
                 db.flush()
             
@@ -53,28 +51,24 @@ def generate_synthetic_data(num_runs: int = 50):
                 assay_type=random.choice(assays),
                 metadata_col={
                     "sequencer": random.choice(sequencers),
-                    "qc_passed": random.choice([True, True, True, False]),
-                    "coverage_profile": synthetic_coverage,
-                    "quality_profile": synthetic_quality
+                    "qc_passed": random.choice([True, True, True, False])
                 }
             )
             db.add(run)
             
             db.add_all([
                 FileLocation(run_id=run_id, file_type="FASTQ_ONT", s3_uri=f"s3://my-ont-bucket/runs/{run_id}.fastq.gz"),
-                FileLocation(run_id=run_id, file_type="REFERENCE", s3_uri="s3://my-ont-bucket/refs/hg38.fa")
+                FileLocation(run_id=run_id, file_type="REFERENCE", s3_uri="s3://my-ont-bucket/refs/hg38.fa"),
+                RunProfile(run_id=run_id, coverage_profile=synthetic_coverage, quality_profile=synthetic_quality)
             ])
 
         # --- 2. Generate the 1 "Golden Record" for Testing ---
         golden_run_id = "RUN-VIRAL-TEST"
         golden_sample_id = "SMPL-VIRAL-REAL"
-        golden_phi = crypto_manager.encrypt_patient_id("PT-REAL-VIRAL")
         
         # Create Golden Patient/Sample
-        db.add_all([
-            Patient(patient_id=golden_phi),
-            Sample(sample_id=golden_sample_id, patient_id=golden_phi)
-        ])
+        golden_patient = get_or_create_patient(db, "PT-REAL-VIRAL")
+        db.add(Sample(sample_id=golden_sample_id, patient_id=golden_patient.patient_id))
         db.flush()
         
         db.add(Run(
@@ -1,12 +1,31 @@
+import hashlib
+import hmac
 import os
-from cryptography.fernet import Fernet
+from concurrent.futures import Executor, ProcessPoolExecutor
+from itertools import repeat
+from typing import List, Optional, Sequence
+from cryptography.fernet import Fernet, InvalidToken, MultiFernet
 
 class PHICryptoManager:
-    def __init__(self):
-        key = os.environ.get("ENCRYPTION_KEY")
-        if not key:
+    def __init__(self, keys: Optional[Sequence[str]] = None, index_key: Optional[str] = None):
+        # ENCRYPTION_KEY may hold several comma-separated keys, newest first: new ciphertexts use
+        # the first, and every key can still decrypt. That is what makes rotation possible.
+        if keys is None:
+            keys = [k.strip() for k in os.environ.get("ENCRYPTION_KEY", "").split(",") if k.strip()]
+        if not keys:
             raise ValueError("ENCRYPTION_KEY environment variable is not set.")
-        self.cipher_suite = Fernet(key.encode())
+        self.keys = list(keys)
+        self.cipher_suite = MultiFernet([Fernet(k.encode()) for k in self.keys])
+        self.primary_cipher = Fernet(self.keys[0].encode())
+
+        # Keys the blind index. Kept separate so leaking one key does not expose the other's data.
+        if index_key is None:
+            index_key = os.environ.get("BLIND_INDEX_KEY")
+        if not index_key:
+            raise ValueError("BLIND_INDEX_KEY environment variable is not set.")
+        if index_key in self.keys:
+            raise ValueError("BLIND_INDEX_KEY must differ from ENCRYPTION_KEY.")
+        self.index_key = index_key.encode()
 
     def encrypt_patient_id(self, patient_id: str) -> str:
         """Encrypts a plaintext patient ID into a URL-safe base64-encoded string."""
@@ -20,5 +39,66 @@ class PHICryptoManager:
             return None
         return self.cipher_suite.decrypt(encrypted_patient_id.encode()).decode()
 
+    def rotate_patient_id(self, encrypted_patient_id: str) -> str:
+        """
+        Re-encrypts a ciphertext under the primary key. Ciphertexts already under it come back
+        unchanged, so rotating twice is a no-op. Raises InvalidToken if no key can decrypt it.
+        """
+        if not encrypted_patient_id:
+            return None
+        try:
+            self.primary_cipher.decrypt(encrypted_patient_id.encode())
+            return encrypted_patient_id
+        except InvalidToken:
+            return self.cipher_suite.rotate(encrypted_patient_id.encode()).decode()
+
+    def blind_index(self, patient_id: str) -> str:
+        """
+        Deterministic HMAC-SHA256 of a plaintext patient ID (64 hex chars). Fernet ciphertexts
+        are randomised, so this is what patients are looked up and deduplicated by.
+        """
+        if not patient_id:
+            return None
+        return hmac.new(self.index_key, patient_id.encode(), hashlib.sha256).hexdigest()
+
+    # --- Batch APIs: in-process by default, or fanned out over process_pool() ---
+
+    def process_pool(self, workers: Optional[int] = None) -> ProcessPoolExecutor:
+        """A process pool whose workers hold this manager's keys. Reuse it across batches."""
+        return ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(self.keys, self.index_key.decode()))
+
+    def encrypt_patient_ids(self, patient_ids: Sequence[str], executor: Optional[Executor] = None) -> List[str]:
+        return self._map("encrypt_patient_id", patient_ids, executor)
+
+    def decrypt_patient_ids(self, encrypted_patient_ids: Sequence[str], executor: Optional[Executor] = None) -> List[str]:
+        return self._map("decrypt_patient_id", encrypted_patient_ids, executor)
+
+    def rotate_patient_ids(self, encrypted_patient_ids: Sequence[str], executor: Optional[Executor] = None) -> List[Optional[str]]:
+        """rotate_patient_id() over a batch, with None for ciphertexts no configured key can decrypt."""
+        return self._map("_rotate_or_none", encrypted_patient_ids, executor)
+
+    def _rotate_or_none(self, encrypted_patient_id: str) -> Optional[str]:
+        try:
+            return self.rotate_patient_id(encrypted_patient_id)
+        except InvalidToken:
+            return None
+
+    def _map(self, operation: str, values: Sequence[str], executor: Optional[Executor]) -> list:
+        if executor is None:
+            return list(map(getattr(self, operation), values))
+        # A few chunks per worker: large enough to amortise pickling, small enough to balance
+        size = max(1, -(-len(values) // ((os.cpu_count() or 1) * 4)))
+        chunks = [values[i:i + size] for i in range(0, len(values), size)]
+        return [value for chunk in executor.map(_run_batch, repeat(operation), chunks) for value in chunk]
+
+_worker_manager = None
+
+def _init_worker(keys, index_key):
+    global _worker_manager
+    _worker_manager = PHICryptoManager(keys, index_key)
+
+def _run_batch(operation, values):
+    return list(map(getattr(_worker_manager, operation), values))
+
 # Instantiate a singleton to use across your ETL scripts
-crypto_manager = PHICryptoManager()
\ No newline at end of file
+crypto_manager = PHICryptoManager()
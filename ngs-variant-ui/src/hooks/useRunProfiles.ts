@@ -0,0 +1,14 @@
+import { useQuery } from '@tanstack/react-query';
+import { apiClient } from '../api/client';
+import type { RunProfile } from '../types/api';
+
+export const useRunProfiles = (runId: string) => {
+    return useQuery({
+        queryKey: ['runProfiles', runId],
+        queryFn: async (): Promise<RunProfile> => {
+            const { data } = await apiClient.get(`/runs/${runId}/profiles`);
+            return data;
+        },
+        enabled: !!runId,
+    });
+};
@@ -6,9 +6,11 @@ interface FetchSamplesParams {
     skip?: number;
     limit?: number;
     assay_type?: string;
+    // Relationships to expand; the list page only renders run assay badges
+    include?: string;
 }
 
-export const useSamples = (params: FetchSamplesParams = { skip: 0, limit: 50 }) => {
+export const useSamples = (params: FetchSamplesParams = { skip: 0, limit: 50, include: 'runs' }) => {
     return useQuery({
         queryKey: ['samples', params],
         queryFn: async (): Promise<Sample[]> => {
@@ -1,7 +1,22 @@
 import RunQualityChart from '../components/RunQualityChart';
 import { useParams, Link } from 'react-router-dom';
 import { useSampleDetail } from '../hooks/useSamples';
-// import ReactECharts from 'echarts-for-react'; // Uncomment when ready to build the chart
+import { useRunProfiles } from '../hooks/useRunProfiles';
+
+// Profiles are fetched per run card, only when the chart is actually rendered
+function RunProfileChart({ runId }: { runId: string }) {
+    const { data: profile, isLoading, isError } = useRunProfiles(runId);
+
+    if (isLoading) return <div className="text-gray-400">Loading chart data...</div>;
+    if (isError) return <div className="text-red-600">Failed to load chart data.</div>;
+
+    return (
+        <RunQualityChart
+            coverageData={profile?.coverage_profile}
+            qualityData={profile?.quality_profile}
+        />
+    );
+}
 
 export default function RunDetail() {
     const { sampleId } = useParams<{ sampleId: string }>();
@@ -38,8 +53,6 @@ export default function RunDetail() {
                             <h4 className="text-sm font-medium text-gray-500 mb-4">Run Metadata</h4>
                             <dl className="grid grid-cols-1 gap-x-4 gap-y-6 sm:grid-cols-2 lg:grid-cols-1">
                                 {Object.entries(run.metadata_col)
-                                    // Explicitly filter out the visualization arrays so they don't render as text
-                                    .filter(([key]) => key !== 'coverage_profile' && key !== 'quality_profile')
                                     .map(([key, value]) => (
                                         <div key={key} className="sm:col-span-1">
                                             <dt className="text-sm font-medium text-gray-500 capitalize">{key.replace('_', ' ')}</dt>
@@ -53,10 +66,7 @@ export default function RunDetail() {
                         <div className="lg:col-span-2 lg:border-l lg:border-gray-200 lg:pl-6">
                             <h4 className="text-sm font-medium text-gray-500 mb-4">Quality Metrics</h4>
                             <div className="h-80 w-full bg-white rounded flex items-center justify-center">
-                                <RunQualityChart
-                                    coverageData={run.metadata_col?.coverage_profile}
-                                    qualityData={run.metadata_col?.quality_profile}
-                                />
+                                <RunProfileChart runId={run.run_id} />
                             </div>
                         </div>
                     </div>
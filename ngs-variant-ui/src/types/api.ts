@@ -23,6 +23,13 @@ export interface Run {
     results: PipelineResult[];
 }
 
+// Chart series for a run, fetched on demand from /runs/{run_id}/profiles
+export interface RunProfile {
+    run_id: string;
+    coverage_profile: number[];
+    quality_profile: number[];
+}
+
 // Ensure this specific block exists and is exported
 export interface Sample {
     sample_id: string;
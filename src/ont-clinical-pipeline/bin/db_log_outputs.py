@@ -6,6 +6,9 @@ import argparse
 import psycopg2
 from psycopg2.extras import Json
 
+# Chart series also written to run_profiles (real[]), which the run detail chart reads
+PROFILE_KEYS = ("coverage_profile", "quality_profile")
+
 def main():
     parser = argparse.ArgumentParser(description="Log Nextflow pipeline outputs to PostgreSQL.")
     parser.add_argument("--run", required=True, help="The Run ID")
@@ -21,6 +24,9 @@ def main():
         with open(args.metrics, 'r') as f:
             metrics_data = json.load(f)
 
+    # The result keeps the full metrics file; the chart arrays are copied out, never into runs.metadata
+    profiles = {key: metrics_data[key] for key in PROFILE_KEYS if key in metrics_data}
+
     # Pull connection credentials from environment variables injected by Nextflow secrets
     db_host = os.environ.get("DB_HOST", ValueError("DB_HOST environment variable is not set"))
     db_port = os.environ.get("DB_PORT", ValueError("DB_PORT environment variable is not set"))
@@ -52,24 +58,30 @@ def main():
             Json(metrics_data)
         ))
 
-        # 2. Update the parent run to flag it as complete AND inject chart metrics
+        # 2. Update the parent run to flag it as complete
         update_query = """
             UPDATE runs 
             SET metadata = metadata || %s::jsonb 
             WHERE run_id = %s;
         """
-        
-        # Merge status and metrics
-        updated_metadata = {"status": "complete"}
-        if metrics_data:
-            if "coverage_profile" in metrics_data:
-                updated_metadata["coverage_profile"] = metrics_data["coverage_profile"]
-            if "quality_profile" in metrics_data:
-                updated_metadata["quality_profile"] = metrics_data["quality_profile"]
-        
-        cur.execute(update_query, (json.dumps(updated_metadata), args.run))
+        cur.execute(update_query, (json.dumps({"status": "complete"}), args.run))
+
+        # 3. Store the chart arrays; a series missing from these metrics keeps its previous value
+        if profiles:
+            upsert_query = """
+                INSERT INTO run_profiles (run_id, coverage_profile, quality_profile)
+                VALUES (%s, %s::real[], %s::real[])
+                ON CONFLICT (run_id) DO UPDATE
+                SET coverage_profile = COALESCE(EXCLUDED.coverage_profile, run_profiles.coverage_profile),
+                    quality_profile = COALESCE(EXCLUDED.quality_profile, run_profiles.quality_profile);
+            """
+            cur.execute(upsert_query, (
+                args.run,
+                profiles.get("coverage_profile"),
+                profiles.get("quality_profile")
+            ))
 
-        # Commit the transaction so both the insert and update apply simultaneously
+        # Commit the transaction so all writes apply simultaneously
         conn.commit()
         print(f"Successfully logged pipeline outputs for {args.run}.")
 
@@ -0,0 +1,70 @@
+import pytest
+from sqlalchemy import text
+from sqlalchemy.pool import NullPool
+
+pytest.importorskip("asyncpg")
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+
+from api.main import app
+from api.dependencies import get_session
+from core.database import ASYNC_DATABASE_URL
+
+# ---------------------------------------------------------
+# Test Suite for the asyncpg Session Path
+# ---------------------------------------------------------
+
+SEED_SQL = [
+    "INSERT INTO patients (patient_id) VALUES ('PAT-ASYNC-001')",
+    "INSERT INTO samples (sample_id, patient_id) VALUES ('SAMP-ASYNC-001', 'PAT-ASYNC-001')",
+    """INSERT INTO runs (run_id, sample_id, assay_type, metadata)
+       VALUES ('RUN-ASYNC-001', 'SAMP-ASYNC-001', 'WGS', '{"sequencer": "PromethION 24"}')""",
+]
+
+@pytest.fixture
+def async_client(client):
+    """
+    Routes the samples router through an AsyncSession. The engine, connection and seed
+    transaction are created inside the request's own event loop (asyncpg connections
+    cannot cross loops) and rolled back once the request completes.
+    """
+    async def override_get_session():
+        engine = create_async_engine(ASYNC_DATABASE_URL, poolclass=NullPool)
+        try:
+            async with engine.connect() as connection:
+                transaction = await connection.begin()
+                session = AsyncSession(bind=connection)
+                for statement in SEED_SQL:
+                    await session.execute(text(statement))
+                try:
+                    yield session
+                finally:
+                    await session.close()
+                    await transaction.rollback()
+        finally:
+            await engine.dispose()
+
+    app.dependency_overrides[get_session] = override_get_session
+    yield client
+    app.dependency_overrides.pop(get_session, None)
+
+def test_get_single_sample_on_async_session(async_client):
+    """Ensure the full eager-loaded tree resolves on asyncpg without lazy-load errors."""
+    response = async_client.get("/samples/SAMP-ASYNC-001")
+    
+    assert response.status_code == 200
+    data = response.json()
+    assert data["runs"][0]["metadata_col"]["sequencer"] == "PromethION 24"
+    assert data["runs"][0]["files"] == []
+
+def test_list_samples_on_async_session(async_client):
+    """Ensure sparse expansions (noload relationships) also work on the async path."""
+    response = async_client.get("/samples/?include=runs&fields=sample_id,runs.assay_type")
+    
+    assert response.status_code == 200
+    assert {"sample_id": "SAMP-ASYNC-001", "runs": [{"assay_type": "WGS"}]} in response.json()
+
+def test_missing_sample_on_async_session(async_client):
+    """Ensure 404 handling is unchanged on the async path."""
+    response = async_client.get("/samples/SAMP-DOES-NOT-EXIST")
+    
+    assert response.status_code == 404
@@ -0,0 +1,171 @@
+import time
+import uuid
+import pytest
+from sqlalchemy import text
+
+from api.cache import SampleCache, SampleChangeListener, SAMPLE_CHANGED_CHANNEL
+from core.database import engine
+
+# ---------------------------------------------------------
+# Test Suite for the NOTIFY-invalidated Sample Cache
+# ---------------------------------------------------------
+
+def _active_cache(max_size: int) -> SampleCache:
+    cache = SampleCache(max_size)
+    cache.active.set()
+    return cache
+
+def _wait_for(predicate, timeout: float = 5.0) -> bool:
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if predicate():
+            return True
+        time.sleep(0.05)
+    return False
+
+def test_cache_evicts_least_recently_used():
+    """Ensure the cache stays bounded and evicts the coldest entry first."""
+    cache = _active_cache(2)
+    cache.put("A", "a", cache.generation)
+    cache.put("B", "b", cache.generation)
+    cache.get("A")  # Touch A so B becomes the eviction candidate
+    cache.put("C", "c", cache.generation)
+    
+    assert len(cache) == 2
+    assert cache.get("B") is None
+    assert cache.get("A") == "a"
+
+def test_cache_rejects_fill_that_raced_an_invalidation():
+    """Ensure a read that overlapped a NOTIFY is not cached, since it may be stale."""
+    cache = _active_cache(10)
+    generation = cache.generation
+    cache.invalidate("A")
+    
+    assert cache.put("A", "stale", generation) is False
+    assert cache.get("A") is None
+
+def test_cache_inactive_without_listener():
+    """Ensure nothing is served or stored while no listener is connected."""
+    cache = SampleCache(10)
+    
+    assert cache.put("A", "a", cache.generation) is False
+    assert cache.get("A") is None
+
+@pytest.fixture
+def listening_cache():
+    cache = SampleCache(10)
+    listener = SampleChangeListener(
+        cache,
+        engine.url.translate_connect_args(username="user", database="dbname"),
+        poll_interval=0.05,
+    )
+    listener.start()
+    assert _wait_for(cache.active.is_set), "Listener never connected"
+    yield cache
+    listener.stop()
+    listener.join(timeout=2)
+
+def test_listener_evicts_on_notify(listening_cache):
+    """Ensure a NOTIFY on the channel evicts exactly the named sample."""
+    listening_cache.put("SAMP-NOTIFY-1", "cached", listening_cache.generation)
+    listening_cache.put("SAMP-NOTIFY-2", "cached", listening_cache.generation)
+    
+    with engine.connect() as conn:
+        conn.execute(text("SELECT pg_notify(:channel, 'SAMP-NOTIFY-1')"), {"channel": SAMPLE_CHANGED_CHANNEL})
+        conn.commit()
+    
+    assert _wait_for(lambda: listening_cache.get("SAMP-NOTIFY-1") is None)
+    assert listening_cache.get("SAMP-NOTIFY-2") == "cached"
+
+def test_child_table_trigger_notifies_owning_sample(listening_cache):
+    """Ensure committed writes to a run's child tables are traced back to the owning sample."""
+    suffix = uuid.uuid4().hex[:8].upper()
+    patient_id, sample_id, run_id = f"PAT-{suffix}", f"SAMP-{suffix}", f"RUN-{suffix}"
+    generation = listening_cache.generation
+    
+    with engine.begin() as conn:
+        conn.execute(text("INSERT INTO patients (patient_id) VALUES (:p)"), {"p": patient_id})
+        conn.execute(text("INSERT INTO samples (sample_id, patient_id) VALUES (:s, :p)"), {"s": sample_id, "p": patient_id})
+        conn.execute(text("INSERT INTO runs (run_id, sample_id, assay_type) VALUES (:r, :s, 'WGS')"), {"r": run_id, "s": sample_id})
+    try:
+        # Let the notification for the seed inserts drain before caching the sample
+        assert _wait_for(lambda: listening_cache.generation > generation)
+        listening_cache.put(sample_id, "cached", listening_cache.generation)
+        
+        with engine.begin() as conn:
+            conn.execute(
+                text("INSERT INTO pipeline_results (run_id, pipeline_version) VALUES (:r, 'v1.0.0')"),
+                {"r": run_id},
+            )
+        
+        assert _wait_for(lambda: listening_cache.get(sample_id) is None)
+    finally:
+        with engine.begin() as conn:
+            conn.execute(text("DELETE FROM patients WHERE patient_id = :p"), {"p": patient_id})
+
+def test_single_sample_served_from_cache(client, db_session, monkeypatch):
+    """Ensure a full-tree lookup is cached on first read and refreshed after invalidation."""
+    from api.routers import samples as samples_router
+    cache = _active_cache(10)
+    monkeypatch.setattr(samples_router, "sample_cache", cache)
+    
+    db_session.execute(text("""
+        INSERT INTO patients (patient_id) VALUES ('PAT-CACHE-001');
+        INSERT INTO samples (sample_id, patient_id) VALUES ('SAMP-CACHE-001', 'PAT-CACHE-001');
+        INSERT INTO runs (run_id, sample_id, assay_type) VALUES ('RUN-CACHE-001', 'SAMP-CACHE-001', 'WGS');
+    """))
+    assert client.get("/samples/SAMP-CACHE-001").json()["runs"][0]["assay_type"] == "WGS"
+    
+    # Change the row behind the cache's back: the cached tree is still served
+    db_session.execute(text("UPDATE runs SET assay_type = 'RNA-Seq' WHERE run_id = 'RUN-CACHE-001'"))
+    assert client.get("/samples/SAMP-CACHE-001").json()["runs"][0]["assay_type"] == "WGS"
+    
+    # Once the sample is invalidated, the next read goes back to the database
+    cache.invalidate("SAMP-CACHE-001")
+    assert client.get("/samples/SAMP-CACHE-001").json()["runs"][0]["assay_type"] == "RNA-Seq"
+
+def test_listener_marks_changed_samples_for_replica_routing():
+    """Ensure announced samples are flagged for primary reads, and everything is while disconnected."""
+    from core.replicas import RecentChanges
+    changes = RecentChanges(window=0.2)
+    listener = SampleChangeListener(
+        SampleCache(0),
+        engine.url.translate_connect_args(username="user", database="dbname"),
+        poll_interval=0.05,
+        changes=changes,
+    )
+    listener.start()
+    try:
+        assert _wait_for(changes.watching.is_set), "Listener never connected"
+        assert _wait_for(lambda: "SAMP-ROUTE-1" not in changes)  # The post-connect window lapses
+
+        with engine.connect() as conn:
+            conn.execute(text("SELECT pg_notify(:channel, 'SAMP-ROUTE-1')"), {"channel": SAMPLE_CHANGED_CHANNEL})
+            conn.commit()
+
+        assert _wait_for(lambda: "SAMP-ROUTE-1" in changes)
+        assert "SAMP-ROUTE-2" not in changes
+    finally:
+        listener.stop()
+        listener.join(timeout=2)
+    assert "SAMP-ROUTE-2" in changes
+
+def test_recently_changed_sample_is_read_from_primary(client, db_session, monkeypatch):
+    """Ensure a sample the primary just announced is neither read from nor cached off a replica."""
+    from api.routers import samples as samples_router
+    from core.replicas import RecentChanges
+    changes = RecentChanges(window=60)
+    changes.watching.set()
+    changes.mark("SAMP-CACHE-002")
+    pinned = []
+    monkeypatch.setattr(samples_router, "recent_changes", changes)
+    monkeypatch.setattr(samples_router, "use_primary", pinned.append)
+
+    db_session.execute(text("""
+        INSERT INTO patients (patient_id) VALUES ('PAT-CACHE-002');
+        INSERT INTO samples (sample_id, patient_id) VALUES ('SAMP-CACHE-002', 'PAT-CACHE-002');
+    """))
+    client.get("/samples/SAMP-CACHE-001")
+    assert pinned == []
+    assert client.get("/samples/SAMP-CACHE-002").status_code == 200
+    assert pinned == [db_session]
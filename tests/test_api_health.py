@@ -0,0 +1,84 @@
+import time
+
+from sqlalchemy.exc import OperationalError
+
+from api import health
+from core.pool import TimedQueuePool
+
+# ---------------------------------------------------------
+# Test Suite for the Health and Readiness Endpoints
+# ---------------------------------------------------------
+
+def test_health_pings_database(client):
+    """Ensure /health reports a real round trip and its latency."""
+    response = client.get("/health")
+
+    assert response.status_code == 200
+    data = response.json()
+    assert data["status"] == "healthy" and data["database"] == "connected"
+    assert data["latency_ms"] >= 0
+
+def test_health_deadline_exceeded(client, monkeypatch):
+    """Ensure a database slower than the deadline is reported instead of hanging the probe."""
+    monkeypatch.setattr(health, "DB_HEALTH_TIMEOUT", 0.05)
+    monkeypatch.setattr(health, "_ping_sync", lambda: time.sleep(0.5))
+
+    started = time.perf_counter()
+    response = client.get("/health")
+
+    assert time.perf_counter() - started < 0.4
+    assert response.status_code == 503
+    assert response.json() == {"status": "unhealthy", "database": "timeout"}
+
+def test_health_database_unreachable(client, monkeypatch):
+    """Ensure connection failures surface as 503 rather than a 500 traceback."""
+    def refuse():
+        raise OperationalError("SELECT 1", {}, Exception("connection refused"))
+    monkeypatch.setattr(health, "_ping_sync", refuse)
+
+    response = client.get("/health")
+
+    assert response.status_code == 503
+    assert response.json()["database"] == "unreachable"
+
+def test_ready_reports_pool(client):
+    """Ensure /ready exposes pool usage and checkout wait telemetry."""
+    response = client.get("/ready")
+
+    assert response.status_code == 200
+    pool = response.json()["pool"]
+    assert {"pool_size", "max_overflow", "checked_out", "overflow", "checkout_wait_ms_total", "checkout_wait_ms_avg", "checkout_wait_ms_max"} <= set(pool)
+    assert pool["saturated"] is False
+
+def test_ready_saturated_pool(client, monkeypatch):
+    """Ensure a pool with every connection checked out asks the load balancer to drain."""
+    pool = TimedQueuePool(lambda: object(), pool_size=1, max_overflow=0, timeout=0.01)
+    monkeypatch.setattr(health, "api_pool", lambda: pool)
+    held = pool.connect()
+    try:
+        response = client.get("/ready")
+    finally:
+        held.close()
+
+    assert response.status_code == 503
+    assert response.json()["status"] == "saturated"
+    assert response.json()["pool"]["checked_out"] == 1
+
+def test_ready_lists_replicas(client, monkeypatch):
+    """Ensure configured replicas are reported with their ejection state."""
+    from sqlalchemy import create_engine
+    from core.pool import pool_options
+    from core.replicas import ReplicaSet
+
+    replica = create_engine("postgresql+psycopg2://u:p@replica-1:5433/db", **pool_options(TimedQueuePool))
+    replica_set = ReplicaSet([replica])
+    replica_set.eject(replica)
+    monkeypatch.setattr(health, "api_replicas", lambda: replica_set)
+
+    response = client.get("/ready")
+
+    assert response.status_code == 200
+    [status] = response.json()["replicas"]
+    assert status["host"] == "replica-1:5433"
+    assert status["ejected"] is True
+    assert status["pool"]["checked_out"] == 0
@@ -0,0 +1,81 @@
+import re
+
+import pytest
+from sqlalchemy import event, text
+
+# ---------------------------------------------------------
+# Test Suite for Per-Request SQL Instrumentation
+# ---------------------------------------------------------
+
+SERVER_TIMING = re.compile(r'^db;dur=[\d.]+;desc="(\d+) queries, (\d+) rows", total;dur=[\d.]+$')
+
+@pytest.fixture
+def seed_sample(db_session):
+    db_session.execute(text("""
+        INSERT INTO patients (patient_id) VALUES ('PAT-MET-001');
+        INSERT INTO samples (sample_id, patient_id) VALUES ('SAMP-MET-001', 'PAT-MET-001');
+        INSERT INTO runs (run_id, sample_id, assay_type, metadata) VALUES
+        ('RUN-MET-001', 'SAMP-MET-001', 'WGS', '{}'),
+        ('RUN-MET-002', 'SAMP-MET-001', 'WGS', '{}');
+    """))
+    db_session.flush()
+
+def _histogram_count(client, name, route):
+    body = client.get("/metrics").text
+    match = re.search(rf'^{name}_count{{method="GET",route="{re.escape(route)}"}} ([\d.]+)$', body, re.MULTILINE)
+    return float(match.group(1)) if match else 0.0
+
+def test_server_timing_counts_request_queries(client, db_session, seed_sample):
+    """Ensure Server-Timing reports exactly the statements and rows the request executed."""
+    statements = []
+    engine = db_session.get_bind().engine
+    listener = lambda conn, cursor, statement, *args: statements.append(statement)
+    event.listen(engine, "before_cursor_execute", listener)
+    try:
+        response = client.get("/samples/SAMP-MET-001?include=runs")
+    finally:
+        event.remove(engine, "before_cursor_execute", listener)
+
+    assert response.status_code == 200
+    queries, rows = SERVER_TIMING.match(response.headers["Server-Timing"]).groups()
+    assert int(queries) == len(statements) == 3
+    # ETag aggregate (1) + sample (1) + its runs (2)
+    assert int(rows) == 4
+
+def test_server_timing_without_database(client):
+    """Ensure requests that never touch the database report zero queries."""
+    response = client.get("/ready")
+
+    assert SERVER_TIMING.match(response.headers["Server-Timing"]).groups() == ("0", "0")
+
+def test_metrics_histograms_labelled_by_route_template(client, seed_sample):
+    """Ensure requests are observed under the route template, never the concrete path."""
+    before = _histogram_count(client, "api_request_queries", "/samples/{sample_id}")
+    client.get("/samples/SAMP-MET-001")
+    client.get("/samples/SAMP-DOES-NOT-EXIST")
+
+    assert _histogram_count(client, "api_request_queries", "/samples/{sample_id}") == before + 2
+    body = client.get("/metrics").text
+    assert "SAMP-MET-001" not in body
+    for name in ("api_request_duration_seconds", "api_request_db_duration_seconds", "api_request_rows"):
+        assert f'{name}_bucket{{le="+Inf",method="GET",route="/samples/{{sample_id}}"}}' in body
+
+def test_metrics_unmatched_paths_share_one_label(client):
+    """Ensure unknown paths cannot grow the label set without bound."""
+    before = _histogram_count(client, "api_request_duration_seconds", "unmatched")
+    assert client.get("/no/such/path").status_code == 404
+
+    assert _histogram_count(client, "api_request_duration_seconds", "unmatched") == before + 1
+
+def test_failed_statements_leave_no_timing_state(db_session):
+    """Ensure statements that raise, and so skip after_cursor_execute, leave nothing on the pooled connection."""
+    from api.metrics import instrument_sql
+    from sqlalchemy.exc import ProgrammingError
+    instrument_sql()
+    connection = db_session.connection()
+
+    for _ in range(3):
+        with pytest.raises(ProgrammingError), connection.begin_nested():
+            connection.execute(text("SELECT missing_column"))
+
+    assert "query_start_time" not in connection.info
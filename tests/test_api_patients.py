@@ -0,0 +1,87 @@
+import hashlib
+
+import pytest
+from sqlalchemy import event, text
+
+# ---------------------------------------------------------
+# Test Suite for the Patients Router
+# ---------------------------------------------------------
+
+PATIENT_HASH = hashlib.md5(b"PAT-PTREE-001").hexdigest()
+
+@pytest.fixture
+def seed_patient(db_session):
+    """One patient with two samples, three runs and a result on one of them."""
+    db_session.execute(text("""
+        INSERT INTO patients (patient_id) VALUES ('PAT-PTREE-001'), ('PAT-PTREE-002');
+        INSERT INTO samples (sample_id, patient_id, created_at) VALUES
+        ('SAMP-PTREE-001', 'PAT-PTREE-001', '2026-01-01'),
+        ('SAMP-PTREE-002', 'PAT-PTREE-001', '2026-01-02'),
+        ('SAMP-PTREE-003', 'PAT-PTREE-002', '2026-01-03');
+        INSERT INTO runs (run_id, sample_id, assay_type, metadata) VALUES
+        ('RUN-PTREE-001', 'SAMP-PTREE-001', 'WGS', '{}'),
+        ('RUN-PTREE-002', 'SAMP-PTREE-002', 'WGS', '{}'),
+        ('RUN-PTREE-003', 'SAMP-PTREE-002', 'RNA-Seq', '{}');
+        INSERT INTO pipeline_results (run_id, pipeline_version, metrics) VALUES
+        ('RUN-PTREE-002', 'v1.2.0', '{"mean_coverage": 30}');
+    """))
+    db_session.flush()
+
+def _get(client, db_session, path, **kwargs):
+    statements = []
+    engine = db_session.get_bind().engine
+    listener = lambda conn, cursor, statement, *args: statements.append(statement)
+    event.listen(engine, "before_cursor_execute", listener)
+    try:
+        response = client.get(path, **kwargs)
+    finally:
+        event.remove(engine, "before_cursor_execute", listener)
+    return response, statements
+
+def test_get_patient_tree(client, db_session, seed_patient):
+    """Ensure the whole patient->samples->runs tree comes back in one request with bounded queries."""
+    response, statements = _get(client, db_session, f"/patients/{PATIENT_HASH}")
+
+    assert response.status_code == 200
+    data = response.json()
+    assert data["patient_hash"] == PATIENT_HASH
+    assert [s["sample_id"] for s in data["samples"]] == ["SAMP-PTREE-001", "SAMP-PTREE-002"]
+    assert all(s["patient_hash"] == PATIENT_HASH for s in data["samples"])
+    runs = {run["run_id"]: run for s in data["samples"] for run in s["runs"]}
+    assert set(runs) == {"RUN-PTREE-001", "RUN-PTREE-002", "RUN-PTREE-003"}
+    assert runs["RUN-PTREE-002"]["results"][0]["metrics"] == {"mean_coverage": 30}
+    # ETag aggregate, patient, then one selectinload each for samples, runs, files, results, endpoints
+    assert len(statements) == 7
+
+def test_get_patient_uses_stored_hash(db_session, seed_patient):
+    """Ensure the views project the stored hash column rather than hashing per row."""
+    definition = db_session.execute(text("SELECT pg_get_viewdef('frontend_samples')")).scalar_one()
+    row = db_session.execute(text(
+        "SELECT patient_hash FROM frontend_samples WHERE sample_id = 'SAMP-PTREE-003'"
+    )).scalar_one()
+
+    assert "md5" not in definition
+    assert row == hashlib.md5(b"PAT-PTREE-002").hexdigest()
+
+def test_get_patient_not_found(client):
+    """Ensure an unknown hash is a 404 and a malformed one is rejected outright."""
+    missing = client.get(f"/patients/{'0' * 32}")
+    malformed = client.get("/patients/PAT-PTREE-001")
+
+    assert missing.status_code == 404
+    assert missing.json()["detail"] == f"Patient {'0' * 32} not found"
+    assert malformed.status_code == 422
+
+def test_get_patient_conditional_get(client, db_session, seed_patient):
+    """Ensure a matching If-None-Match is a 304 until anything in the tree changes."""
+    etag = client.get(f"/patients/{PATIENT_HASH}").headers["ETag"]
+
+    cached, statements = _get(client, db_session, f"/patients/{PATIENT_HASH}", headers={"If-None-Match": etag})
+    assert cached.status_code == 304
+    assert len(statements) == 1
+
+    db_session.execute(text("UPDATE pipeline_results SET metrics = '{}' WHERE run_id = 'RUN-PTREE-002'"))
+    db_session.flush()
+    changed = client.get(f"/patients/{PATIENT_HASH}", headers={"If-None-Match": etag})
+    assert changed.status_code == 200
+    assert changed.headers["ETag"] != etag
@@ -0,0 +1,100 @@
+import pytest
+from fastapi.testclient import TestClient
+
+pytest.importorskip("pyinstrument")
+
+from api import profiling
+from api.main import create_app
+from api.profiling import PROFILE_ID_HEADER, ProfilerMiddleware
+from core.database import get_db
+
+# ---------------------------------------------------------
+# Test Suite for Opt-in Request Profiling
+# ---------------------------------------------------------
+
+HEADERS = {"X-API-Key": "test_api_key_123"}
+
+@pytest.fixture
+def make_client(db_session, tmp_path, monkeypatch):
+    """Builds an app with the given profiling settings, storing profiles under tmp_path."""
+    monkeypatch.setattr(profiling.profile_store, "directory", tmp_path)
+
+    def make(token: str = "", sample_rate: float = 0.0, keep: int = 50) -> TestClient:
+        monkeypatch.setattr(profiling, "PROFILE_TOKEN", token)
+        monkeypatch.setattr(profiling, "PROFILE_SAMPLE_RATE", sample_rate)
+        monkeypatch.setattr(profiling.profile_store, "keep", keep)
+        app = create_app()
+        app.dependency_overrides[get_db] = lambda: db_session
+        return TestClient(app, headers=HEADERS)
+
+    return make
+
+def test_profiler_not_installed_when_disabled(make_client):
+    """Ensure the samples router pays nothing for profiling unless it is configured."""
+    client = make_client()
+
+    assert ProfilerMiddleware not in [middleware.cls for middleware in client.app.user_middleware]
+    assert PROFILE_ID_HEADER not in client.get("/samples/").headers
+
+def test_header_profiles_request_including_worker_threads(make_client):
+    """Ensure X-Profile stores a call tree covering both the event loop and the SQL worker thread."""
+    client = make_client(token="profile-secret")
+
+    response = client.get("/samples/", params={"limit": 5}, headers={"X-Profile": "profile-secret"})
+
+    assert response.status_code == 200
+    profile_id = response.headers[PROFILE_ID_HEADER]
+    [listed] = client.get("/profiles/").json()
+    assert listed["id"] == profile_id
+    assert listed["route"] == "/samples/" and listed["status"] == 200 and listed["trigger"] == "header"
+
+    tree = client.get(f"/profiles/{profile_id}", params={"format": "text"}).text
+    assert "_unit_of_work" in tree and "list_samples" in tree
+    speedscope = client.get(f"/profiles/{profile_id}", params={"format": "speedscope"})
+    assert speedscope.headers["content-type"] == "application/json"
+    assert "speedscope" in speedscope.json()["$schema"]
+    assert client.get(f"/profiles/{profile_id}").headers["content-type"].startswith("text/html")
+
+def test_wrong_token_is_not_profiled(make_client):
+    """Ensure the header only works with the configured token."""
+    client = make_client(token="profile-secret")
+
+    response = client.get("/samples/", headers={"X-Profile": "guess"})
+
+    assert PROFILE_ID_HEADER not in response.headers
+    assert client.get("/profiles/").json() == []
+
+def test_unauthenticated_request_is_not_profiled(make_client):
+    """Ensure requests the API key check rejects never reach the profile ring, even with the token."""
+    client = make_client(token="profile-secret", sample_rate=1.0)
+
+    response = client.get("/samples/", headers={"X-API-Key": "wrong", "X-Profile": "profile-secret"})
+
+    assert response.status_code == 401
+    assert PROFILE_ID_HEADER not in response.headers
+    assert client.get("/profiles/").json() == []
+
+def test_sampling_skips_probes(make_client):
+    """Ensure sampled profiling covers API routes but never health probes or the profile endpoints."""
+    client = make_client(sample_rate=1.0)
+
+    assert PROFILE_ID_HEADER in client.get("/samples/").headers
+    assert PROFILE_ID_HEADER not in client.get("/ready").headers
+    [listed] = client.get("/profiles/").json()
+    assert listed["trigger"] == "sampled"
+
+def test_profile_ring_is_bounded(make_client, tmp_path):
+    """Ensure only the newest PROFILE_KEEP profiles stay on disk."""
+    client = make_client(token="profile-secret", keep=2)
+
+    ids = [client.get("/samples/", headers={"X-Profile": "profile-secret"}).headers[PROFILE_ID_HEADER] for _ in range(3)]
+
+    assert [profile["id"] for profile in client.get("/profiles/").json()] == ids[:0:-1]
+    assert len(list(tmp_path.glob("*.pyisession"))) == 2
+
+def test_unknown_profile_is_404(make_client):
+    """Ensure malformed or missing profile IDs never reach the filesystem."""
+    client = make_client(token="profile-secret")
+
+    assert client.get("/profiles/..%2F..%2Fetc%2Fpasswd").status_code == 404
+    assert client.get("/profiles/20260101T000000000000-deadbeef").status_code == 404
@@ -1,5 +1,10 @@
+import csv
+import io
+import json
 import pytest
-from sqlalchemy import text
+from sqlalchemy import event, text
+
+from api.metadata_filters import parse_filter
 
 # ---------------------------------------------------------
 # Test Suite for FastAPI Samples Router (REQ-API-01)
@@ -81,6 +86,232 @@ def test_list_samples_pagination(client, seed_samples):
     
     assert response_limit.json()[0]["sample_id"] != response_skip.json()[0]["sample_id"]
 
+def test_list_samples_cursor_pagination(client, seed_samples):
+    """Ensure keyset pages chain through the X-Next-Cursor header without repeating rows."""
+    first_page = client.get("/samples/?limit=1")
+    assert first_page.status_code == 200
+    cursor = first_page.headers["X-Next-Cursor"]
+    
+    second_page = client.get(f"/samples/?limit=1&cursor={cursor}")
+    assert second_page.status_code == 200
+    assert len(second_page.json()) == 1
+    
+    # Both seeded samples share a created_at, so the sample_id tie-breaker must order them
+    assert first_page.json()[0]["sample_id"] == "SAMP-TEST-002"
+    assert second_page.json()[0]["sample_id"] == "SAMP-TEST-001"
+
+def test_list_samples_cursor_last_page(client, seed_samples):
+    """Ensure a partially filled page signals the end of the keyset walk by omitting the cursor."""
+    response = client.get("/samples/?limit=100")
+    
+    assert response.status_code == 200
+    assert "X-Next-Cursor" not in response.headers
+
+def test_list_samples_invalid_cursor(client):
+    """Ensure a tampered cursor is rejected instead of reaching the database."""
+    response = client.get("/samples/?cursor=not-a-real-cursor")
+    
+    assert response.status_code == 400
+    assert response.json()["detail"] == "Invalid pagination cursor"
+
+def test_list_samples_cursor_and_skip_rejected(client, seed_samples):
+    """Ensure offset and keyset pagination cannot be mixed in one request."""
+    cursor = client.get("/samples/?limit=1").headers["X-Next-Cursor"]
+    response = client.get(f"/samples/?skip=1&cursor={cursor}")
+    
+    assert response.status_code == 400
+
+def test_get_single_sample_include_runs_only(client, db_session, seed_samples):
+    """Ensure include=runs skips the file/result/endpoint loaders and omits them from the payload."""
+    statements = []
+    engine = db_session.get_bind().engine
+    listener = lambda conn, cursor, statement, *args: statements.append(statement)
+    event.listen(engine, "before_cursor_execute", listener)
+    try:
+        response = client.get("/samples/SAMP-TEST-001?include=runs")
+    finally:
+        event.remove(engine, "before_cursor_execute", listener)
+    
+    assert response.status_code == 200
+    run = response.json()["runs"][0]
+    assert run["assay_type"] == "WGS"
+    assert "files" not in run and "results" not in run and "endpoints" not in run
+    # The ETag aggregate, then one query for the sample and one for its runs
+    assert len(statements) == 3
+
+def test_get_single_sample_nested_include_implies_parent(client, seed_samples):
+    """Ensure expanding runs.results also expands the runs it hangs off."""
+    response = client.get("/samples/SAMP-TEST-001?include=runs.results")
+    
+    assert response.status_code == 200
+    run = response.json()["runs"][0]
+    assert run["results"] == []
+    assert "files" not in run
+
+def test_list_samples_sparse_fields(client, seed_samples):
+    """Ensure fields= trims each level down to the requested scalar fields."""
+    response = client.get("/samples/?include=runs&fields=sample_id,runs.assay_type")
+    
+    assert response.status_code == 200
+    for sample in response.json():
+        assert set(sample) == {"sample_id", "runs"}
+        assert all(set(run) == {"assay_type"} for run in sample["runs"])
+
+def test_list_samples_empty_include(client, seed_samples):
+    """Ensure an empty include returns only the sample rows themselves."""
+    response = client.get("/samples/?include=")
+    
+    assert response.status_code == 200
+    assert all("runs" not in sample for sample in response.json())
+
+def test_list_samples_sparse_fields_keep_cursor(client, seed_samples):
+    """Ensure the keyset cursor header survives the sparse serialization path."""
+    response = client.get("/samples/?limit=1&include=&fields=sample_id")
+    
+    assert response.status_code == 200
+    assert response.json() == [{"sample_id": "SAMP-TEST-002"}]
+    assert "X-Next-Cursor" in response.headers
+
+def test_search_metadata_promoted_keys_match_like_containment(client, db_session, seed_cohort):
+    """Ensure eq/in on a promoted key match exactly what they match on a non-promoted key holding the same JSON value."""
+    db_session.execute(text("""
+        UPDATE runs SET metadata = metadata || '{"sequencer": 7, "cohort": 7, "status": true, "batch": true}'
+        WHERE run_id = 'RUN-COH-004'
+    """))
+
+    for promoted, plain in (("sequencer", "cohort"), ("status", "batch")):
+        for value in ("7", "true", "7,true"):
+            op = "in" if "," in value else "eq"
+            assert _search_ids(client, f"filter={promoted}:{op}:{value}") == _search_ids(client, f"filter={plain}:{op}:{value}") == []
+    assert _search_ids(client, "filter=sequencer:eq:GridION") == _search_ids(client, "key=sequencer&value=GridION") == ["SAMP-COH-002"]
+
+@pytest.mark.parametrize("query, detail", [
+    ("include=patients", "Unknown include path 'patients'"),
+    ("fields=runs.bogus", "Unknown field 'runs.bogus'"),
+    ("include=&fields=runs.assay_type", "Field 'runs.assay_type' requires include=runs"),
+])
+def test_invalid_expansion_rejected(client, query, detail):
+    """Ensure unknown or unexpanded paths are rejected with a descriptive 400."""
+    response = client.get(f"/samples/?{query}")
+    
+    assert response.status_code == 400
+    assert response.json()["detail"] == detail
+
+def test_get_single_sample_conditional_get(client, db_session, seed_samples):
+    """Ensure a matching If-None-Match yields 304 until something in the sample's subtree changes."""
+    first = client.get("/samples/SAMP-TEST-001")
+    etag = first.headers["ETag"]
+    
+    cached = client.get("/samples/SAMP-TEST-001", headers={"If-None-Match": etag})
+    assert cached.status_code == 304
+    assert cached.content == b""
+    
+    # A new pipeline result rolls up run -> sample updated_at through the touch triggers
+    db_session.execute(text("INSERT INTO pipeline_results (run_id, pipeline_version) VALUES ('RUN-TEST-001', 'v2.0.0')"))
+    refreshed = client.get("/samples/SAMP-TEST-001", headers={"If-None-Match": etag})
+    assert refreshed.status_code == 200
+    assert refreshed.headers["ETag"] != etag
+    assert refreshed.json()["runs"][0]["results"][0]["pipeline_version"] == "v2.0.0"
+
+def test_get_single_sample_etag_varies_with_shape(client, seed_samples):
+    """Ensure sparse representations never share an ETag with the full tree."""
+    full = client.get("/samples/SAMP-TEST-001").headers["ETag"]
+    sparse = client.get("/samples/SAMP-TEST-001?include=runs").headers["ETag"]
+    
+    assert full != sparse
+
+def test_list_samples_conditional_get(client, db_session, seed_samples):
+    """Ensure list pages are revalidated against the aggregate of their samples' updated_at."""
+    first = client.get("/samples/?limit=10")
+    etag = first.headers["ETag"]
+    
+    assert client.get("/samples/?limit=10", headers={"If-None-Match": f'W/{etag}'}).status_code == 304
+    
+    db_session.execute(text("UPDATE runs SET metadata = metadata || '{\"status\": \"complete\"}' WHERE run_id = 'RUN-TEST-002'"))
+    assert client.get("/samples/?limit=10", headers={"If-None-Match": etag}).status_code == 200
+
+def test_export_samples_ndjson(client, db_session, seed_samples):
+    """Ensure the export streams one JSON document per run, with results folded in."""
+    db_session.execute(text("""
+        INSERT INTO pipeline_results (run_id, pipeline_version, metrics)
+        VALUES ('RUN-TEST-001', 'v1.2.0', '{"coverage_depth": "45x"}')
+    """))
+    response = client.get("/samples/export")
+    
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("application/x-ndjson")
+    rows = {row["run_id"]: row for row in map(json.loads, response.text.splitlines())}
+    assert set(rows) == {"RUN-TEST-001", "RUN-TEST-002"}
+    assert rows["RUN-TEST-001"]["sample_id"] == "SAMP-TEST-001"
+    assert rows["RUN-TEST-001"]["metadata"]["sequencer"] == "NovaSeq 6000"
+    assert rows["RUN-TEST-001"]["results"][0]["metrics"] == {"coverage_depth": "45x"}
+    assert rows["RUN-TEST-002"]["results"] == []
+    assert "patient_id" not in rows["RUN-TEST-001"]
+
+def test_export_samples_csv_with_assay_filter(client, seed_samples):
+    """Ensure CSV exports honour the same assay_type filter as list_samples."""
+    response = client.get("/samples/export?format=csv&assay_type=RNA-Seq")
+    
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/csv")
+    rows = list(csv.DictReader(io.StringIO(response.text)))
+    assert len(rows) == 1
+    assert rows[0]["run_id"] == "RUN-TEST-002"
+    assert json.loads(rows[0]["metadata"])["sequencer"] == "MiSeq"
+    assert json.loads(rows[0]["results"]) == []
+
+def test_export_samples_rejects_unknown_format(client):
+    """Ensure only the supported export formats are accepted."""
+    response = client.get("/samples/export?format=xlsx")
+    
+    assert response.status_code == 422
+
+def _batch_statements(client, db_session, sample_ids, query=""):
+    statements = []
+    engine = db_session.get_bind().engine
+    listener = lambda conn, cursor, statement, *args: statements.append(statement)
+    event.listen(engine, "before_cursor_execute", listener)
+    try:
+        response = client.post(f"/samples/batch{query}", json={"sample_ids": sample_ids})
+    finally:
+        event.remove(engine, "before_cursor_execute", listener)
+    assert response.status_code == 200, response.text
+    return response.json(), statements
+
+def test_sample_batch_keyed_with_missing(client, db_session, seed_samples):
+    """Ensure a batch returns full trees keyed by ID in request order and lists unknown IDs."""
+    data, _ = _batch_statements(client, db_session, ["SAMP-TEST-002", "SAMP-NOPE", "SAMP-TEST-001", "SAMP-TEST-002"])
+
+    assert list(data["samples"]) == ["SAMP-TEST-002", "SAMP-TEST-001"]
+    assert data["samples"]["SAMP-TEST-001"]["runs"][0]["assay_type"] == "WGS"
+    assert data["samples"]["SAMP-TEST-001"]["runs"][0]["files"] == []
+    assert data["missing"] == ["SAMP-NOPE"]
+
+def test_sample_batch_query_count_is_constant(client, db_session, seed_samples):
+    """Ensure the eager loads are shared: one sample query plus one per relationship, whatever the batch size."""
+    _, single = _batch_statements(client, db_session, ["SAMP-TEST-001"])
+    _, several = _batch_statements(client, db_session, ["SAMP-TEST-001", "SAMP-TEST-002", "SAMP-NOPE"])
+
+    assert len(single) == len(several) == 5
+    assert "= ANY (" in several[0]
+
+def test_sample_batch_sparse_fields(client, db_session, seed_samples):
+    """Ensure include/fields shape each batched sample like the single-sample lookup."""
+    data, statements = _batch_statements(client, db_session, ["SAMP-TEST-001", "SAMP-NOPE"], "?include=runs&fields=sample_id,runs.run_id")
+
+    sample = {"sample_id": "SAMP-TEST-001", "runs": [{"run_id": "RUN-TEST-001"}]}
+    assert data == {"samples": {"SAMP-TEST-001": sample}, "missing": ["SAMP-NOPE"]}
+    assert len(statements) == 2
+
+@pytest.mark.parametrize("body", [
+    {"sample_ids": []},
+    {"sample_ids": [f"SAMP-{i}" for i in range(101)]},
+    {},
+])
+def test_sample_batch_rejects_invalid_size(client, body):
+    """Ensure empty and oversized batches are rejected before touching the database."""
+    assert client.post("/samples/batch", json=body).status_code == 422
+
 def test_search_samples_by_metadata_success(client, seed_samples):
     """Ensure the JSONB search query correctly hunts through the schema-less column on the nested run."""
     response = client.get("/samples/search/metadata?key=sequencer&value=NovaSeq 6000")
@@ -99,6 +330,117 @@ def test_search_samples_by_metadata_no_results(client, seed_samples):
     assert response.status_code == 200
     assert response.json() == []
 
+@pytest.fixture
+def seed_cohort(db_session):
+    """Runs with typed metadata for the multi-predicate search."""
+    db_session.execute(text("""
+        INSERT INTO patients (patient_id) VALUES ('PAT-COH-001');
+        INSERT INTO samples (sample_id, patient_id, created_at) VALUES
+        ('SAMP-COH-001', 'PAT-COH-001', '2026-01-03'),
+        ('SAMP-COH-002', 'PAT-COH-001', '2026-01-02'),
+        ('SAMP-COH-003', 'PAT-COH-001', '2026-01-01');
+
+        INSERT INTO runs (run_id, sample_id, assay_type, metadata) VALUES
+        ('RUN-COH-001', 'SAMP-COH-001', 'ONT_WGS', '{"sequencer": "PromethION 24", "qc_passed": true, "mean_coverage": 31.5, "cohort": "C1"}'),
+        ('RUN-COH-002', 'SAMP-COH-002', 'ONT_WGS', '{"sequencer": "PromethION 24", "qc_passed": false, "mean_coverage": 40, "cohort": "C1"}'),
+        ('RUN-COH-003', 'SAMP-COH-002', 'ONT_WGS', '{"sequencer": "GridION", "qc_passed": true, "mean_coverage": 28, "cohort": "C1"}'),
+        ('RUN-COH-004', 'SAMP-COH-003', 'ONT_WGS', '{"sequencer": "MinION Mk1B", "qc_passed": true, "mean_coverage": "n/a", "cohort": "C1", "note": "rerun"}');
+    """))
+    db_session.flush()
+
+def _search_ids(client, query):
+    response = client.get(f"/samples/search/metadata?{query}")
+    assert response.status_code == 200, response.text
+    return [sample["sample_id"] for sample in response.json()]
+
+def test_search_metadata_cohort_predicates_match_one_run(client, seed_cohort):
+    """Ensure every predicate must hold on the same run, not spread across a sample's runs."""
+    query = "filter=sequencer:eq:PromethION 24&filter=qc_passed:bool:true&filter=mean_coverage:gt:25"
+    
+    assert _search_ids(client, query) == ["SAMP-COH-001"]
+
+@pytest.mark.parametrize("query, expected", [
+    ("filter=sequencer:in:GridION,MinION Mk1B", ["SAMP-COH-002", "SAMP-COH-003"]),
+    ("filter=note:exists", ["SAMP-COH-003"]),
+    ("filter=qc_passed:bool:false", ["SAMP-COH-002"]),
+    # The string "n/a" is skipped by numeric comparisons instead of raising a cast error
+    ("filter=mean_coverage:gte:28&filter=cohort:eq:C1", ["SAMP-COH-001", "SAMP-COH-002"]),
+    ("filter=mean_coverage:lt:30", ["SAMP-COH-002"]),
+    ("key=cohort&value=C1&filter=mean_coverage:lte:31.5", ["SAMP-COH-001", "SAMP-COH-002"]),
+])
+def test_search_metadata_operators(client, seed_cohort, query, expected):
+    """Ensure each operator filters as documented and results come back newest first."""
+    assert _search_ids(client, query) == expected
+
+def test_search_metadata_legacy_key_may_contain_colons(client, db_session, seed_cohort):
+    """Ensure the legacy key/value pair matches keys containing ':' literally instead of reparsing them."""
+    db_session.execute(text("""UPDATE runs SET metadata = metadata || '{"lims:batch": "B7:2"}' WHERE run_id = 'RUN-COH-003'"""))
+
+    assert _search_ids(client, "key=lims:batch&value=B7:2") == ["SAMP-COH-002"]
+    assert _search_ids(client, "key=lims&value=batch:B7:2") == []
+
+def test_search_metadata_cursor_pagination(client, seed_cohort):
+    """Ensure search results page through the keyset cursor without gaps or repeats."""
+    first = client.get("/samples/search/metadata?filter=cohort:eq:C1&limit=2")
+    cursor = first.headers["X-Next-Cursor"]
+    second = client.get(f"/samples/search/metadata?filter=cohort:eq:C1&limit=2&cursor={cursor}")
+    
+    assert [s["sample_id"] for s in first.json()] == ["SAMP-COH-001", "SAMP-COH-002"]
+    assert [s["sample_id"] for s in second.json()] == ["SAMP-COH-003"]
+    assert "X-Next-Cursor" not in second.headers
+
+@pytest.mark.parametrize("query, expected", [
+    ("sequencer=PromethION 24&qc_passed=true", ["SAMP-COH-001"]),
+    ("qc_passed=false", ["SAMP-COH-002"]),
+    ("sequencer=GridION&assay_type=ONT_WGS", ["SAMP-COH-002"]),
+    ("sequencer=GridION&qc_passed=false", []),
+])
+def test_list_samples_promoted_metadata_filters(client, seed_cohort, query, expected):
+    """Ensure the promoted run columns filter list_samples, all holding on the same run."""
+    response = client.get(f"/samples/?{query}")
+
+    assert response.status_code == 200
+    assert [sample["sample_id"] for sample in response.json()] == expected
+
+def test_promoted_columns_follow_metadata(db_session, seed_cohort):
+    """Ensure the generated columns track metadata writes and NULL out mistyped values."""
+    db_session.execute(text("""
+        UPDATE runs SET metadata = metadata || '{"status": "complete", "qc_passed": "yes"}'
+        WHERE run_id = 'RUN-COH-001'
+    """))
+    row = db_session.execute(text(
+        "SELECT sequencer, qc_passed, status FROM frontend_runs WHERE run_id = 'RUN-COH-001'"
+    )).one()
+
+    assert tuple(row) == ("PromethION 24", None, "complete")
+
+def test_search_metadata_promoted_keys_use_columns():
+    """Ensure eq/in/bool on promoted keys compile to the generated columns, not JSONB containment."""
+    compiled = [str(parse_filter(raw)) for raw in ("sequencer:eq:GridION", "status:in:a,b", "qc_passed:bool:true")]
+
+    assert compiled[0].startswith("frontend_runs.sequencer =")
+    assert compiled[1].startswith("frontend_runs.status IN")
+    assert compiled[2].startswith("frontend_runs.qc_passed =")
+    assert "@>" in str(parse_filter("cohort:eq:C1"))
+
+@pytest.mark.parametrize("query, detail", [
+    ("", "At least one metadata filter is required"),
+    ("key=sequencer", "key and value must be provided together"),
+    ("filter=sequencer", "Invalid metadata filter 'sequencer'"),
+    ("filter=sequencer:like:Grid", "Invalid metadata filter 'sequencer:like:Grid'"),
+    ("filter=sequencer:eq", "Metadata filter 'sequencer:eq' requires a value"),
+    ("filter=note:exists:yes", "Metadata filter 'note:exists:yes' does not take a value"),
+    ("filter=qc_passed:bool:maybe", "Metadata filter 'qc_passed:bool:maybe' requires true or false"),
+    ("filter=mean_coverage:gt:high", "Metadata filter 'mean_coverage:gt:high' requires a numeric value"),
+    ("filter=mean_coverage:gt:NaN", "Metadata filter 'mean_coverage:gt:NaN' requires a numeric value"),
+])
+def test_search_metadata_invalid_filters(client, query, detail):
+    """Ensure malformed predicates are rejected with a 400 before touching the database."""
+    response = client.get(f"/samples/search/metadata?{query}")
+    
+    assert response.status_code == 400
+    assert response.json()["detail"] == detail
+
 def test_api_key_missing():
     """Ensure that completely omitting the API key is caught."""
     from fastapi.testclient import TestClient
@@ -0,0 +1,55 @@
+import pytest
+from sqlalchemy import text
+
+# ---------------------------------------------------------
+# Test Suite for the Runs Router (chart profiles)
+# ---------------------------------------------------------
+
+@pytest.fixture
+def seed_profiles(db_session):
+    """One run with stored chart profiles and one without."""
+    db_session.execute(text("""
+        INSERT INTO patients (patient_id) VALUES ('PAT-PROF-001');
+        INSERT INTO samples (sample_id, patient_id) VALUES ('SAMP-PROF-001', 'PAT-PROF-001');
+        INSERT INTO runs (run_id, sample_id, assay_type, metadata) VALUES
+        ('RUN-PROF-001', 'SAMP-PROF-001', 'ONT_WGS', '{"sequencer": "PromethION 24"}'),
+        ('RUN-PROF-002', 'SAMP-PROF-001', 'ONT_WGS', '{"sequencer": "GridION"}');
+        INSERT INTO run_profiles (run_id, coverage_profile, quality_profile) VALUES
+        ('RUN-PROF-001', '{30, 31.5, 0.1}', '{32, 33}');
+    """))
+    db_session.flush()
+
+def test_get_run_profiles(client, seed_profiles):
+    """Ensure the stored real[] series come back as plain float lists."""
+    response = client.get("/runs/RUN-PROF-001/profiles")
+    
+    assert response.status_code == 200
+    assert response.json() == {
+        "run_id": "RUN-PROF-001",
+        "coverage_profile": [30.0, 31.5, 0.1],
+        "quality_profile": [32.0, 33.0],
+    }
+
+def test_get_run_profiles_without_profiles(client, seed_profiles):
+    """Ensure a run that never had profiles logged returns empty series rather than a 404."""
+    response = client.get("/runs/RUN-PROF-002/profiles")
+    
+    assert response.status_code == 200
+    assert response.json()["coverage_profile"] == []
+    assert response.json()["quality_profile"] == []
+
+def test_get_run_profiles_not_found(client):
+    """Ensure an unknown run returns a 404."""
+    response = client.get("/runs/RUN-DOES-NOT-EXIST/profiles")
+    
+    assert response.status_code == 404
+    assert response.json()["detail"] == "Run RUN-DOES-NOT-EXIST not found"
+
+def test_sample_tree_excludes_profiles(client, seed_profiles):
+    """Ensure the chart arrays are not part of the sample responses."""
+    response = client.get("/samples/SAMP-PROF-001")
+    
+    assert response.status_code == 200
+    for run in response.json()["runs"]:
+        assert "coverage_profile" not in run["metadata_col"]
+        assert "coverage_profile" not in run
@@ -0,0 +1,112 @@
+from datetime import datetime, timedelta, timezone
+
+import pytest
+from sqlalchemy import text
+
+from api.expansion import Expansion, parse_fields, parse_include
+from api.models import FrontendSample, FrontendRun, FileLocation, PipelineResult, ApiEndpoint
+from api.serialization import encode_samples, encode_validated
+
+# ---------------------------------------------------------
+# Test Suite for the Opt-in Fast Response Serializer
+# ---------------------------------------------------------
+
+def _expansion(include=None, fields=None) -> Expansion:
+    paths = parse_include(include)
+    return Expansion(paths, parse_fields(fields, paths))
+
+def _sample(metrics: dict) -> FrontendSample:
+    """A transient tree exercising every timestamp flavour the drivers can hand back."""
+    run = FrontendRun(
+        run_id="RUN-SER-001",
+        sample_id="SAMP-SER-001",
+        assay_type="ONT_WGS",
+        metadata_col={"sequencer": "PromethION 24", "note": "Ünïcödé ✓ \x01", "qc_passed": True, "flowcell": {"pores": [1, 2]}},
+        created_at=datetime(2026, 1, 2, 3, 4, 5, 678, tzinfo=timezone.utc),
+        updated_at=datetime(2026, 1, 2, 3, 4, 5, tzinfo=timezone(timedelta(hours=-5))),
+    )
+    run.files = [FileLocation(id=1, file_type="FASTQ_ONT", s3_uri="s3://bucket/a.fastq.gz", created_at=datetime(2026, 1, 2))]
+    run.results = [PipelineResult(id=7, clinical_report_json_uri=None, pipeline_version="v1.2.0", metrics=metrics, run_date=None)]
+    run.endpoints = [ApiEndpoint(id=3, service_name="lims", endpoint_url="https://lims.example/runs/1", method="GET", created_at=None)]
+    sample = FrontendSample(sample_id="SAMP-SER-001", patient_hash="a" * 32, created_at=datetime(2026, 1, 1, tzinfo=timezone.utc), updated_at=None)
+    sample.runs = [run]
+    return sample
+
+@pytest.mark.parametrize("metrics", [
+    {"mean_coverage": 31.5, "reads": 1200000, "gc": 1e-05, "tiny": 5e-324, "zero": 0.0, "neg": -0.0, "near": 9999999999999998.0},
+    # Positive exponents and >64-bit integers are formatted differently by orjson and must fall back
+    {"huge": 1e16},
+    {"big_int": 10 ** 20},
+    # Exponent-like text inside a string only triggers the slower re-encode
+    {"note": "gain e12, offset e3]", "nan": float("nan")},
+])
+@pytest.mark.parametrize("include, fields", [
+    (None, None),
+    ("runs", None),
+    ("runs.results", "sample_id,runs.run_id,runs.results.metrics"),
+    ("", "patient_hash,sample_id"),
+])
+def test_encode_matches_response_model_bytes(metrics, include, fields):
+    """Ensure the fast encoder is byte-identical to the response_model encoding for every shape."""
+    expansion = _expansion(include, fields)
+    spec = expansion.serialization_include()
+    sample = _sample(metrics)
+
+    assert encode_samples(sample, spec) == encode_validated(sample, spec)
+    assert encode_samples([sample, sample], spec) == encode_validated([sample, sample], spec)
+
+def test_serialization_include_follows_schema_order():
+    """Ensure sparse fields are emitted in schema order regardless of request order."""
+    spec = _expansion("runs", "runs.assay_type,sample_id,runs.run_id").serialization_include()
+
+    assert list(spec) == ["sample_id", "runs"]
+    assert list(spec["runs"]["__all__"]) == ["run_id", "assay_type"]
+
+@pytest.mark.parametrize("path", [
+    "/samples/",
+    "/samples/?include=runs.results&fields=sample_id,runs.run_id,runs.results.metrics",
+    "/samples/SAMP-FAST-001",
+    "/samples/SAMP-FAST-001?include=runs",
+    "/samples/search/metadata?key=sequencer&value=NovaSeq%206000",
+])
+def test_router_fast_serializer_is_byte_identical(client, db_session, monkeypatch, path):
+    """Ensure enabling API_FAST_SERIALIZER changes nothing on the wire."""
+    db_session.execute(text("""
+        INSERT INTO patients (patient_id) VALUES ('PAT-FAST-001');
+        INSERT INTO samples (sample_id, patient_id) VALUES ('SAMP-FAST-001', 'PAT-FAST-001');
+        INSERT INTO runs (run_id, sample_id, assay_type, metadata) VALUES
+        ('RUN-FAST-001', 'SAMP-FAST-001', 'WGS', '{"sequencer": "NovaSeq 6000", "lanes": [1, 2], "yield_gb": 1.5e-5, "bases": 3.2e17}');
+        INSERT INTO pipeline_results (run_id, pipeline_version, metrics) VALUES
+        ('RUN-FAST-001', 'v1.2.0', '{"mean_coverage": 31.25, "reads": 1200000}');
+    """))
+    db_session.flush()
+    from api import expansion as expansion_module
+
+    reference = client.get(path)
+    monkeypatch.setattr(expansion_module, "FAST_SERIALIZER_ENABLED", True)
+    fast = client.get(path)
+
+    assert reference.status_code == fast.status_code == 200
+    assert fast.content == reference.content
+    assert fast.headers["content-type"] == "application/json"
+    assert fast.headers.get("ETag") == reference.headers.get("ETag")
+
+@pytest.mark.parametrize("query", ["", "?include=runs&fields=sample_id,runs.run_id"])
+def test_batch_fast_serializer_is_byte_identical(client, db_session, monkeypatch, query):
+    """Ensure the spliced batch envelope matches the response_model encoding byte for byte."""
+    db_session.execute(text("""
+        INSERT INTO patients (patient_id) VALUES ('PAT-FAST-002');
+        INSERT INTO samples (sample_id, patient_id) VALUES ('SAMP-FAST-002', 'PAT-FAST-002'), ('SAMP-FAST-003', 'PAT-FAST-002');
+        INSERT INTO runs (run_id, sample_id, assay_type, metadata) VALUES
+        ('RUN-FAST-002', 'SAMP-FAST-002', 'WGS', '{"sequencer": "NovaSeq 6000", "yield_gb": 2.5}');
+    """))
+    db_session.flush()
+    from api import expansion as expansion_module
+    body = {"sample_ids": ["SAMP-FAST-003", "SAMP-NOPE", "SAMP-FAST-002"]}
+
+    reference = client.post(f"/samples/batch{query}", json=body)
+    monkeypatch.setattr(expansion_module, "FAST_SERIALIZER_ENABLED", True)
+    fast = client.post(f"/samples/batch{query}", json=body)
+
+    assert reference.status_code == fast.status_code == 200
+    assert fast.content == reference.content
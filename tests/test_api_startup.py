@@ -0,0 +1,78 @@
+import json
+import os
+import subprocess
+import sys
+from concurrent.futures import ThreadPoolExecutor
+
+from fastapi.testclient import TestClient
+from sqlalchemy.exc import OperationalError
+
+import api.main
+from core import database
+
+# ---------------------------------------------------------
+# Test Suite for App Startup and Lazy Engine Creation
+# ---------------------------------------------------------
+
+# Generous enough for a cold CI runner; a regression (e.g. connecting at import) blows well past it
+IMPORT_BUDGET_SECONDS = float(os.environ.get("API_IMPORT_BUDGET_SECONDS", "2.5"))
+
+IMPORT_PROBE = """
+import json, sys, time
+started = time.perf_counter()
+import api.main
+elapsed = time.perf_counter() - started
+from core import database
+print(json.dumps({"seconds": elapsed, "initialized": database.is_initialized(), "asyncpg": "asyncpg" in sys.modules}))
+"""
+
+def test_api_import_is_cheap_and_needs_no_credentials():
+    """Ensure importing the app stays within budget, creates no engine and needs no DB credentials."""
+    env = {key: value for key, value in os.environ.items() if key not in ("DB_USER", "DB_PASSWORD")}
+    env["DB_ASYNC"] = "true"
+    probe = subprocess.run(
+        [sys.executable, "-c", IMPORT_PROBE],
+        cwd=os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+        env=env, capture_output=True, text=True, check=True,
+    )
+    result = json.loads(probe.stdout)
+
+    assert result["initialized"] is False
+    assert result["asyncpg"] is False
+    assert result["seconds"] < IMPORT_BUDGET_SECONDS, f"api.main imported in {result['seconds']:.2f}s"
+
+def test_database_initialized_once_per_process():
+    """Ensure concurrent first uses all get the same engines."""
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        instances = set(map(id, pool.map(lambda _: database.init_database(), range(16))))
+
+    assert len(instances) == 1
+    assert database.engine is database.init_database().engine
+
+def test_lifespan_warms_pool(monkeypatch):
+    """Ensure each worker opens its configured warm connections before serving."""
+    calls = []
+    monkeypatch.setattr(api.main, "warm_up", lambda connections: calls.append(connections))
+    monkeypatch.setattr(api.main, "DB_POOL_WARMUP", 3)
+
+    with TestClient(api.main.create_app()) as client:
+        assert client.get("/ready").status_code == 200
+
+    assert calls == [3]
+
+def test_lifespan_survives_failed_warm_up(monkeypatch):
+    """Ensure an unreachable database at boot is logged rather than crashing the worker."""
+    def refuse(connections):
+        raise OperationalError("SELECT 1", {}, Exception("connection refused"))
+    monkeypatch.setattr(api.main, "warm_up", refuse)
+
+    with TestClient(api.main.create_app()) as client:
+        assert client.get("/ready").status_code == 200
+
+def test_warm_up_leaves_connections_pooled():
+    """Ensure warm_up returns every connection it opened to the pool."""
+    pool = database.engine.pool
+    database.warm_up(2)
+
+    assert pool.checkedout() == 0
+    assert pool.checkedin() >= 2
@@ -2,7 +2,7 @@ import pytest
 from unittest.mock import MagicMock, patch
 
 # This imports the module, which triggers the URL construction and engine creation
-from core.database import get_db, DATABASE_URL
+from core.database import get_db, get_async_db, DATABASE_URL, ASYNC_DATABASE_URL
 
 # ---------------------------------------------------------
 # Test Suite for ETL Database Connection Manager
@@ -14,6 +14,19 @@ def test_database_url_construction():
     # Verifies the user fallback or env var injection worked
     assert "etl_worker" in DATABASE_URL 
 
+def test_async_database_url_construction():
+    """Ensure the asyncpg URL targets the same database and role as the sync engine."""
+    assert ASYNC_DATABASE_URL.startswith("postgresql+asyncpg://")
+    assert ASYNC_DATABASE_URL.split("://")[1] == DATABASE_URL.split("://")[1]
+
+@patch("core.database.AsyncSessionLocal", None)
+def test_get_async_db_requires_opt_in():
+    """Ensure the async dependency fails loudly instead of silently when DB_ASYNC is off."""
+    import asyncio
+    
+    with pytest.raises(RuntimeError, match="DB_ASYNC"):
+        asyncio.run(get_async_db().__anext__())
+
 @patch("core.database.SessionLocal")
 def test_get_db_yields_and_closes(mock_session_local):
     """Ensure the generator yields a session and cleanly closes it afterward."""
@@ -38,6 +51,36 @@ def test_get_db_yields_and_closes(mock_session_local):
     # 5. Assert the finally block successfully executed
     mock_session.close.assert_called_once()
 
+@patch("core.database.SessionLocal")
+def test_get_db_sessions_survive_commit(mock_session_local):
+    """Ensure API sessions keep their loaded objects when run_query commits after a query."""
+    next(get_db())
+
+    mock_session_local.assert_called_once_with(expire_on_commit=False)
+
+def test_run_query_releases_connection():
+    """Ensure a sync unit of work hands its connection back to the pool, even when it fails."""
+    import asyncio
+    from sqlalchemy import create_engine, text
+    from sqlalchemy.exc import ProgrammingError
+    from sqlalchemy.orm import Session
+    from api.dependencies import run_query
+    from tests.conftest import TEST_DATABASE_URL
+
+    engine = create_engine(TEST_DATABASE_URL, pool_size=1, max_overflow=0)
+    db = Session(bind=engine, expire_on_commit=False)
+    try:
+        assert asyncio.run(run_query(db, lambda session: session.execute(text("SELECT 1")).scalar())) == 1
+        assert engine.pool.checkedout() == 0
+
+        with pytest.raises(ProgrammingError):
+            asyncio.run(run_query(db, lambda session: session.execute(text("SELECT missing_column"))))
+        assert engine.pool.checkedout() == 0
+        assert asyncio.run(run_query(db, lambda session: session.execute(text("SELECT 2")).scalar())) == 2
+    finally:
+        db.close()
+        engine.dispose()
+
 @patch("core.database.SessionLocal")
 def test_get_db_closes_on_exception(mock_session_local):
     """Ensure the finally block triggers even if the ETL worker crashes."""
@@ -54,4 +97,30 @@ def test_get_db_closes_on_exception(mock_session_local):
         pass
         
     # The finally block MUST still execute to prevent memory leaks and zombie connections
-    mock_session.close.assert_called_once()
\ No newline at end of file
+    mock_session.close.assert_called_once()
+
+def test_engine_uses_configured_timed_pool():
+    """Ensure the engine is built with the environment-driven pool settings."""
+    from core.database import engine
+    from core.pool import DB_POOL_SIZE, DB_POOL_TIMEOUT, TimedQueuePool
+    
+    assert isinstance(engine.pool, TimedQueuePool)
+    assert engine.pool.size() == DB_POOL_SIZE
+    assert engine.pool._timeout == DB_POOL_TIMEOUT
+
+def test_checkout_timer_records_waits_and_timeouts():
+    """Ensure checkouts that exhaust pool_timeout are timed and counted as timeouts."""
+    from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+    from core.pool import TimedQueuePool, pool_status
+    
+    pool = TimedQueuePool(lambda: MagicMock(), pool_size=1, max_overflow=0, timeout=0.05)
+    held = pool.connect()
+    with pytest.raises(PoolTimeoutError):
+        pool.connect()
+    held.close()
+    
+    status = pool_status(pool)
+    assert status["checkouts"] == 2
+    assert status["checkout_timeouts"] == 1
+    assert status["checkout_wait_ms_max"] >= 50
+    assert status["checked_out"] == 0 and status["saturated"] is False
@@ -0,0 +1,127 @@
+import time
+
+import pytest
+from sqlalchemy import create_engine, insert, select, text
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.orm import Session
+
+from core.replicas import RecentChanges, ReplicaSet, RoutingSession, use_primary
+from etl.etl_models import Patient
+from tests.conftest import TEST_DATABASE_URL, engine as primary
+
+# ---------------------------------------------------------
+# Test Suite for Read-Replica Routing
+# ---------------------------------------------------------
+
+# Nothing listens on port 1, so connecting fails immediately
+UNREACHABLE_URL = TEST_DATABASE_URL.replace(":5432/", ":1/")
+
+def test_replicas_round_robin():
+    """Ensure healthy replicas take turns."""
+    first, second = create_engine(TEST_DATABASE_URL), create_engine(TEST_DATABASE_URL)
+    replica_set = ReplicaSet([first, second])
+
+    assert [replica_set.pick() for _ in range(4)] == [first, second, first, second]
+
+def test_unreachable_replica_is_ejected_then_readmitted():
+    """Ensure a replica that fails to connect leaves the rotation until its ejection lapses."""
+    dead, healthy = create_engine(UNREACHABLE_URL), create_engine(TEST_DATABASE_URL)
+    replica_set = ReplicaSet([dead, healthy], eject_seconds=0.2)
+
+    with pytest.raises(OperationalError):
+        dead.connect()
+
+    assert replica_set.is_ejected(dead)
+    assert {replica_set.pick() for _ in range(4)} == {healthy}
+    time.sleep(0.25)
+    assert not replica_set.is_ejected(dead)
+
+def test_all_replicas_ejected_falls_back_to_primary():
+    """Ensure reads keep working on the primary when no replica is available."""
+    dead = create_engine(UNREACHABLE_URL)
+    replica_set = ReplicaSet([dead])
+    replica_set.eject(dead)
+    session = RoutingSession(primary=primary, replicas=replica_set)
+
+    assert replica_set.pick() is None
+    assert session.execute(text("SELECT 1")).scalar_one() == 1
+    assert session.get_bind() is primary
+    session.close()
+
+def test_routing_session_reads_replica_and_writes_primary():
+    """Ensure reads stick to one replica and a write pins the rest of the transaction to the primary."""
+    first, second = create_engine(TEST_DATABASE_URL), create_engine(TEST_DATABASE_URL)
+    session = RoutingSession(primary=primary, replicas=ReplicaSet([first, second]))
+
+    reads = {session.get_bind(clause=select(Patient)) for _ in range(3)}
+    assert reads == {first}
+    assert session.get_bind(clause=insert(Patient)) is primary
+    assert session.get_bind(clause=select(Patient)) is primary
+
+def test_recent_changes_expire_after_window():
+    """Ensure announced samples count as changed for the staleness window only."""
+    changes = RecentChanges(window=0.2)
+    changes.watching.set()
+    changes.mark("SAMP-A")
+
+    assert "SAMP-A" in changes and "SAMP-B" not in changes
+    time.sleep(0.25)
+    changes.mark("SAMP-B")
+    assert "SAMP-A" not in changes and "SAMP-B" in changes
+    assert len(changes._changed) == 1  # Expired entries are pruned
+
+def test_recent_changes_assume_everything_changed_while_unwatched():
+    """Ensure reads fall back to the primary while no listener sees the announcements, and just after it connects."""
+    changes = RecentChanges(window=0.2)
+    assert "SAMP-A" in changes
+
+    changes.watching.set()
+    changes.mark_all()
+    assert "SAMP-A" in changes
+    time.sleep(0.25)
+    assert "SAMP-A" not in changes
+    assert "SAMP-A" not in RecentChanges(window=0)  # Window 0 disables the fallback
+
+def test_use_primary_pins_routing_session():
+    """Ensure a session reads the primary for the rest of its life once pinned, sync or async."""
+    replica = create_engine(TEST_DATABASE_URL)
+    session = RoutingSession(primary=primary, replicas=ReplicaSet([replica]))
+
+    use_primary(session)
+
+    assert session.get_bind(clause=select(Patient)) is primary
+    session.commit()
+    assert session.get_bind(clause=select(Patient)) is primary
+    use_primary(Session())  # Plain sessions are left alone
+    session.close()
+
+def test_write_pins_only_its_transaction():
+    """Ensure reads return to the session's replica once the writing transaction ends."""
+    replica = create_engine(TEST_DATABASE_URL)
+    session = RoutingSession(primary=primary, replicas=ReplicaSet([replica]))
+
+    assert session.get_bind(clause=insert(Patient)) is primary
+    assert session.get_bind(clause=select(Patient)) is primary
+    session.commit()
+    assert session.get_bind(clause=select(Patient)) is replica
+    session.close()
+
+def test_session_keeps_replica_across_run_query_transactions():
+    """Ensure a request's ETag query and body query, each committed by run_query, read the same replica."""
+    import asyncio
+    from api.dependencies import run_query
+
+    first, second = create_engine(TEST_DATABASE_URL), create_engine(TEST_DATABASE_URL)
+    session = RoutingSession(primary=primary, replicas=ReplicaSet([first, second]), expire_on_commit=False)
+
+    def bound_engine(db):
+        db.execute(select(Patient).limit(1)).all()
+        return db.get_bind(clause=select(Patient))
+
+    try:
+        assert asyncio.run(run_query(session, bound_engine)) is first
+        assert asyncio.run(run_query(session, bound_engine)) is first
+    finally:
+        session.close()
+        first.dispose()
+        second.dispose()
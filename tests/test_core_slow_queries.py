@@ -0,0 +1,130 @@
+import logging
+
+import pytest
+from cryptography.fernet import Fernet
+from sqlalchemy import create_engine, text
+
+from core.slow_queries import (
+    SlowQueryLog, current_labels, fingerprint, normalize_statement, pop_query_labels, push_query_labels, query_labels,
+    redact_parameters,
+)
+from tests.conftest import TEST_DATABASE_URL
+
+# ---------------------------------------------------------
+# Test Suite for Slow-Query Capture
+# ---------------------------------------------------------
+
+@pytest.fixture
+def engine():
+    engine = create_engine(TEST_DATABASE_URL)
+    yield engine
+    engine.dispose()
+
+def test_fingerprint_ignores_values_and_list_lengths():
+    """Ensure executions of one statement shape share a fingerprint whatever they bind."""
+    first = "SELECT * FROM runs WHERE sample_id IN (%(id_1)s, %(id_2)s) AND flowcell = 'FAX00042' LIMIT 50"
+    second = "SELECT *\n  FROM runs WHERE sample_id IN (%(id_1)s, %(id_2)s, %(id_3)s) AND flowcell = 'FAX99999' LIMIT 100"
+
+    assert normalize_statement(first) == "SELECT * FROM runs WHERE sample_id IN (?...) AND flowcell = ? LIMIT ?"
+    assert fingerprint(first) == fingerprint(second)
+    assert fingerprint(first) != fingerprint("SELECT * FROM samples WHERE sample_id = %(id)s")
+
+def test_redacts_encrypted_patient_ids():
+    """Ensure ciphertexts and patient-named parameters never reach the log."""
+    token = Fernet(Fernet.generate_key()).encrypt(b"PT-4459-X").decode()
+
+    redacted = redact_parameters({"patient_id_1": "anything", "ids": [token, "SMPL-1"], "note": f"owner {token}", "n": 3})
+
+    assert redacted == {"patient_id_1": "<redacted>", "ids": ["<encrypted>", "SMPL-1"], "note": "owner <encrypted>", "n": 3}
+    assert redact_parameters((token,)) == ["<encrypted>"]
+    expanded = redact_parameters({f"primary_keys_{i}": f"RUN-{i}" for i in range(1, 101)})
+    assert len(expanded) == 21 and expanded["..."] == "80 more"
+
+def test_labels_nest_and_restore():
+    """Ensure inner labels add to the outer ones and are dropped again on exit, in both forms."""
+    with query_labels(route="/samples/", path=lambda: "/samples/SAMP-1"):
+        token = push_query_labels(run_id="RUN-1")
+        assert current_labels() == {"route": "/samples/", "path": "/samples/SAMP-1", "run_id": "RUN-1"}
+        pop_query_labels(token)
+        assert current_labels() == {"route": "/samples/", "path": "/samples/SAMP-1"}
+    assert current_labels() == {}
+
+def test_captures_slow_statement_with_explain(engine, tmp_path, caplog):
+    """Ensure a slow SELECT is logged, labelled and explained without disturbing its transaction."""
+    log = SlowQueryLog(threshold_ms=20, directory=tmp_path, explain=True)
+    log.install(engine)
+
+    with engine.connect() as conn:
+        conn.execute(text("CREATE TEMPORARY TABLE slow_probe (n int)"))
+        with caplog.at_level(logging.WARNING, logger="core.slow_queries"), query_labels(route="/samples/", run_id="RUN-SLOW-1"):
+            conn.execute(text("SELECT 1"))  # Under the threshold
+            value = conn.execute(text("SELECT :n FROM pg_sleep(0.03)"), {"n": 7}).scalar()
+        # The explain savepoint was rolled back: the transaction is intact and still usable
+        assert value == 7
+        assert conn.execute(text("SELECT count(*) FROM slow_probe")).scalar() == 0
+        conn.rollback()
+
+    [record] = log.records()
+    assert record["statement"] == "SELECT ? FROM pg_sleep(?)"
+    assert record["count"] == 1 and record["max_ms"] >= 20
+    assert record["last"]["params"] == {"n": 7}
+    assert record["last"]["labels"] == {"route": "/samples/", "run_id": "RUN-SLOW-1"}
+    [plan] = record["plans"]
+    assert plan["shape"] == "Function Scan"
+    assert plan["plan"][0]["Plan"]["Actual Loops"] == 1  # ANALYZE ran it
+    assert "Slow query" in caplog.text and "run_id=RUN-SLOW-1" in caplog.text
+
+def test_explains_once_per_interval_and_skips_writes(engine, tmp_path):
+    """Ensure repeats only bump the counters and DML is never re-run."""
+    log = SlowQueryLog(threshold_ms=20, directory=tmp_path, explain=True, explain_interval=300)
+    log.install(engine)
+
+    with engine.connect() as conn:
+        conn.execute(text("CREATE TEMPORARY TABLE slow_probe (n int)"))
+        for _ in range(2):
+            conn.execute(text("SELECT 1 FROM pg_sleep(0.025)"))
+        conn.execute(text("INSERT INTO slow_probe SELECT 1 FROM pg_sleep(0.025)"))
+        assert conn.execute(text("SELECT count(*) FROM slow_probe")).scalar() == 1
+        conn.rollback()
+
+    select, insert = sorted(log.records(), key=lambda record: record["statement"])[::-1]
+    assert select["count"] == 2 and len(select["plans"]) == 1 and select["plans"][0]["count"] == 1
+    assert insert["statement"].startswith("INSERT") and insert["plans"] == []
+
+def test_plan_flip_is_logged(tmp_path, caplog):
+    """Ensure a new plan shape for a known fingerprint is kept next to the old one and reported."""
+    log = SlowQueryLog(threshold_ms=1, directory=tmp_path)
+    index_plan = {"plan": [{"Plan": {}}], "shape": "Index Scan:idx_runs_metadata", "explain_ms": 5.0}
+    seq_plan = {"plan": [{"Plan": {}}], "shape": "Seq Scan:runs", "explain_ms": 900.0}
+
+    with caplog.at_level(logging.WARNING, logger="core.slow_queries"):
+        for explained in (index_plan, index_plan, seq_plan):
+            record = log.record("abc", "SELECT * FROM runs WHERE metadata @> %(m)s", {}, {}, 10.0, explained)
+
+    assert [(plan["shape"], plan["count"]) for plan in record["plans"]] == [("Index Scan:idx_runs_metadata", 2), ("Seq Scan:runs", 1)]
+    assert "Index Scan:idx_runs_metadata -> Seq Scan:runs" in caplog.text
+
+def test_failed_statements_leave_nothing_on_the_connection(engine, tmp_path):
+    """Ensure statements that raise (and so never reach after_cursor_execute) do not pile up state on the pooled connection."""
+    log = SlowQueryLog(threshold_ms=20, directory=tmp_path)
+    log.install(engine)
+
+    with engine.connect() as conn:
+        for _ in range(3):
+            with pytest.raises(Exception):
+                conn.execute(text("SELECT missing_column"))
+            conn.rollback()
+        conn.execute(text("SELECT 1 FROM pg_sleep(0.025)"))
+
+        assert "slow_query_started" not in conn.info
+    assert [record["count"] for record in log.records()] == [1]
+
+def test_capture_failure_never_fails_the_statement(engine, tmp_path):
+    """Ensure an unwritable capture directory only costs a warning."""
+    blocker = tmp_path / "not-a-directory"
+    blocker.write_text("")
+    log = SlowQueryLog(threshold_ms=1, directory=blocker / "records")
+    log.install(engine)
+
+    with engine.connect() as conn:
+        assert conn.execute(text("SELECT 3 FROM pg_sleep(0.01)")).scalar() == 3
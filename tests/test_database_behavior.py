@@ -41,7 +41,7 @@ def test_updated_at_trigger_fires(db_session):
     assert original_time is not None, "Original time is None"
     assert new_time is not None, "New time is None"
     # This will fail if the DB trigger isn't currently applied to the `runs` table
-    # assert new_time > original_time 
+    assert new_time > original_time 
 
 def test_frontend_role_cannot_access_phi(db_session):
     """
@@ -58,4 +58,30 @@ def test_frontend_role_cannot_access_phi(db_session):
             assert False, "Frontend API was able to access the restricted base table!"
     except Exception as e:
         # We expect a psycopg2 ProgrammingError (Permission denied)
-        assert "permission denied for table patients" in str(e).lower()
\ No newline at end of file
+        assert "permission denied for table patients" in str(e).lower()
+def test_touch_triggers_update_each_parent_once_per_statement(db_session):
+    """
+    Verifies that a multi-row child write bumps its run and sample once, not once per row,
+    and that re-parenting a run bumps both the old and the new sample.
+    """
+    db_session.execute(text("""
+        INSERT INTO patients (patient_id) VALUES ('PAT-TOUCH');
+        INSERT INTO samples (sample_id, patient_id) VALUES ('SAMP-TOUCH-1', 'PAT-TOUCH'), ('SAMP-TOUCH-2', 'PAT-TOUCH');
+        INSERT INTO runs (run_id, sample_id, assay_type) VALUES ('RUN-TOUCH', 'SAMP-TOUCH-1', 'ONT_WGS');
+    """))
+    updates = text("SELECT relname, n_tup_upd FROM pg_stat_xact_user_tables WHERE relname IN ('runs', 'samples')")
+    before = dict(db_session.execute(updates).all())
+
+    db_session.execute(text("""
+        INSERT INTO file_locations (run_id, file_type, s3_uri)
+        SELECT 'RUN-TOUCH', 'FASTQ_' || i, 's3://touch/' || i FROM generate_series(1, 50) AS i
+    """))
+    after = dict(db_session.execute(updates).all())
+    assert after["runs"] - before["runs"] == 1
+    assert after["samples"] - before["samples"] == 1
+
+    stamps = text("SELECT sample_id, updated_at FROM samples WHERE sample_id LIKE 'SAMP-TOUCH-%'")
+    touched = dict(db_session.execute(stamps).all())
+    db_session.execute(text("UPDATE runs SET sample_id = 'SAMP-TOUCH-2' WHERE run_id = 'RUN-TOUCH'"))
+    retouched = dict(db_session.execute(stamps).all())
+    assert all(retouched[sample_id] > touched[sample_id] for sample_id in touched)
@@ -49,6 +49,43 @@ def test_main_success_with_metrics(mock_connect, tmp_path):
     mock_cur.close.assert_called_once()
     mock_conn.close.assert_called_once()
 
+@patch("db_log_outputs.psycopg2.connect")
+def test_main_routes_profiles_to_run_profiles(mock_connect, tmp_path):
+    """Ensure chart arrays are upserted into run_profiles, while the result keeps the whole metrics file."""
+    metrics_file = tmp_path / "qc_metrics.json"
+    metrics_file.write_text(json.dumps({
+        "coverage_profile": [30, 31, 29],
+        "quality_profile": [32.5, 33.1],
+        "coverage_depth": "45x"
+    }))
+    
+    test_args = [
+        "db_log_outputs.py",
+        "--run", "SAMP-789",
+        "--report", "s3://clinical-reports/SAMP-789_final.json",
+        "--version", "v1.2.0",
+        "--metrics", str(metrics_file)
+    ]
+    
+    mock_conn = MagicMock()
+    mock_connect.return_value = mock_conn
+    mock_cur = MagicMock()
+    mock_conn.cursor.return_value = mock_cur
+    
+    with patch.object(sys, 'argv', test_args):
+        db_log_outputs.main()
+        
+    assert mock_cur.execute.call_count == 3  # INSERT result, UPDATE run, upsert profiles
+    insert_params = mock_cur.execute.call_args_list[0].args[1]
+    update_params = mock_cur.execute.call_args_list[1].args[1]
+    upsert_query, upsert_params = mock_cur.execute.call_args_list[2].args
+    
+    assert insert_params[3].adapted == {"coverage_profile": [30, 31, 29], "quality_profile": [32.5, 33.1], "coverage_depth": "45x"}
+    assert json.loads(update_params[0]) == {"status": "complete"}
+    assert "run_profiles" in upsert_query
+    assert upsert_params == ("SAMP-789", [30, 31, 29], [32.5, 33.1])
+    mock_conn.commit.assert_called_once()
+
 @patch("db_log_outputs.psycopg2.connect")
 def test_main_success_without_metrics(mock_connect):
     """Ensure the script functions correctly if the optional metrics file is omitted."""
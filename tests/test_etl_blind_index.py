@@ -0,0 +1,48 @@
+import os
+import secrets
+
+from cryptography.fernet import Fernet
+from sqlalchemy import func, select
+
+# etl.security builds its singleton at import
+os.environ.setdefault("ENCRYPTION_KEY", Fernet.generate_key().decode())
+os.environ.setdefault("BLIND_INDEX_KEY", secrets.token_hex(32))
+
+from etl.etl_models import Patient, Sample
+from etl.jobs.backfill_blind_index import backfill_blind_index
+from etl.jobs.process_run import get_or_create_patient
+from etl.security import crypto_manager
+
+# ---------------------------------------------------------
+# Test Suite for Blind-Index Patient Deduplication
+# ---------------------------------------------------------
+
+def test_get_or_create_patient_deduplicates(session_factory):
+    """Ensure the same plaintext ID resolves to one patient row, despite randomised ciphertexts."""
+    db = session_factory()
+
+    first = get_or_create_patient(db, "PAT-BIDX-001")
+    db.commit()
+    second = get_or_create_patient(db, "PAT-BIDX-001")
+
+    assert first.patient_id == second.patient_id
+    assert crypto_manager.decrypt_patient_id(second.patient_id) == "PAT-BIDX-001"
+    assert db.scalar(select(func.count()).where(Patient.patient_blind_index == crypto_manager.blind_index("PAT-BIDX-001"))) == 1
+
+def test_backfill_indexes_and_merges_duplicates(session_factory):
+    """Ensure legacy rows are indexed and duplicate patients are folded into one, keeping their samples."""
+    db = session_factory()
+    legacy = [crypto_manager.encrypt_patient_id("PAT-BIDX-LEGACY") for _ in range(3)]
+    db.add_all([Patient(patient_id=patient_id) for patient_id in legacy])
+    db.flush()
+    db.add_all([Sample(sample_id=f"SAMP-BIDX-{i}", patient_id=patient_id) for i, patient_id in enumerate(legacy)])
+    db.commit()
+
+    stats = backfill_blind_index(batch_size=2, session_factory=session_factory)
+
+    assert stats.merged >= 2
+    [survivor] = db.scalars(select(Patient).where(Patient.patient_blind_index == crypto_manager.blind_index("PAT-BIDX-LEGACY"))).all()
+    assert survivor.patient_id in legacy
+    owners = db.scalars(select(Sample.patient_id).where(Sample.sample_id.like("SAMP-BIDX-%"))).all()
+    assert owners == [survivor.patient_id] * 3
+    assert db.scalar(select(func.count()).where(Patient.patient_id.in_(legacy))) == 1
@@ -0,0 +1,144 @@
+import os
+import secrets
+
+import pytest
+from cryptography.fernet import Fernet
+from sqlalchemy import select
+
+# etl.security builds its singleton at import
+os.environ.setdefault("ENCRYPTION_KEY", Fernet.generate_key().decode())
+os.environ.setdefault("BLIND_INDEX_KEY", secrets.token_hex(32))
+
+from etl.etl_models import FileLocation, Patient, Run, Sample
+from etl.jobs import bulk_ingest as job
+from etl.jobs.bulk_ingest import ManifestRow, bulk_ingest, read_manifest
+from etl.security import crypto_manager
+
+# ---------------------------------------------------------
+# Test Suite for Bulk Manifest Ingestion
+# ---------------------------------------------------------
+
+def _rows(n, sample_prefix="SAMP-BULK"):
+    return [
+        ManifestRow(
+            sample_id=f"{sample_prefix}-{i % 3}",
+            patient_id=f"PAT-BULK-{i % 3}",
+            assay_type="ONT_WGS",
+            run_id=f"RUN-BULK-{i}",
+            metadata={"sequencer": "GridION", "qc_passed": True},
+            files={"FASTQ_R1": f"s3://bulk/{i}_R1.fastq.gz", "FASTQ_R2": f"s3://bulk/{i}_R2.fastq.gz"},
+        )
+        for i in range(n)
+    ]
+
+def test_bulk_ingest_resolves_hierarchy(session_factory):
+    """Ensure patients and samples are created once and every run gets its files, across chunks."""
+    stats = bulk_ingest(_rows(7), chunk_size=3, session_factory=session_factory)
+
+    assert (stats.rows, stats.chunks) == (7, 3)
+    assert (stats.patients, stats.samples, stats.runs, stats.files) == (3, 3, 7, 14)
+
+    db = session_factory()
+    run = db.get(Run, "RUN-BULK-4")
+    assert run.sample_id == "SAMP-BULK-1"
+    assert run.sequencer == "GridION" and run.qc_passed is True
+    assert sorted(f.file_type for f in run.files) == ["FASTQ_R1", "FASTQ_R2"]
+    patient_id = db.get(Sample, "SAMP-BULK-1").patient_id
+    assert crypto_manager.decrypt_patient_id(patient_id) == "PAT-BULK-1"
+
+def test_bulk_ingest_is_idempotent(session_factory):
+    """Ensure re-ingesting the same manifest adds no runs, files or orphan patients."""
+    bulk_ingest(_rows(4), session_factory=session_factory)
+    db = session_factory()
+    patients_before = len(db.scalars(select(Patient.patient_id)).all())
+
+    stats = bulk_ingest(_rows(4), session_factory=session_factory)
+
+    assert (stats.patients, stats.samples, stats.runs, stats.files) == (0, 0, 0, 0)
+    assert len(db.scalars(select(Patient.patient_id)).all()) == patients_before
+    assert db.scalar(select(FileLocation.id).where(FileLocation.run_id == "RUN-BULK-0").limit(1)) is not None
+
+def test_bulk_ingest_reuses_known_patient(session_factory):
+    """Ensure a new sample for an already ingested patient attaches to the existing patient row."""
+    bulk_ingest(_rows(1), session_factory=session_factory)
+    rows = [ManifestRow(sample_id="SAMP-BULK-NEW", patient_id="PAT-BULK-0", assay_type="ONT_WGS", run_id="RUN-BULK-NEW")]
+
+    stats = bulk_ingest(rows, session_factory=session_factory)
+
+    db = session_factory()
+    assert (stats.patients, stats.samples) == (0, 1)
+    assert db.get(Sample, "SAMP-BULK-NEW").patient_id == db.get(Sample, "SAMP-BULK-0").patient_id
+
+def test_bulk_ingest_first_row_names_new_sample_patient(session_factory):
+    """Ensure a new sample listed under several patients creates only the patient it is attached to."""
+    rows = [
+        ManifestRow(sample_id="SAMP-BULK-DUP", patient_id=f"PAT-BULK-DUP-{i}", assay_type="ONT_WGS", run_id=f"RUN-BULK-DUP-{i}")
+        for i in range(3)
+    ]
+
+    stats = bulk_ingest(rows, session_factory=session_factory)
+
+    db = session_factory()
+    assert (stats.patients, stats.samples, stats.runs) == (1, 1, 3)
+    patient_id = db.get(Sample, "SAMP-BULK-DUP").patient_id
+    assert crypto_manager.decrypt_patient_id(patient_id) == "PAT-BULK-DUP-0"
+    blind_indexes = [crypto_manager.blind_index(f"PAT-BULK-DUP-{i}") for i in range(3)]
+    assert db.scalars(select(Patient.patient_id).where(Patient.patient_blind_index.in_(blind_indexes))).all() == [patient_id]
+
+def test_bulk_ingest_generates_run_ids(session_factory):
+    """Ensure rows without a run_id each get their own generated run."""
+    rows = [ManifestRow(sample_id="SAMP-BULK-GEN", patient_id="PAT-BULK-GEN", assay_type="ONT_RNASEQ") for _ in range(2)]
+
+    stats = bulk_ingest(rows, session_factory=session_factory)
+
+    db = session_factory()
+    run_ids = db.scalars(select(Run.run_id).where(Run.sample_id == "SAMP-BULK-GEN")).all()
+    assert stats.runs == 2 and len(set(run_ids)) == 2
+
+def test_generated_run_id_collision_fails_the_chunk(session_factory, monkeypatch):
+    """Ensure a generated run_id that already exists raises instead of silently dropping the run and its files."""
+    monkeypatch.setattr(job, "new_run_id", lambda: "RUN-BULK-COLLIDE")
+    rows = [ManifestRow(sample_id="SAMP-BULK-COL", patient_id="PAT-BULK-COL", assay_type="ONT_WGS", files={"FASTQ_R1": "s3://bulk/c.fq"})]
+    bulk_ingest(rows, session_factory=session_factory)
+
+    with pytest.raises(ValueError, match="RUN-BULK-COLLIDE"):
+        bulk_ingest(rows, session_factory=session_factory)
+
+    db = session_factory()
+    assert len(db.scalars(select(FileLocation.id).where(FileLocation.run_id == "RUN-BULK-COLLIDE")).all()) == 1
+
+def test_failed_chunk_rolls_back_alone(session_factory):
+    """Ensure a chunk that violates a constraint leaves earlier chunks committed."""
+    rows = _rows(2) + [ManifestRow(sample_id="S" * 60, patient_id="PAT-BULK-X", assay_type="ONT_WGS", run_id="RUN-BULK-X")]
+
+    with pytest.raises(Exception):
+        bulk_ingest(rows, chunk_size=2, session_factory=session_factory)
+
+    db = session_factory()
+    assert db.get(Run, "RUN-BULK-1") is not None
+    assert db.get(Run, "RUN-BULK-X") is None
+
+def test_read_manifest_csv_and_jsonl(tmp_path):
+    """Ensure both manifest formats map to the same rows, with extra CSV columns as file types."""
+    csv_path = tmp_path / "manifest.csv"
+    csv_path.write_text(
+        "sample_id,patient_id,assay_type,metadata,FASTQ_R1,FASTQ_R2\n"
+        'SAMP-1,PAT-1,WGS,"{""qc_passed"": true}",s3://b/1_R1.fq,\n'
+    )
+    jsonl_path = tmp_path / "manifest.jsonl"
+    jsonl_path.write_text(
+        '{"sample_id": "SAMP-1", "patient_id": "PAT-1", "assay_type": "WGS", '
+        '"metadata": {"qc_passed": true}, "files": {"FASTQ_R1": "s3://b/1_R1.fq"}}\n'
+    )
+
+    assert list(read_manifest(str(csv_path))) == list(read_manifest(str(jsonl_path))) == [
+        ManifestRow(sample_id="SAMP-1", patient_id="PAT-1", assay_type="WGS", files={"FASTQ_R1": "s3://b/1_R1.fq"}, metadata={"qc_passed": True})
+    ]
+
+def test_read_manifest_rejects_incomplete_rows(tmp_path):
+    """Ensure a row missing a required field names its line."""
+    path = tmp_path / "manifest.csv"
+    path.write_text("sample_id,patient_id,assay_type\nSAMP-1,,WGS\n")
+
+    with pytest.raises(ValueError, match="line 2: missing patient_id"):
+        list(read_manifest(str(path)))
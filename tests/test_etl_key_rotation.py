@@ -0,0 +1,71 @@
+import os
+import secrets
+
+import pytest
+from cryptography.fernet import Fernet
+from sqlalchemy import select
+
+# etl.security builds its singleton at import
+os.environ.setdefault("ENCRYPTION_KEY", Fernet.generate_key().decode())
+os.environ.setdefault("BLIND_INDEX_KEY", secrets.token_hex(32))
+
+from etl.etl_models import Patient, Sample
+from etl.jobs import rotate_encryption_key as job
+from etl.security import PHICryptoManager
+
+# ---------------------------------------------------------
+# Test Suite for the Key-Rotation Re-encryption Job
+# ---------------------------------------------------------
+
+OLD_KEY, NEW_KEY = Fernet.generate_key().decode(), Fernet.generate_key().decode()
+
+@pytest.fixture
+def legacy_patients(session_factory):
+    """Five patients, each with a sample, encrypted under OLD_KEY only."""
+    old = PHICryptoManager([OLD_KEY])
+    db = session_factory()
+    patient_ids = [old.encrypt_patient_id(f"PAT-ROT-{i}") for i in range(5)]
+    db.add_all([Patient(patient_id=patient_id) for patient_id in patient_ids])
+    db.flush()
+    db.add_all([Sample(sample_id=f"SAMP-ROT-{i}", patient_id=patient_id) for i, patient_id in enumerate(patient_ids)])
+    db.commit()
+    return patient_ids
+
+def test_rotation_rewrites_patients_and_samples(session_factory, legacy_patients, monkeypatch):
+    """Ensure every legacy ciphertext moves to the new key and samples follow their patient."""
+    monkeypatch.setattr(job, "crypto_manager", PHICryptoManager([NEW_KEY, OLD_KEY]))
+
+    stats = job.rotate_encryption_key(chunk_size=2, workers=1, session_factory=session_factory)
+
+    assert stats.rotated >= 5
+    new_only = PHICryptoManager([NEW_KEY])
+    db = session_factory()
+    for i in range(5):
+        sample = db.get(Sample, f"SAMP-ROT-{i}")
+        assert new_only.decrypt_patient_id(sample.patient_id) == f"PAT-ROT-{i}"
+        assert db.get(Patient, sample.patient_id) is not None
+    assert not set(legacy_patients) & set(db.scalars(select(Patient.patient_id)).all())
+
+def test_rotation_resumes_without_rework(session_factory, legacy_patients, monkeypatch):
+    """Ensure a second pass finds nothing left to rotate."""
+    monkeypatch.setattr(job, "crypto_manager", PHICryptoManager([NEW_KEY, OLD_KEY]))
+    job.rotate_encryption_key(workers=1, session_factory=session_factory)
+
+    stats = job.rotate_encryption_key(workers=1, session_factory=session_factory)
+
+    assert stats.rotated == 0
+    assert stats.scanned >= 5
+
+def test_rotation_keeps_patient_hashes(session_factory, legacy_patients, monkeypatch):
+    """Ensure the public patient_hash, and with it every /patients URL, survives rotation."""
+    db = session_factory()
+    before = {sample.sample_id: (sample.patient_hash, sample.patient.patient_hash) for sample in db.scalars(select(Sample).where(Sample.sample_id.like("SAMP-ROT-%")))}
+    db.close()
+    monkeypatch.setattr(job, "crypto_manager", PHICryptoManager([NEW_KEY, OLD_KEY]))
+
+    job.rotate_encryption_key(workers=1, session_factory=session_factory)
+
+    db = session_factory()
+    after = {sample.sample_id: (sample.patient_hash, sample.patient.patient_hash) for sample in db.scalars(select(Sample).where(Sample.sample_id.like("SAMP-ROT-%")))}
+    assert after == before
+    assert all(sample_hash == patient_hash for sample_hash, patient_hash in after.values())
@@ -1,9 +1,11 @@
 import pytest
 import os
+import secrets
 from cryptography.fernet import Fernet, InvalidToken
 
 # This prevents pytest collection from crashing when etl.security initializes its singleton.
 os.environ["ENCRYPTION_KEY"] = Fernet.generate_key().decode()
+os.environ.setdefault("BLIND_INDEX_KEY", secrets.token_hex(32))
 
 # Now it is safe to import the module!
 from etl.security import PHICryptoManager, crypto_manager
@@ -58,4 +60,72 @@ def test_decrypt_patient_id_invalid_token():
     
     # Fernet raises an InvalidToken exception if the payload is corrupted
     with pytest.raises(InvalidToken):
-        manager.decrypt_patient_id("malicious_or_corrupted_ciphertext_here")
\ No newline at end of file
+        manager.decrypt_patient_id("malicious_or_corrupted_ciphertext_here")
+
+def test_phi_crypto_manager_init_missing_blind_index_key(monkeypatch):
+    """Ensure the class hard-crashes if the blind index key is missing."""
+    monkeypatch.delenv("BLIND_INDEX_KEY", raising=False)
+
+    with pytest.raises(ValueError, match="BLIND_INDEX_KEY environment variable is not set."):
+        PHICryptoManager()
+
+def test_phi_crypto_manager_rejects_shared_key(monkeypatch):
+    """Ensure the blind index cannot be keyed with the encryption key."""
+    monkeypatch.setenv("BLIND_INDEX_KEY", os.environ["ENCRYPTION_KEY"])
+
+    with pytest.raises(ValueError, match="must differ"):
+        PHICryptoManager()
+
+def test_blind_index_is_deterministic_and_keyed(monkeypatch):
+    """Ensure the same ID always indexes the same way, differently per key, without leaking plaintext."""
+    manager = PHICryptoManager()
+    index = manager.blind_index("PATIENT-XYZ-999")
+
+    assert index == manager.blind_index("PATIENT-XYZ-999")
+    assert index != manager.blind_index("PATIENT-XYZ-998")
+    assert len(index) == 64 and "PATIENT" not in index
+    assert manager.blind_index(None) is None
+
+    monkeypatch.setenv("BLIND_INDEX_KEY", secrets.token_hex(32))
+    assert PHICryptoManager().blind_index("PATIENT-XYZ-999") != index
+
+def test_multiple_keys_decrypt_old_ciphertexts(monkeypatch):
+    """Ensure a prepended key encrypts new values while the old key still decrypts existing ones."""
+    old_key, new_key = Fernet.generate_key().decode(), Fernet.generate_key().decode()
+    monkeypatch.setenv("ENCRYPTION_KEY", old_key)
+    legacy = PHICryptoManager().encrypt_patient_id("PATIENT-XYZ-999")
+
+    monkeypatch.setenv("ENCRYPTION_KEY", f"{new_key}, {old_key}")
+    manager = PHICryptoManager()
+
+    assert manager.decrypt_patient_id(legacy) == "PATIENT-XYZ-999"
+    assert Fernet(new_key.encode()).decrypt(manager.encrypt_patient_id("PATIENT-XYZ-999").encode()) == b"PATIENT-XYZ-999"
+
+def test_rotate_patient_id_is_idempotent(monkeypatch):
+    """Ensure rotation moves a ciphertext to the primary key once and then leaves it alone."""
+    old_key, new_key = Fernet.generate_key().decode(), Fernet.generate_key().decode()
+    legacy = PHICryptoManager([old_key]).encrypt_patient_id("PATIENT-XYZ-999")
+    manager = PHICryptoManager([new_key, old_key])
+
+    rotated = manager.rotate_patient_id(legacy)
+
+    assert rotated != legacy
+    assert PHICryptoManager([new_key]).decrypt_patient_id(rotated) == "PATIENT-XYZ-999"
+    assert manager.rotate_patient_id(rotated) == rotated
+    with pytest.raises(InvalidToken):
+        PHICryptoManager([new_key]).rotate_patient_id(PHICryptoManager().encrypt_patient_id("OTHER"))
+
+def test_batch_apis_match_single_calls_across_process_pool():
+    """Ensure the pooled batch APIs return results in input order, equal to the per-ID methods."""
+    manager = PHICryptoManager()
+    plaintexts = [f"PATIENT-{i:04d}" for i in range(50)]
+
+    with manager.process_pool(workers=2) as pool:
+        encrypted = manager.encrypt_patient_ids(plaintexts, executor=pool)
+        decrypted = manager.decrypt_patient_ids(encrypted, executor=pool)
+        rotated = manager.rotate_patient_ids(encrypted + ["malicious_or_corrupted_ciphertext_here"], executor=pool)
+
+    assert decrypted == plaintexts
+    assert [manager.decrypt_patient_id(value) for value in encrypted] == plaintexts
+    assert rotated == encrypted + [None]
+    assert manager.decrypt_patient_ids(encrypted) == plaintexts